@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StaffProfile, AccountHead, AccountTransaction, Receipt
+from .models import StaffProfile, AccountHead, AccountTransaction, Receipt, ReceiptSequence, MemberLedgerBalance
 
 
 @admin.register(StaffProfile)
@@ -32,7 +32,22 @@ class AccountTransactionAdmin(admin.ModelAdmin):
 
 @admin.register(Receipt)
 class ReceiptAdmin(admin.ModelAdmin):
-    list_display = ('receipt_number', 'transaction', 'generated_at')
+    list_display = ('receipt_number', 'transaction', 'generated_at', 'render_status')
+    list_filter = ('render_status',)
     search_fields = ('receipt_number',)
-    readonly_fields = ('receipt_number', 'generated_at')
+    readonly_fields = ('receipt_number', 'generated_at', 'render_attempts', 'render_error', 'rendered_at')
     raw_id_fields = ('transaction',)
+
+
+@admin.register(ReceiptSequence)
+class ReceiptSequenceAdmin(admin.ModelAdmin):
+    list_display = ('fiscal_year', 'last_value')
+    readonly_fields = ('fiscal_year', 'last_value')
+
+
+@admin.register(MemberLedgerBalance)
+class MemberLedgerBalanceAdmin(admin.ModelAdmin):
+    list_display = ('member', 'tax_year_start', 'total_debits', 'total_credits', 'updated_at')
+    list_filter = ('tax_year_start',)
+    search_fields = ('member__name', 'member__member_id')
+    readonly_fields = ('member', 'tax_year_start', 'total_debits', 'total_credits', 'updated_at')
@@ -0,0 +1,355 @@
+"""
+Persistent headless-browser pool for receipt PDF rendering.
+
+Instead of cold-starting Chromium / Edge for every receipt, each process keeps
+a small pool of long-lived browsers driven through the DevTools protocol over
+``--remote-debugging-pipe`` (fd 3 = commands in, fd 4 = replies out, messages
+are NUL-terminated JSON).  HTML goes in over the pipe and PDF bytes come back
+over the pipe; no temp HTML or PDF files are written.
+
+- The browser executable is resolved once per process (find_browser_executable).
+- At most RECEIPT_BROWSER_POOL_SIZE renders run concurrently; extra callers
+  wait for a free slot.
+- Idle workers are health-checked (process alive + Browser.getVersion) before
+  reuse, and recycled after RECEIPT_BROWSER_MAX_RENDERS renders.
+- Each worker keeps one tab, navigated to the template directory once, and
+  swaps each receipt's HTML into it; renders pay no navigation round trip.
+
+The pipe transport needs POSIX fd inheritance; on Windows get_browser_pool()
+returns None and receipt_generator falls back to one-shot --print-to-pdf.
+"""
+
+import atexit
+import base64
+import functools
+import json
+import logging
+import os
+import queue
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BROWSER_CANDIDATES = [
+    r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe',
+    r'C:\Program Files\Microsoft\Edge\Application\msedge.exe',
+    r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+    r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
+    'google-chrome',
+    'chromium-browser',
+    'chromium',
+    'msedge',
+]
+
+
+@functools.lru_cache(maxsize=1)
+def find_browser_executable():
+    """
+    Return the path of the first available Chromium-family browser, or None.
+    Resolved once per process; call ``find_browser_executable.cache_clear()``
+    after installing a browser into a running process.
+    """
+    for path in BROWSER_CANDIDATES:
+        if os.path.isabs(path):
+            if os.path.exists(path):
+                return path
+        else:
+            resolved = shutil.which(path)
+            if resolved:
+                return resolved
+    return None
+
+
+_FD_TRAMPOLINE = '''
+import fcntl, os, sys
+cmd_r, out_w = (fcntl.fcntl(int(fd), fcntl.F_DUPFD, 10) for fd in sys.argv[1:3])
+os.dup2(cmd_r, 3)
+os.dup2(out_w, 4)
+for fd in {cmd_r, out_w, int(sys.argv[1]), int(sys.argv[2])} - {3, 4}:
+    os.close(fd)
+os.execv(sys.argv[3], sys.argv[3:])
+'''
+
+
+class BrowserError(Exception):
+    """Raised when a pooled browser fails to answer a DevTools command."""
+
+
+class BrowserWorker:
+    """
+    A single headless browser process spoken to over --remote-debugging-pipe.
+    Not thread-safe — the pool hands each worker to one caller at a time.
+    """
+
+    def __init__(self, executable, timeout=15):
+        self.timeout = timeout
+        self.render_count = 0
+        self._next_id = 0
+        self._buffer = b''
+        self._events = []
+        self._page = None
+        self._profile_dir = tempfile.mkdtemp(prefix='receipt-browser-')
+
+        # Parent writes commands into cmd_w (browser reads fd 3) and reads
+        # replies from out_r (browser writes fd 4).
+        cmd_r, self._cmd_w = os.pipe()
+        self._out_r, out_w = os.pipe()
+
+        flags = [
+            '--headless',
+            '--disable-gpu',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-extensions',
+            '--remote-debugging-pipe',
+            f'--user-data-dir={self._profile_dir}',
+        ]
+        if hasattr(os, 'geteuid') and os.geteuid() == 0:
+            flags.append('--no-sandbox')
+
+        # A tiny Python trampoline moves the pipe ends onto fds 3/4 and then
+        # exec's the browser; preexec_fn is unsafe in threaded servers.
+        try:
+            self.process = subprocess.Popen(
+                [
+                    sys.executable, '-c', _FD_TRAMPOLINE,
+                    str(cmd_r), str(out_w), executable, *flags,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(cmd_r, out_w),
+            )
+        finally:
+            os.close(cmd_r)
+            os.close(out_w)
+
+    # -- DevTools protocol -------------------------------------------------
+
+    def call(self, method, params=None, session_id=None, timeout=None):
+        """Send one DevTools command and return its ``result`` payload."""
+        self._next_id += 1
+        message = {'id': self._next_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        payload = json.dumps(message).encode('utf-8') + b'\0'
+        while payload:
+            written = os.write(self._cmd_w, payload)
+            payload = payload[written:]
+
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            reply = self._read_message(deadline)
+            if 'method' in reply:
+                self._events.append(reply)
+                continue
+            if reply.get('id') != self._next_id:
+                continue  # stale reply to a command that timed out
+            if 'error' in reply:
+                raise BrowserError(f"{method}: {reply['error'].get('message')}")
+            return reply.get('result', {})
+
+    def wait_for_event(self, method, session_id=None, timeout=None):
+        """Block until the protocol event *method* arrives for *session_id*."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            for event in self._events:
+                if event['method'] == method and event.get('sessionId') == session_id:
+                    self._events.remove(event)
+                    return event.get('params', {})
+            message = self._read_message(deadline)
+            if 'method' in message:
+                self._events.append(message)
+
+    def _read_message(self, deadline):
+        while b'\0' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise BrowserError('Timed out waiting for the browser.')
+            ready, _, _ = select.select([self._out_r], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(self._out_r, 65536)
+            if not chunk:
+                raise BrowserError('Browser closed the DevTools pipe.')
+            self._buffer += chunk
+        raw, self._buffer = self._buffer.split(b'\0', 1)
+        return json.loads(raw)
+
+    # -- Public API ----------------------------------------------------------
+
+    def is_healthy(self):
+        if self.process.poll() is not None:
+            return False
+        try:
+            self.call('Browser.getVersion', timeout=2)
+            return True
+        except (BrowserError, OSError, ValueError):
+            return False
+
+    def _open_page(self, base_url):
+        """
+        Return (session_id, frame_id) of this worker's tab at *base_url*.
+
+        Loading the base URL gives the document a file:// origin so
+        templates can reference local fonts / images.  The tab is kept
+        between renders, so that navigation happens once per worker (again
+        only if a caller passes a different base URL).
+        """
+        if self._page is not None and self._page[0] == base_url:
+            return self._page[2:]
+        if self._page is not None:
+            self._close_target(self._page[1])
+            self._page = None
+        target_id = self.call('Target.createTarget', {'url': 'about:blank'})['targetId']
+        try:
+            session_id = self.call(
+                'Target.attachToTarget', {'targetId': target_id, 'flatten': True},
+            )['sessionId']
+            if base_url:
+                self.call('Page.enable', {}, session_id)
+                self.call('Page.navigate', {'url': base_url}, session_id)
+                self.wait_for_event('Page.loadEventFired', session_id)
+            frame_id = self.call('Page.getFrameTree', {}, session_id)['frameTree']['frame']['id']
+        except Exception:
+            self._close_target(target_id)
+            raise
+        self._page = (base_url, target_id, session_id, frame_id)
+        return session_id, frame_id
+
+    def _close_target(self, target_id):
+        try:
+            self.call('Target.closeTarget', {'targetId': target_id}, timeout=2)
+        except (BrowserError, OSError, ValueError):
+            pass
+
+    def render(self, html_content, base_url=None):
+        """Render *html_content* in this worker's tab and return the PDF bytes."""
+        self._events.clear()
+        session_id, frame_id = self._open_page(base_url)
+        self.call('Page.setDocumentContent', {'frameId': frame_id, 'html': html_content}, session_id)
+        self.call('Runtime.evaluate', {
+            'expression': 'document.fonts.ready.then(() => true)',
+            'awaitPromise': True,
+        }, session_id)
+        result = self.call('Page.printToPDF', {
+            'printBackground': True,
+            'preferCSSPageSize': True,
+            'displayHeaderFooter': False,
+        }, session_id)
+        self.render_count += 1
+        return base64.b64decode(result['data'])
+
+    def close(self):
+        try:
+            if self.process.poll() is None:
+                try:
+                    self.call('Browser.close', timeout=2)
+                except (BrowserError, OSError, ValueError):
+                    pass
+                try:
+                    self.process.wait(timeout=3)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+        finally:
+            for fd in (self._cmd_w, self._out_r):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+
+
+class BrowserPool:
+    """
+    Bounded pool of BrowserWorker instances.
+
+    *worker_factory* is a zero-argument callable returning a new worker;
+    it exists so tests can substitute a fake browser.
+    """
+
+    def __init__(self, worker_factory, size=2, max_renders=100):
+        self.worker_factory = worker_factory
+        self.max_renders = max_renders
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def render(self, html_content, base_url=None):
+        with self._slots:
+            worker = self._checkout()
+            try:
+                pdf_bytes = worker.render(html_content, base_url=base_url)
+            except Exception:
+                worker.close()
+                raise
+            self._checkin(worker)
+            return pdf_bytes
+
+    def _checkout(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return self.worker_factory()
+            if worker.is_healthy():
+                return worker
+            logger.info("Discarding unhealthy receipt browser worker.")
+            worker.close()
+
+    def _checkin(self, worker):
+        if worker.render_count >= self.max_renders:
+            worker.close()
+        else:
+            self._idle.put(worker)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Return this process's BrowserPool, creating it on first use.
+    Returns None when no browser is installed or the platform lacks pipe
+    support.  A forked child gets its own pool rather than sharing pipes.
+    """
+    global _pool, _pool_pid
+    if os.name != 'posix':
+        return None
+    executable = find_browser_executable()
+    if not executable:
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            timeout = getattr(settings, 'RECEIPT_BROWSER_TIMEOUT', 15)
+            _pool = BrowserPool(
+                worker_factory=lambda: BrowserWorker(executable, timeout=timeout),
+                size=getattr(settings, 'RECEIPT_BROWSER_POOL_SIZE', 2),
+                max_renders=getattr(settings, 'RECEIPT_BROWSER_MAX_RENDERS', 100),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+@atexit.register
+def _close_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close()
@@ -0,0 +1,118 @@
+"""
+Dashboard summary engine.
+
+Every figure the dashboard and the summary endpoints show (income /
+expense totals, fiat vs gold / silver / other commodity weights,
+per-payment-mode and per-head splits) is folded out of ONE grouped query:
+
+    SELECT account_head_id, account_head.name, payment_mode,
+           commodity_type, transaction_type, SUM(amount), COUNT(*)
+    ... GROUP BY those columns
+
+The result has at most heads x modes x commodities x 2 rows, so the
+folding in Python is trivial however many transactions there are.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from .models import AccountTransaction
+
+ZERO = Decimal('0.00')
+CENTS = Decimal('0.01')
+COMMODITY_TYPES = ('Gold', 'Silver', 'Other')
+
+
+class _Bucket:
+    __slots__ = ('credits', 'debits', 'count')
+
+    def __init__(self):
+        self.credits = ZERO
+        self.debits = ZERO
+        self.count = 0
+
+    def add(self, transaction_type, total, count):
+        if transaction_type == 'CREDIT':
+            self.credits += total
+        else:
+            self.debits += total
+        self.count += count
+
+    def as_dict(self):
+        return {
+            'total_credits': str(self.credits),
+            'total_debits': str(self.debits),
+            'net_balance': str(self.credits - self.debits),
+            'transaction_count': self.count,
+        }
+
+
+def summary_rows(date_from=None, date_to=None, trust_account=None):
+    """The single grouped query; one dict per (head, mode, commodity, type)."""
+    qs = AccountTransaction.objects.filter(is_deleted=False)
+    if date_from:
+        qs = qs.filter(transaction_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(transaction_date__lte=date_to)
+    if trust_account:
+        qs = qs.filter(trust_account_id=trust_account)
+    return qs.order_by().values(
+        'account_head_id', 'account_head__name', 'payment_mode',
+        'commodity_type', 'transaction_type',
+    ).annotate(total=Sum('amount'), n=Count('id'))
+
+
+def dashboard_summary(date_from=None, date_to=None, trust_account=None):
+    """
+    Build every dashboard bucket from summary_rows().
+
+    'totals' sums every row, as the overall summary always has; 'fiat'
+    leaves out payment_mode='Commodities' rows, whose amounts are
+    weights, and those are split by commodity_type instead.
+    """
+    totals = _Bucket()
+    fiat = _Bucket()
+    commodities = {name: _Bucket() for name in COMMODITY_TYPES}
+    modes = {}
+    heads = {}
+
+    for row in summary_rows(date_from, date_to, trust_account):
+        total = Decimal(row['total'] or 0).quantize(CENTS)
+        tx_type, count = row['transaction_type'], row['n']
+        totals.add(tx_type, total, count)
+        if row['payment_mode'] == 'Commodities':
+            bucket = commodities.get(row['commodity_type'])
+            if bucket is not None:
+                bucket.add(tx_type, total, count)
+        else:
+            fiat.add(tx_type, total, count)
+        modes.setdefault(row['payment_mode'], _Bucket()).add(tx_type, total, count)
+        head = heads.setdefault(row['account_head_id'], (row['account_head__name'], _Bucket()))
+        head[1].add(tx_type, total, count)
+
+    return {
+        'totals': totals,
+        'fiat': fiat,
+        'commodities': commodities,
+        'payment_modes': modes,
+        'heads': heads,
+    }
+
+
+def serialize_summary(summary):
+    """JSON-ready form of dashboard_summary()."""
+    data = {
+        'totals': summary['totals'].as_dict(),
+        'fiat': summary['fiat'].as_dict(),
+        'payment_modes': {
+            mode: bucket.as_dict() for mode, bucket in sorted(summary['payment_modes'].items())
+        },
+        'heads': [
+            dict(bucket.as_dict(), id=head_id, name=name)
+            for head_id, (name, bucket) in sorted(summary['heads'].items(), key=lambda item: item[1][0])
+        ],
+    }
+    for name, bucket in summary['commodities'].items():
+        data[name.lower()] = bucket.as_dict()
+    return data
@@ -0,0 +1,237 @@
+"""
+Per-member ledger balances.
+
+Every AccountTransaction write ends in record_transaction_change(before,
+after).  How the member rollup (annual_tax / amount_paid / amount_due)
+is then refreshed depends on settings.MEMBER_ROLLUP_MODE:
+
+- "incremental" (default): the transaction's old contribution is
+  subtracted from, and its new contribution added to, the
+  MemberLedgerBalance row of the affected (member, tax year), and the
+  member's rollup fields are copied from that row.  A handful of
+  single-row statements per write, however long the member's history is.
+- "recompute": the previous behaviour; re-sum the member's transactions
+  for the tax year (accounting.utils.recalculate_member_financials).
+
+A balance row that does not exist yet is built from a full recompute the
+first time it is touched, so existing data needs no backfill.  Full
+recomputes (bulk tax generation, imports, reconcile_member_balances --fix)
+store their results back into the rows, which keeps both modes in sync.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from members.utils import getCurrentTaxYearRange
+
+from .models import AccountTransaction, MemberLedgerBalance
+
+ZERO = Decimal('0.00')
+
+
+def is_incremental():
+    return getattr(settings, 'MEMBER_ROLLUP_MODE', 'incremental') == 'incremental'
+
+
+def tax_year_start(date):
+    return getCurrentTaxYearRange(date)[0]
+
+
+def _entry(tx):
+    """(member_id, tax_year_start, debit, credit) a transaction contributes."""
+    if tx is None or not tx.member_id or tx.is_deleted:
+        return None
+    amount = Decimal(str(tx.amount))
+    if tx.transaction_type == 'DEBIT':
+        return tx.member_id, tax_year_start(tx.transaction_date), amount, ZERO
+    return tx.member_id, tax_year_start(tx.transaction_date), ZERO, amount
+
+
+def _rollup_targets(before, after):
+    """
+    (member_id, date) pairs whose rollup must be refreshed, in order;
+    the same pairs the old save()/post_delete code recalculated.
+    """
+    targets = []
+    if before is not None and before.member_id and (
+        after is None
+        or before.member_id != after.member_id
+        or before.transaction_date != after.transaction_date
+    ):
+        targets.append((before.member_id, before.transaction_date))
+    if after is not None and after.member_id:
+        targets.append((after.member_id, after.transaction_date))
+    return targets
+
+
+def record_transaction_change(before, after):
+    """
+    Update member rollups after a transaction write.
+
+    *before* is the row as it was in the database (None for an insert);
+    *after* is the row as saved (None for a hard delete).
+    """
+    from .utils import request_member_rollup
+
+    if is_incremental():
+        deltas = defaultdict(lambda: [ZERO, ZERO])
+        for entry, sign in ((_entry(before), -1), (_entry(after), 1)):
+            if entry:
+                member_id, start, debit, credit = entry
+                deltas[(member_id, start)][0] += sign * debit
+                deltas[(member_id, start)][1] += sign * credit
+        with transaction.atomic():
+            for (member_id, start), (debit, credit) in deltas.items():
+                apply_delta(member_id, start, debit, credit)
+
+    # Copying the totals onto the Member honours defer_member_rollups().
+    for member_id, date in _rollup_targets(before, after):
+        request_member_rollup(member_id, date)
+
+
+def sync_member_rollups(pairs):
+    """
+    Incremental-mode rollup: copy the balance row of each (member_id, date)
+    pair onto the member, building rows that do not exist yet.
+    """
+    with transaction.atomic():
+        for member_id, date in pairs:
+            start = tax_year_start(date)
+            if not MemberLedgerBalance.objects.filter(
+                member_id=member_id, tax_year_start=start,
+            ).exists():
+                apply_delta(member_id, start, ZERO, ZERO)
+            sync_member_rollup(member_id, start)
+
+
+# ---------------------------------------------------------------------------
+# Balance rows
+# ---------------------------------------------------------------------------
+
+def apply_delta(member_id, start, debit, credit):
+    """Add a signed delta to a balance row, building the row if it is missing."""
+    updated = MemberLedgerBalance.objects.filter(
+        member_id=member_id, tax_year_start=start,
+    ).update(
+        total_debits=F('total_debits') + debit,
+        total_credits=F('total_credits') + credit,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return
+
+    # First touch: the row is built from the transactions table, which
+    # already reflects this write, so the delta itself is not added.
+    debits, credits = compute_balance(member_id, start)
+    _, created = MemberLedgerBalance.objects.get_or_create(
+        member_id=member_id, tax_year_start=start,
+        defaults={'total_debits': debits, 'total_credits': credits},
+    )
+    if not created:
+        # A concurrent writer built the row first from a snapshot that
+        # could not see this write; add the delta on top.
+        MemberLedgerBalance.objects.filter(
+            member_id=member_id, tax_year_start=start,
+        ).update(
+            total_debits=F('total_debits') + debit,
+            total_credits=F('total_credits') + credit,
+        )
+
+
+def sync_member_rollup(member_id, start):
+    """Copy one balance row into the member's rollup fields (one UPDATE)."""
+    from members.models import Member
+
+    balance = MemberLedgerBalance.objects.filter(
+        member_id=OuterRef('pk'), tax_year_start=start,
+    )
+    Member.objects.filter(pk=member_id).update(
+        annual_tax=Subquery(balance.values('total_debits')[:1]),
+        amount_paid=Subquery(balance.values('total_credits')[:1]),
+        amount_due=Subquery(
+            balance.annotate(due=F('total_debits') - F('total_credits')).values('due')[:1]
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def compute_balance(member_id, start):
+    """Full recompute of one (member, tax year) as (debits, credits)."""
+    _, end = getCurrentTaxYearRange(start)
+    sums = AccountTransaction.objects.filter(
+        member_id=member_id, transaction_date__range=(start, end), is_deleted=False,
+    ).aggregate(
+        debits=Sum('amount', filter=Q(transaction_type='DEBIT')),
+        credits=Sum('amount', filter=Q(transaction_type='CREDIT')),
+    )
+    return sums['debits'] or ZERO, sums['credits'] or ZERO
+
+
+def compute_all_balances(member_ids=None):
+    """
+    Full recompute of every (member, tax year) with one GROUP BY.
+    Returns {(member_id, tax_year_start): (debits, credits)}.
+    """
+    import datetime
+
+    qs = AccountTransaction.objects.filter(is_deleted=False, member__isnull=False)
+    if member_ids is not None:
+        qs = qs.filter(member_id__in=member_ids)
+    tax_year = Case(
+        When(transaction_date__month__gte=8, then=ExtractYear('transaction_date')),
+        default=ExtractYear('transaction_date') - 1,
+        output_field=IntegerField(),
+    )
+    rows = (
+        qs.annotate(tax_year=tax_year)
+        .values('member_id', 'tax_year')
+        .annotate(
+            debits=Sum('amount', filter=Q(transaction_type='DEBIT')),
+            credits=Sum('amount', filter=Q(transaction_type='CREDIT')),
+        )
+    )
+    return {
+        (row['member_id'], datetime.date(row['tax_year'], 8, 1)):
+            (row['debits'] or ZERO, row['credits'] or ZERO)
+        for row in rows
+    }
+
+
+def store_balances(values):
+    """
+    Overwrite balance rows with recomputed ``{(member_id, start): (debits,
+    credits)}`` values, creating rows that do not exist yet.
+    """
+    if not values:
+        return
+    member_ids = {member_id for member_id, _ in values}
+    starts = {start for _, start in values}
+    existing = {
+        (row.member_id, row.tax_year_start): row
+        for row in MemberLedgerBalance.objects.filter(
+            member_id__in=member_ids, tax_year_start__in=starts,
+        ).order_by()
+    }
+    now = timezone.now()
+    to_create, to_update = [], []
+    for key, (debits, credits) in values.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(MemberLedgerBalance(
+                member_id=key[0], tax_year_start=key[1],
+                total_debits=debits, total_credits=credits,
+            ))
+        elif row.total_debits != debits or row.total_credits != credits:
+            row.total_debits, row.total_credits, row.updated_at = debits, credits, now
+            to_update.append(row)
+    # ignore_conflicts: a row built concurrently by apply_delta is already exact.
+    MemberLedgerBalance.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    MemberLedgerBalance.objects.bulk_update(
+        to_update, ['total_debits', 'total_credits', 'updated_at'], batch_size=500,
+    )
@@ -0,0 +1,269 @@
+"""
+Django management command that measures the AccountTransaction hot
+queries with and without the indexes declared on AccountTransaction.Meta.
+
+Usage (against a scratch database, never production):
+    DB_NAME=/tmp/bench.sqlite3 python manage.py migrate
+    DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_transaction_indexes --seed 1000000
+    DB_NAME=/tmp/bench.sqlite3 python manage.py benchmark_transaction_indexes --repeat 10
+
+--seed adds synthetic members, heads, trust accounts and transactions
+(bulk inserts, no receipts or rollups) until the table holds that many
+rows.  The "before" run drops the indexes inside a transaction that is
+rolled back afterwards, so the schema is left as migrated.  Each query
+shape mirrors the code path named next to it; its EXPLAIN output is
+printed for both runs.
+"""
+
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Q, Sum
+
+from accounting.models import AccountHead, AccountTransaction, TrustAccount
+from members.models import Member
+from members.utils import getCurrentTaxYearRange
+
+SEED_PREFIX = 'BENCH'
+SEED_BATCH = 5000
+SEED_YEARS = 6
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN and time the AccountTransaction hot queries with and without their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Insert synthetic transactions until the table has this many rows',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Timed runs per query; the best is reported (default 5)',
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.alias = options['database']
+        self.connection = connections[self.alias]
+        if options['seed']:
+            self._seed(options['seed'])
+        if not AccountTransaction.objects.using(self.alias).exists():
+            raise CommandError('No transactions to benchmark; pass --seed N.')
+
+        indexes = self._existing_indexes()
+        if not indexes:
+            raise CommandError('The AccountTransaction indexes are missing; run migrate first.')
+
+        cases = self._cases()
+        self._analyze()
+        with transaction.atomic(using=self.alias):
+            editor = self.connection.schema_editor()
+            with self.connection.cursor() as cursor:
+                for index in indexes:
+                    cursor.execute(str(index.remove_sql(AccountTransaction, editor)))
+            self._analyze()
+            before = self._run(cases, options['repeat'])
+            transaction.set_rollback(True, using=self.alias)
+        self._analyze()
+        after = self._run(cases, options['repeat'])
+
+        total = AccountTransaction.objects.using(self.alias).count()
+        self.stdout.write(f"\n{total} transactions on {self.connection.vendor}, "
+                          f"best of {options['repeat']} runs\n")
+        for label, _ in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}'))
+            self.stdout.write(f"-- without indexes: {before[label][0] * 1000:.1f} ms")
+            self.stdout.write(before[label][1])
+            self.stdout.write(f"-- with indexes: {after[label][0] * 1000:.1f} ms")
+            self.stdout.write(after[label][1] + '\n')
+
+        self.stdout.write(f"{'query':<44}{'before ms':>11}{'after ms':>11}{'speedup':>9}")
+        for label, _ in cases:
+            old, new = before[label][0], after[label][0]
+            self.stdout.write(
+                f"{label:<44}{old * 1000:>11.1f}{new * 1000:>11.1f}"
+                f"{(old / new if new else 0):>8.1f}x"
+            )
+
+    # ------------------------------------------------------------------
+
+    def _existing_indexes(self):
+        table = AccountTransaction._meta.db_table
+        with self.connection.cursor() as cursor:
+            present = self.connection.introspection.get_constraints(cursor, table)
+        return [index for index in AccountTransaction._meta.indexes if index.name in present]
+
+    def _analyze(self):
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {AccountTransaction._meta.db_table}')
+            elif self.connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def _run(self, cases, repeat):
+        results = {}
+        for label, build in cases:
+            qs = build()
+            list(qs)  # warm the cache
+            best = None
+            for _ in range(max(repeat, 1)):
+                started = time.perf_counter()
+                list(qs.all())
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, qs.explain())
+        return results
+
+    def _cases(self):
+        txns = AccountTransaction.objects.using(self.alias).filter(is_deleted=False)
+        latest = txns.order_by('-transaction_date').values_list('transaction_date', flat=True).first()
+        year_range = getCurrentTaxYearRange(latest)
+        month_start = latest.replace(day=1)
+        member_ids = list(
+            txns.filter(member__isnull=False).order_by()
+            .values_list('member_id', flat=True).distinct()[:50]
+        )
+        head_id = (
+            txns.order_by().values('account_head_id').annotate(n=Count('id'))
+            .order_by('-n').values_list('account_head_id', flat=True).first()
+        )
+        trust_id = (
+            txns.filter(trust_account__isnull=False).order_by()
+            .values('trust_account_id').annotate(n=Count('id'))
+            .order_by('-n').values_list('trust_account_id', flat=True).first()
+        )
+        sums = {
+            'debits': Sum('amount', filter=Q(transaction_type='DEBIT')),
+            'credits': Sum('amount', filter=Q(transaction_type='CREDIT')),
+        }
+
+        cases = [
+            # accounting/utils.py recalculate_member_financials_bulk
+            ('member rollup (50 members, tax year)', lambda: (
+                txns.filter(member_id__in=member_ids, transaction_date__range=year_range)
+                .order_by().values('member_id').annotate(**sums)
+            )),
+            # accounting/ledger.py compute_balance
+            ('member balance (1 member, tax year)', lambda: (
+                txns.filter(member_id=member_ids[0], transaction_date__range=year_range)
+                .order_by().values('member_id').annotate(**sums)
+            )),
+            # accounting/xlsx_export.py head_totals / AccountHead summary
+            ('head totals (1 head, tax year)', lambda: (
+                txns.filter(account_head_id=head_id, transaction_date__range=year_range)
+                .order_by().values('account_head_id', 'transaction_type').annotate(t=Sum('amount'))
+            )),
+            # accounting/xlsx_export.py income sheet rows
+            ('head export sheet (1 head, 1 month)', lambda: (
+                txns.filter(account_head_id=head_id, transaction_type='CREDIT',
+                            transaction_date__range=(month_start, latest))
+                .order_by('transaction_date', 'id')
+                .values_list('id', 'transaction_date', 'amount', 'donor_name')
+            )),
+            # accounting/dashboard.py summary_rows
+            ('dashboard summary (1 month)', lambda: (
+                txns.filter(transaction_date__range=(month_start, latest)).order_by()
+                .values('account_head_id', 'payment_mode', 'commodity_type', 'transaction_type')
+                .annotate(total=Sum('amount'), n=Count('id'))
+            )),
+            # AccountTransactionViewSet list, first page
+            ('transaction list (first page)', lambda: (
+                txns.order_by('-transaction_date', '-created_at').values_list('id', flat=True)[:50]
+            )),
+        ]
+        if trust_id:
+            cases += [
+                # accounting/trust_ledger.py statement_page
+                ('trust ledger page (100 rows)', lambda: (
+                    txns.filter(trust_account_id=trust_id, transaction_date__gte=year_range[0])
+                    .order_by('transaction_date', 'id')
+                    .values_list('id', 'transaction_date', 'transaction_type', 'amount')[:100]
+                )),
+                # accounting/trust_ledger.py opening_balance
+                ('trust ledger opening balance', lambda: (
+                    txns.filter(trust_account_id=trust_id, transaction_date__lt=year_range[0])
+                    .order_by().values('trust_account_id').annotate(**sums)
+                )),
+            ]
+        return cases
+
+    # ------------------------------------------------------------------
+
+    def _seed(self, target):
+        existing = AccountTransaction.objects.using(self.alias).count()
+        missing = target - existing
+        if missing <= 0:
+            self.stdout.write(f'{existing} transactions already present; nothing to seed.')
+            return
+
+        rng = random.Random(target)
+        user, _ = User.objects.db_manager(self.alias).get_or_create(username=f'{SEED_PREFIX.lower()}_user')
+        heads = list(AccountHead.objects.using(self.alias).filter(name__startswith=SEED_PREFIX))
+        if not heads:
+            heads = AccountHead.objects.using(self.alias).bulk_create([
+                AccountHead(
+                    name=f'{SEED_PREFIX} Head {i}', created_by=user,
+                    account_type='Expense' if i % 4 == 0 else 'Revenue',
+                )
+                for i in range(1, 13)
+            ])
+        trusts = list(TrustAccount.objects.using(self.alias).filter(account_name__startswith=SEED_PREFIX))
+        if not trusts:
+            trusts = TrustAccount.objects.using(self.alias).bulk_create([
+                TrustAccount(
+                    account_name=f'{SEED_PREFIX} Account {i}', account_type='Bank' if i % 2 else 'Cash',
+                    associated_entity_type='Trust_Direct', created_by=user,
+                )
+                for i in range(1, 6)
+            ])
+        member_ids = list(
+            Member.objects.using(self.alias)
+            .filter(member_id__startswith=SEED_PREFIX).values_list('id', flat=True)
+        )
+        if not member_ids:
+            Member.objects.using(self.alias).bulk_create(
+                [
+                    Member(member_id=f'{SEED_PREFIX}-{i:06d}', name=f'Member {i}', address='Bench Street')
+                    for i in range(max(target // 50, 1))
+                ],
+                batch_size=SEED_BATCH,
+            )
+            member_ids = list(
+                Member.objects.using(self.alias)
+                .filter(member_id__startswith=SEED_PREFIX).values_list('id', flat=True)
+            )
+
+        today = datetime.date.today()
+        first_day = today - datetime.timedelta(days=365 * SEED_YEARS)
+        span = (today - first_day).days
+        head_ids = [head.pk for head in heads]
+        trust_ids = [trust.pk for trust in trusts]
+
+        self.stdout.write(f'Seeding {missing} transactions ...')
+        done = 0
+        while done < missing:
+            size = min(SEED_BATCH, missing - done)
+            batch = []
+            for _ in range(size):
+                is_credit = rng.random() < 0.7
+                batch.append(AccountTransaction(
+                    account_head_id=rng.choice(head_ids),
+                    trust_account_id=rng.choice(trust_ids) if rng.random() < 0.8 else None,
+                    member_id=rng.choice(member_ids) if rng.random() < 0.6 else None,
+                    transaction_type='CREDIT' if is_credit else 'DEBIT',
+                    amount=Decimal(rng.randint(100, 500000)) / 100,
+                    transaction_date=first_day + datetime.timedelta(days=rng.randrange(span)),
+                    payment_mode=rng.choice(['Cash', 'UPI', 'Bank Transfer', 'Cheque']),
+                    entered_by_id=user.pk,
+                    is_deleted=rng.random() < 0.05,
+                ))
+            AccountTransaction.objects.using(self.alias).bulk_create(batch)
+            done += size
+            if done % (SEED_BATCH * 20) == 0 or done == missing:
+                self.stdout.write(f'  {done}/{missing}')
@@ -0,0 +1,118 @@
+"""
+Django management command that bulk-renders receipts and bundles them into a ZIP.
+
+Usage:
+    python manage.py export_receipts --fiscal-year 2026-27 --output receipts.zip
+    python manage.py export_receipts --account-head 3 --output head3.zip --regenerate
+    python manage.py export_receipts --member 42 --output member42.zip --workers 4
+
+Receipts whose PDF is already READY are reused; the rest are rendered in a
+process pool.  An interrupted run can be started again with the same
+arguments: rendered PDFs are already stored on their receipts, and with
+--regenerate the ids finished so far are kept in ``<output>.progress``.
+The archive is written to ``<output>.part`` and renamed when complete.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.receipt_export import (
+    filter_receipts, missing_receipt_ids, render_receipts_parallel, write_receipts_zip,
+)
+
+
+class Command(BaseCommand):
+    help = 'Render receipts for a fiscal year, account head or member into a ZIP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fiscal-year', help='Receipt fiscal year, e.g. 2026-27')
+        parser.add_argument('--account-head', type=int, help='AccountHead id')
+        parser.add_argument('--member', type=int, help='Member id')
+        parser.add_argument('--output', required=True, help='Path of the ZIP to write')
+        parser.add_argument(
+            '--regenerate', action='store_true',
+            help='Re-render every matching receipt instead of reusing stored PDFs',
+        )
+        parser.add_argument(
+            '--include-deleted', action='store_true',
+            help='Also export receipts of soft-deleted transactions',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Render processes (default: CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        if not (options['fiscal_year'] or options['account_head'] or options['member']):
+            raise CommandError('Pass at least one of --fiscal-year, --account-head, --member.')
+
+        output = options['output']
+        progress_path = f"{output}.progress"
+        part_path = f"{output}.part"
+
+        receipts = filter_receipts(
+            fiscal_year=options['fiscal_year'],
+            account_head=options['account_head'],
+            member=options['member'],
+            include_deleted=options['include_deleted'],
+        )
+        total = receipts.count()
+        if not total:
+            raise CommandError('No receipts match the given filters.')
+
+        # 1. Render whatever is missing (or everything with --regenerate).
+        if options['regenerate']:
+            done = self._read_progress(progress_path)
+            to_render = [
+                rid for rid in receipts.values_list('id', flat=True) if rid not in done
+            ]
+        else:
+            to_render = missing_receipt_ids(receipts)
+
+        self.stdout.write(
+            f"{total} receipt(s) matched; {len(to_render)} to render, "
+            f"{total - len(to_render)} reused."
+        )
+
+        failed = []
+        if to_render:
+            finished = 0
+            with open(progress_path, 'a') as progress:
+                def on_progress(receipt_id, error):
+                    nonlocal finished
+                    finished += 1
+                    if error is None:
+                        progress.write(f"{receipt_id}\n")
+                        progress.flush()
+                    else:
+                        self.stderr.write(f"Receipt {receipt_id} failed: {error}")
+                    if finished % 50 == 0 or finished == len(to_render):
+                        self.stdout.write(f"Rendered {finished}/{len(to_render)}")
+
+                failed = render_receipts_parallel(
+                    to_render, workers=options['workers'], on_progress=on_progress,
+                    force=options['regenerate'],
+                )
+
+        if failed:
+            raise CommandError(
+                f"{len(failed)} receipt(s) failed to render; fix the cause and "
+                f"re-run the same command to resume."
+            )
+
+        # 2. Bundle the stored PDFs.
+        with open(part_path, 'wb') as fileobj:
+            write_receipts_zip(receipts.iterator(chunk_size=200), fileobj)
+        os.replace(part_path, output)
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} receipt(s) to {output}"))
+
+    @staticmethod
+    def _read_progress(path):
+        if not os.path.exists(path):
+            return set()
+        with open(path) as fh:
+            return {int(line) for line in fh if line.strip()}
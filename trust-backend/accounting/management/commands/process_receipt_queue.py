@@ -0,0 +1,64 @@
+"""
+Django management command that renders queued receipt PDFs.
+
+Usage:
+    python manage.py process_receipt_queue            # run until interrupted
+    python manage.py process_receipt_queue --once     # drain one batch and exit
+
+Run one (or several) of these next to gunicorn.  See accounting/receipt_queue.py
+for the queue states.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounting.receipt_queue import process_pending_receipts
+
+
+class Command(BaseCommand):
+    help = 'Render receipt PDFs queued by transaction saves'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process a single batch and exit',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Receipts claimed per batch (default 20)',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to sleep when the queue is empty (default 2)',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=None,
+            help='Attempts before a receipt is marked FAILED '
+                 '(default: RECEIPT_RENDER_MAX_ATTEMPTS)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Receipt render worker started.')
+        try:
+            while True:
+                close_old_connections()
+                stats = process_pending_receipts(
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts'],
+                )
+                handled = sum(stats.values())
+                if handled:
+                    self.stdout.write(
+                        f"Rendered {stats['rendered']}, "
+                        f"retrying {stats['retried']}, "
+                        f"failed {stats['failed']}"
+                    )
+                if options['once']:
+                    break
+                if not handled:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Receipt render worker stopped.'))
@@ -0,0 +1,74 @@
+"""
+Django management command that checks MemberLedgerBalance rows against a
+full recompute from AccountTransaction.
+
+Usage:
+    python manage.py reconcile_member_balances             # report drift
+    python manage.py reconcile_member_balances --fix       # report and repair
+    python manage.py reconcile_member_balances --member 42
+
+With --fix, rows that have not been built yet are created too, so the
+command doubles as a backfill after enabling MEMBER_ROLLUP_MODE=incremental.
+Exits with an error when drift is found and --fix was not given, so it
+can run from cron and alert.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounting.ledger import ZERO, compute_all_balances, store_balances
+from accounting.models import MemberLedgerBalance
+
+
+class Command(BaseCommand):
+    help = 'Verify incremental member ledger balances against a full recompute'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--member', type=int, help='Only check this member id')
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Overwrite drifted rows and create missing ones',
+        )
+        parser.add_argument(
+            '--show', type=int, default=20,
+            help='Drifted rows to print (default 20)',
+        )
+
+    def handle(self, *args, **options):
+        member_ids = [options['member']] if options['member'] else None
+
+        with transaction.atomic():
+            expected = compute_all_balances(member_ids)
+            rows = MemberLedgerBalance.objects.order_by()
+            if member_ids:
+                rows = rows.filter(member_id__in=member_ids)
+            stored = {
+                (row.member_id, row.tax_year_start): (row.total_debits, row.total_credits)
+                for row in rows
+            }
+
+            drift = []
+            for key, actual in stored.items():
+                wanted = expected.get(key, (ZERO, ZERO))
+                if actual != wanted:
+                    drift.append((key, actual, wanted))
+            missing = {key: value for key, value in expected.items() if key not in stored}
+
+            for (member_id, start), actual, wanted in drift[:options['show']]:
+                self.stdout.write(
+                    f"member {member_id} tax year {start:%Y}: "
+                    f"stored debits/credits {actual[0]}/{actual[1]}, "
+                    f"expected {wanted[0]}/{wanted[1]}"
+                )
+            self.stdout.write(
+                f"Checked {len(stored)} balance row(s): {len(drift)} drifted, "
+                f"{len(missing)} not built yet."
+            )
+
+            if options['fix']:
+                fixes = {key: wanted for key, _, wanted in drift}
+                fixes.update(missing)
+                store_balances(fixes)
+                self.stdout.write(self.style.SUCCESS(f"Repaired {len(fixes)} row(s)."))
+            elif drift:
+                raise CommandError(f"{len(drift)} drifted balance row(s); re-run with --fix.")
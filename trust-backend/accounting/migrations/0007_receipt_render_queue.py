@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+def mark_existing_pdfs_ready(apps, schema_editor):
+    """Receipts that already carry a PDF do not need to be queued."""
+    Receipt = apps.get_model('accounting', 'Receipt')
+    (
+        Receipt.objects
+        .exclude(pdf_file='').exclude(pdf_file__isnull=True)
+        .update(render_status='READY')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0006_alter_trustaccount_family_member'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='render_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RENDERING', 'Rendering'), ('READY', 'Ready'), ('FAILED', 'Failed')], db_index=True, default='PENDING', max_length=10, verbose_name='PDF Render Status'),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='render_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='render_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='render_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='rendered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_pdfs_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:24
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each fiscal year's counter at the highest receipt already issued."""
+    Receipt = apps.get_model('accounting', 'Receipt')
+    ReceiptSequence = apps.get_model('accounting', 'ReceiptSequence')
+    highest = {}
+    for number in Receipt.objects.values_list('receipt_number', flat=True).iterator():
+        try:
+            _, fiscal_year, seq = number.split('/')
+            seq = int(seq)
+        except ValueError:
+            continue
+        highest[fiscal_year] = max(seq, highest.get(fiscal_year, 0))
+    ReceiptSequence.objects.bulk_create([
+        ReceiptSequence(fiscal_year=fy, last_value=value)
+        for fy, value in highest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0007_receipt_render_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.CharField(max_length=7, unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Receipt Sequence',
+                'verbose_name_plural': 'Receipt Sequences',
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0008_receipt_sequence'),
+        ('members', '0016_member_address_city_member_address_city_ta_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberLedgerBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tax_year_start', models.DateField(help_text='1 August of the tax year.')),
+                ('total_debits', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_credits', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_balances', to='members.member')),
+            ],
+            options={
+                'verbose_name': 'Member Ledger Balance',
+                'verbose_name_plural': 'Member Ledger Balances',
+                'ordering': ['member', '-tax_year_start'],
+                'unique_together': {('member', 'tax_year_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 14:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0009_member_ledger_balance'),
+        ('members', '0016_member_address_city_member_address_city_ta_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['member', 'transaction_date', 'transaction_type', 'amount'], name='acct_txn_member_date_live'),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['account_head', 'transaction_date', 'transaction_type', 'amount'], name='acct_txn_head_date_live'),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['trust_account', 'transaction_date', 'id', 'transaction_type', 'amount'], name='acct_txn_trust_date_id_live'),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-transaction_date', '-created_at'], name='acct_txn_date_live'),
+        ),
+    ]
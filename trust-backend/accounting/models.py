@@ -276,6 +276,41 @@ class AccountTransaction(models.Model):
         ordering = ['-transaction_date', '-created_at']
         verbose_name = "Account Transaction"
         verbose_name_plural = "Account Transactions"
+        # Every hot read skips soft-deleted rows, so the indexes are partial
+        # on is_deleted = false (PostgreSQL and SQLite) and is_deleted is
+        # not a key column.  transaction_type / amount trail the keys so the
+        # SUMs are answered from the index alone on every backend (SQLite
+        # has no INCLUDE).  Benchmark with
+        # `python manage.py benchmark_transaction_indexes`.
+        indexes = [
+            # Member rollups: member_id IN (...) + tax-year date range,
+            # summing both types (accounting/utils.py, accounting/ledger.py).
+            models.Index(
+                fields=['member', 'transaction_date', 'transaction_type', 'amount'],
+                condition=models.Q(is_deleted=False),
+                name='acct_txn_member_date_live',
+            ),
+            # Head summaries and exports: per head over a date range, grouped
+            # or filtered by type (xlsx_export.py, AccountHeadViewSet).
+            models.Index(
+                fields=['account_head', 'transaction_date', 'transaction_type', 'amount'],
+                condition=models.Q(is_deleted=False),
+                name='acct_txn_head_date_live',
+            ),
+            # Trust account ledger: keyset pages on (transaction_date, id)
+            # and the opening-balance SUM before the first row.
+            models.Index(
+                fields=['trust_account', 'transaction_date', 'id', 'transaction_type', 'amount'],
+                condition=models.Q(is_deleted=False),
+                name='acct_txn_trust_date_id_live',
+            ),
+            # Dashboard date ranges and the default list ordering.
+            models.Index(
+                fields=['-transaction_date', '-created_at'],
+                condition=models.Q(is_deleted=False),
+                name='acct_txn_date_live',
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -308,26 +343,19 @@ class AccountTransaction(models.Model):
         self.full_clean()
         
         is_new = self.pk is None
-        orig_member = None
-        orig_date = None
+        orig = None
 
         if not is_new:
             try:
                 orig = AccountTransaction.objects.get(pk=self.pk)
-                orig_member = orig.member
-                orig_date = orig.transaction_date
             except AccountTransaction.DoesNotExist:
                 pass
 
         super().save(*args, **kwargs)
 
-        if orig_member and (orig_member != self.member or orig_date != self.transaction_date):
-            from .utils import recalculate_member_financials
-            recalculate_member_financials(orig_member, orig_date)
-
-        if self.member:
-            from .utils import recalculate_member_financials
-            recalculate_member_financials(self.member, self.transaction_date)
+        # Refresh the member rollups (see accounting/ledger.py)
+        from .ledger import record_transaction_change
+        record_transaction_change(orig, self)
 
 
 # ---------------------------------------------------------------------------
@@ -345,8 +373,19 @@ class Receipt(models.Model):
     Fiscal year runs April-March:
       1-Apr-2026 to 31-Mar-2027  ->  "2026-27"
       1-Apr-2025 to 31-Mar-2026  ->  "2025-26"
+
+    The PDF is rendered out of band: the row is inserted with
+    render_status=PENDING and picked up by the receipt render queue
+    (see accounting/receipt_queue.py).
     """
 
+    RENDER_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RENDERING', 'Rendering'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
     receipt_number = models.CharField(
         max_length=30, unique=True, editable=False,
     )
@@ -359,6 +398,16 @@ class Receipt(models.Model):
         upload_to='receipts/', blank=True, null=True,
     )
 
+    # Render queue state
+    render_status = models.CharField(
+        max_length=10, choices=RENDER_STATUS_CHOICES, default='PENDING',
+        db_index=True, verbose_name="PDF Render Status",
+    )
+    render_attempts = models.PositiveSmallIntegerField(default=0)
+    render_error = models.TextField(blank=True, default='')
+    render_started_at = models.DateTimeField(null=True, blank=True)
+    rendered_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ['-generated_at']
         verbose_name = "Receipt"
@@ -386,33 +435,161 @@ class Receipt(models.Model):
         Atomically generate the next sequential receipt number for the
         current fiscal year (April-March).
 
-        Uses SELECT ... FOR UPDATE on the last receipt row so that two
-        concurrent transaction saves cannot read the same sequence value
-        and produce a duplicate.  The unique=True DB constraint remains as
-        a last-resort safety net.
+        The counter lives in ReceiptSequence and is bumped with a single
+        atomic UPDATE, so concurrent transaction saves cannot read the same
+        value and the cost does not grow with the number of receipts.  The
+        unique=True DB constraint remains as a last-resort safety net.
 
         Format: TRUST/<YYYY-YY>/<NNNNN>
         """
-        from django.db import transaction as db_transaction
+        return Receipt.reserve_receipt_numbers(1)[0]
+
+    @staticmethod
+    def reserve_receipt_numbers(count, dt=None):
+        """
+        Reserve *count* consecutive receipt numbers for the fiscal year of
+        *dt* (defaults to now) in one round-trip and return them in order.
+
+        The reservation is part of the caller's DB transaction: if it rolls
+        back, so does the counter, which keeps the sequence gap-free.
+        """
+        fiscal_year = Receipt._fiscal_year_string(dt)
+        last = ReceiptSequence.reserve(fiscal_year, count)
+        prefix = f"TRUST/{fiscal_year}/"
+        return [f"{prefix}{seq:05d}" for seq in range(last - count + 1, last + 1)]
+
+
+# ---------------------------------------------------------------------------
+# ReceiptSequence — per-fiscal-year receipt counter
+# ---------------------------------------------------------------------------
+
+class ReceiptSequence(models.Model):
+    """
+    Last receipt sequence value handed out for a fiscal year.
+
+    One row per fiscal year ("2026-27").  reserve() increments it in place,
+    which replaces scanning Receipt for the highest number on every save.
+    """
+
+    fiscal_year = models.CharField(max_length=7, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Receipt Sequence"
+        verbose_name_plural = "Receipt Sequences"
+
+    def __str__(self):
+        return f"{self.fiscal_year}: {self.last_value}"
 
-        fiscal_year = Receipt._fiscal_year_string()
+    @staticmethod
+    def _highest_issued(fiscal_year):
+        """Highest sequence already used by a Receipt in *fiscal_year*."""
         prefix = f"TRUST/{fiscal_year}/"
+        last = (
+            Receipt.objects
+            .filter(receipt_number__startswith=prefix)
+            .order_by('-receipt_number')
+            .values_list('receipt_number', flat=True)
+            .first()
+        )
+        try:
+            return int(last.split('/')[-1]) if last else 0
+        except ValueError:
+            return 0
+
+    @classmethod
+    def reserve(cls, fiscal_year, count=1):
+        """
+        Atomically add *count* to the fiscal year's counter and return the
+        new last value; the reserved block is (last - count + 1 .. last).
+
+        Uses UPDATE ... RETURNING where the backend supports it (PostgreSQL,
+        SQLite >= 3.35); otherwise UPDATE then SELECT inside atomic(), which
+        reads back our own write while the row is still locked.
+        """
+        from django.db import transaction as db_transaction
+
+        if count < 1:
+            raise ValueError("count must be at least 1")
 
         with db_transaction.atomic():
-            # Lock the highest-sequence receipt in this fiscal year so no
-            # concurrent request can read the same value before we write.
-            last = (
-                Receipt.objects
-                .select_for_update(nowait=False)
-                .filter(receipt_number__startswith=prefix)
-                .order_by('-receipt_number')
-                .first()
-            )
-            if last:
-                try:
-                    seq = int(last.receipt_number.split('/')[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
-            return f"{prefix}{seq:05d}"
+            # Write first so SQLite takes its write lock up front instead of
+            # upgrading a read lock (which can fail with "database is locked").
+            last = cls._increment(fiscal_year, count)
+            if last is None:
+                # First receipt of the year (or first run after upgrading):
+                # continue from whatever receipts already exist.
+                cls.objects.get_or_create(
+                    fiscal_year=fiscal_year,
+                    defaults={'last_value': cls._highest_issued(fiscal_year)},
+                )
+                last = cls._increment(fiscal_year, count)
+            return last
+
+    @classmethod
+    def _increment(cls, fiscal_year, count):
+        """Bump the counter; return the new value, or None if no row exists."""
+        from django.db import connection
+        from django.db.models import F
+
+        if _supports_update_returning(connection):
+            table = connection.ops.quote_name(cls._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET last_value = last_value + %s "
+                    f"WHERE fiscal_year = %s RETURNING last_value",
+                    [count, fiscal_year],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        updated = cls.objects.filter(fiscal_year=fiscal_year).update(
+            last_value=F('last_value') + count,
+        )
+        if not updated:
+            return None
+        return cls.objects.get(fiscal_year=fiscal_year).last_value
+
+
+def _supports_update_returning(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        import sqlite3
+        return sqlite3.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+# ---------------------------------------------------------------------------
+# MemberLedgerBalance — running per-member, per-tax-year totals
+# ---------------------------------------------------------------------------
+
+class MemberLedgerBalance(models.Model):
+    """
+    Running DEBIT / CREDIT totals for one member in one tax year
+    (August-July, see members.utils.getCurrentTaxYearRange).
+
+    Maintained by accounting/ledger.py: every transaction insert, edit,
+    soft-delete, restore or hard delete applies a signed delta in the same
+    DB transaction, so a write never re-sums the member's history.
+    ``python manage.py reconcile_member_balances`` checks them against a
+    full recompute.
+    """
+
+    member = models.ForeignKey(
+        'members.Member', on_delete=models.CASCADE,
+        related_name='ledger_balances',
+    )
+    tax_year_start = models.DateField(help_text="1 August of the tax year.")
+    total_debits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_credits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('member', 'tax_year_start')
+        ordering = ['member', '-tax_year_start']
+        verbose_name = "Member Ledger Balance"
+        verbose_name_plural = "Member Ledger Balances"
+
+    def __str__(self):
+        return f"{self.member_id} {self.tax_year_start:%Y}: {self.total_debits} / {self.total_credits}"
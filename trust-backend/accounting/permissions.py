@@ -1,10 +1,15 @@
 """
 Custom DRF permission classes for accounting views.
+
+Roles come from the request's resolved Principal (members/authentication.py),
+so checking them costs no queries.
 """
 
 from rest_framework import permissions
 from django.contrib.auth.models import User
 
+from members.authentication import principal_for
+
 
 class IsAccountant(permissions.BasePermission):
     """
@@ -15,15 +20,7 @@ class IsAccountant(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        # Admin always passes
-        if isinstance(request.user, User) and request.user.is_staff:
-            return True
-        # Check for StaffProfile with ACCOUNTANT role
-        try:
-            profile = request.user.staff_profile
-            return profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            return False
+        return principal_for(request.user).sees_all
 
 
 class IsAccountantOrAdmin(permissions.BasePermission):
@@ -35,13 +32,7 @@ class IsAccountantOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        if isinstance(request.user, User) and request.user.is_staff:
-            return True
-        try:
-            profile = request.user.staff_profile
-            return profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            return False
+        return principal_for(request.user).sees_all
 
 
 class IsAdmin(permissions.BasePermission):
@@ -0,0 +1,170 @@
+"""
+Bulk receipt regeneration and ZIP export.
+
+Used by the ``export_receipts`` management command and by the admin-only
+``GET /api/accounting/receipts/export/`` endpoint.
+
+Rendering fans out over a process pool (one worker per CPU by default).
+Every rendered PDF is stored on its Receipt row, exactly like the render
+queue does, so a later run reuses the blob instead of rendering it again.
+That also makes a crashed run resumable: receipts that already reached
+READY are skipped.  With ``regenerate=True`` the set of receipts finished
+by *this* run is recorded in a checkpoint file next to the output.
+"""
+
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+
+from .models import Receipt
+from .receipt_queue import ensure_receipt_rendered, receipt_pdf_filename
+
+
+def filter_receipts(fiscal_year=None, account_head=None, member=None,
+                    include_deleted=False):
+    """
+    Receipts matching the export filters, in receipt-number order.
+
+    *fiscal_year* is the receipt label, e.g. "2026-27" for TRUST/2026-27/*.
+    """
+    qs = Receipt.objects.select_related(
+        'transaction', 'transaction__account_head',
+        'transaction__entered_by', 'transaction__member',
+    )
+    if fiscal_year:
+        qs = qs.filter(receipt_number__startswith=f"TRUST/{fiscal_year}/")
+    if account_head:
+        qs = qs.filter(transaction__account_head_id=account_head)
+    if member:
+        qs = qs.filter(transaction__member_id=member)
+    if not include_deleted:
+        qs = qs.filter(transaction__is_deleted=False)
+    return qs.order_by('receipt_number')
+
+
+def missing_receipt_ids(receipts):
+    """Ids in *receipts* that have no stored PDF yet."""
+    return list(
+        receipts.exclude(render_status='READY', pdf_file__gt='').values_list('id', flat=True)
+    )
+
+
+def _init_render_worker():
+    """Process-pool initializer: make sure Django is usable in the child."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    # Never share a DB connection inherited across fork().
+    connections.close_all()
+
+
+def _render_receipt_by_id(receipt_id, force=False):
+    receipt = Receipt.objects.select_related(
+        'transaction', 'transaction__account_head',
+        'transaction__entered_by', 'transaction__member',
+    ).get(pk=receipt_id)
+    ensure_receipt_rendered(receipt, force=force)
+    return receipt_id
+
+
+def render_receipts_parallel(receipt_ids, workers=None, on_progress=None,
+                             force=False):
+    """
+    Render *receipt_ids* in a process pool and store each PDF on its row.
+    With *force* stored PDFs are rendered again (``--regenerate``).
+
+    *on_progress* is called as ``on_progress(receipt_id, error)`` after every
+    receipt (error is None on success).  Returns the list of failed ids.
+    """
+    receipt_ids = list(receipt_ids)
+    if not receipt_ids:
+        return []
+    workers = workers or os.cpu_count() or 1
+    failed = []
+
+    if workers == 1:
+        for receipt_id in receipt_ids:
+            try:
+                _render_receipt_by_id(receipt_id, force)
+                error = None
+            except Exception as exc:
+                error = exc
+                failed.append(receipt_id)
+            if on_progress:
+                on_progress(receipt_id, error)
+        return failed
+
+    # Children must open their own connections rather than inherit ours.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as pool:
+        futures = {pool.submit(_render_receipt_by_id, rid, force): rid for rid in receipt_ids}
+        for future in as_completed(futures):
+            receipt_id = futures[future]
+            error = future.exception()
+            if error is not None:
+                failed.append(receipt_id)
+            if on_progress:
+                on_progress(receipt_id, error)
+    return failed
+
+
+def read_receipt_pdf(receipt):
+    """PDF bytes for *receipt*, rendering it first if it is not READY."""
+    ensure_receipt_rendered(receipt)
+    return read_stored_pdf(receipt)
+
+
+def read_stored_pdf(receipt):
+    """PDF bytes already stored on *receipt*; nothing is rendered."""
+    receipt.pdf_file.open('rb')
+    try:
+        return receipt.pdf_file.read()
+    finally:
+        receipt.pdf_file.close()
+
+
+def write_receipts_zip(receipts, fileobj):
+    """Write one PDF per receipt into a ZIP archive on *fileobj*."""
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for receipt in receipts:
+            zf.writestr(receipt_pdf_filename(receipt), read_receipt_pdf(receipt))
+
+
+class _ChunkBuffer:
+    """Unseekable write-only file; zipfile streams into it chunk by chunk."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_receipts_zip(receipts):
+    """
+    Yield a ZIP archive of *receipts* piece by piece, one PDF at a time,
+    for use with StreamingHttpResponse.
+
+    Only stored PDFs are read: once the response has started a render error
+    could no longer be reported, so render the missing ones first
+    (render_receipts_parallel).
+    """
+    buf = _ChunkBuffer()
+    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for receipt in receipts:
+            zf.writestr(receipt_pdf_filename(receipt), read_stored_pdf(receipt))
+            yield buf.drain()
+    yield buf.drain()
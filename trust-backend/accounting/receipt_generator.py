@@ -10,8 +10,10 @@ import os
 import base64
 import subprocess
 import tempfile
+import threading
 import uuid
 from decimal import Decimal
+from pathlib import Path
 
 from django.conf import settings
 from reportlab.lib import colors
@@ -23,38 +25,38 @@ from reportlab.platypus import (
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
+import logging
+logger = logging.getLogger(__name__)
 
-def render_pdf_with_headless_browser(html_content):
+
+def render_pdf_with_headless_browser(html_content, base_url=None):
     """
     Render HTML to PDF using Headless Chromium / Edge if available.
     Returns PDF bytes on success, or None on failure/unavailable.
     This provides pixel-perfect browser display matching for Tamil Unicode fonts.
-    """
-    possible_paths = [
-        r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe',
-        r'C:\Program Files\Microsoft\Edge\Application\msedge.exe',
-        r'C:\Program Files\Google\Chrome\Application\chrome.exe',
-        r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
-        'google-chrome',
-        'chromium-browser',
-        'chromium',
-        'msedge',
-    ]
 
-    browser_exe = None
-    for path in possible_paths:
-        if os.path.isabs(path) and os.path.exists(path):
-            browser_exe = path
-            break
-        elif not os.path.isabs(path):
-            import shutil
-            if shutil.which(path):
-                browser_exe = shutil.which(path)
-                break
+    Uses the process-wide persistent browser pool (see browser_pool.py) when
+    the platform supports it, and a one-shot --print-to-pdf run otherwise or
+    when the pooled render fails.
+    """
+    from .browser_pool import find_browser_executable, get_browser_pool
 
+    browser_exe = find_browser_executable()
     if not browser_exe:
         return None
 
+    pool = get_browser_pool()
+    if pool is not None:
+        try:
+            return pool.render(html_content, base_url=base_url)
+        except Exception as exc:
+            logger.warning(f"Pooled headless browser rendering failed, retrying one-shot: {exc}")
+
+    return _render_pdf_one_shot(browser_exe, html_content)
+
+
+def _render_pdf_one_shot(browser_exe, html_content):
+    """Start a browser for a single --print-to-pdf run via temp files."""
     temp_dir = tempfile.gettempdir()
     unique_id = uuid.uuid4().hex
     temp_html_path = os.path.join(temp_dir, f"receipt_{unique_id}.html")
@@ -159,9 +161,6 @@ def amount_to_words(amount):
 # PDF generation
 # ---------------------------------------------------------------------------
 
-import logging
-logger = logging.getLogger(__name__)
-
 _REGISTERED_TAMIL_FONT_NAME = None
 _REGISTERED_TAMIL_FONT_PATH = None
 
@@ -420,34 +419,17 @@ def generate_receipt_pdf_reportlab(transaction):
     return buf.getvalue()
 
 
-def generate_receipt_pdf(transaction):
-    """
-    Generate a receipt PDF using a configuration-driven HTML template layout.
-    Falls back to reportlab in case of errors.
-    """
-    import os
-    import logging
-    import io
-    import base64
-    from django.conf import settings
-    from django.template import Template, Context
-    from xhtml2pdf import pisa
-
-    logger = logging.getLogger(__name__)
-
-    try:
-        # 1. Resolve template path
-        template_path = getattr(settings, 'ACTIVE_RECEIPT_TEMPLATE', None)
-        if not template_path or not os.path.exists(template_path):
-            template_path = os.path.join(settings.BASE_DIR, 'accounting', 'tax_receipt_template.html')
-
-        # 2. Read template content
-        if os.path.exists(template_path):
-            with open(template_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        else:
-            # Fallback inline html template string if template file doesn't exist
-            html_content = """
+# ---------------------------------------------------------------------------
+# Process-level cache for the HTML template and its static assets
+# ---------------------------------------------------------------------------
+#
+# Compiling the template, base64-encoding the signature image and building
+# the @font-face block are identical for every receipt, so each is cached per
+# process.  Entries are keyed by file path and remember the file's mtime; an
+# edited file is picked up on the next render.  SystemSettingsView also calls
+# invalidate_receipt_template_cache() whenever a template is saved/activated.
+
+_FALLBACK_TEMPLATE_HTML = """
             <!DOCTYPE html>
             <html>
             <head>
@@ -475,6 +457,134 @@ def generate_receipt_pdf(transaction):
             </html>
             """
 
+# Fallback generic default signature (a transparent 1x1 GIF base64 string)
+_BLANK_SIGNATURE = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+_asset_cache = {}
+_asset_cache_lock = threading.Lock()
+
+
+def _file_mtime(path):
+    """Return the mtime of *path* in ns, or None if it cannot be stat'ed."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def _cached_asset(kind, path, build):
+    """
+    Return ``build(path)`` from the cache, rebuilding it when *path*'s mtime
+    differs from the one recorded with the cached value.
+    """
+    key = (kind, path)
+    mtime = _file_mtime(path) if path else None
+    with _asset_cache_lock:
+        hit = _asset_cache.get(key)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+    value = build(path)
+    with _asset_cache_lock:
+        _asset_cache[key] = (mtime, value)
+    return value
+
+
+def invalidate_receipt_template_cache():
+    """Drop every cached template, signature and font block."""
+    with _asset_cache_lock:
+        _asset_cache.clear()
+
+
+def _compile_template(template_path):
+    from django.template import Template
+
+    if template_path and os.path.exists(template_path):
+        with open(template_path, 'r', encoding='utf-8') as f:
+            return Template(f.read())
+    # Fallback inline html template string if template file doesn't exist
+    return Template(_FALLBACK_TEMPLATE_HTML)
+
+
+def get_receipt_template(template_path):
+    """Compiled django Template for *template_path* (cached)."""
+    return _cached_asset('template', template_path, _compile_template)
+
+
+def _encode_signature(sig_path):
+    if not sig_path or not os.path.exists(sig_path):
+        return _BLANK_SIGNATURE
+    try:
+        with open(sig_path, 'rb') as sf:
+            sig_data = sf.read()
+    except Exception as e:
+        logger.warning(f"Failed to read custodian signature image: {e}")
+        return _BLANK_SIGNATURE
+    # Determine image mimetype
+    mimetype = "image/png"
+    if sig_path.lower().endswith('.jpg') or sig_path.lower().endswith('.jpeg'):
+        mimetype = "image/jpeg"
+    elif sig_path.lower().endswith('.gif'):
+        mimetype = "image/gif"
+    return f"data:{mimetype};base64,{base64.b64encode(sig_data).decode('utf-8')}"
+
+
+def get_custodian_signature(sig_path):
+    """Signature image as a data: URI, or a blank GIF if unavailable (cached)."""
+    return _cached_asset('signature', sig_path, _encode_signature)
+
+
+def _build_font_css(font_path):
+    font_url = ""
+    if font_path and os.path.exists(font_path):
+        font_url = "file:///" + os.path.abspath(font_path).replace("\\", "/")
+    if not font_url:
+        return font_url, ""
+    font_css = f"""
+            <style>
+            @font-face {{
+                font-family: 'NotoSansTamil';
+                src: url('{font_url}');
+            }}
+            @font-face {{
+                font-family: 'Noto Sans Tamil';
+                src: url('{font_url}');
+            }}
+            body, table, td, th, p, span, div, h1, h2, h3, h4 {{
+                font-family: 'NotoSansTamil', 'Noto Sans Tamil', sans-serif !important;
+            }}
+            </style>
+            """
+    return font_url, font_css
+
+
+def get_font_css(font_path):
+    """``(font_url, font_css)`` for the Tamil font file (cached)."""
+    return _cached_asset('font', font_path, _build_font_css)
+
+
+def generate_receipt_pdf(transaction):
+    """
+    Generate a receipt PDF using a configuration-driven HTML template layout.
+    Falls back to reportlab in case of errors.
+    """
+    import os
+    import logging
+    import io
+    from django.conf import settings
+    from django.template import Context
+    from xhtml2pdf import pisa
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        # 1. Resolve template path
+        template_path = getattr(settings, 'ACTIVE_RECEIPT_TEMPLATE', None)
+        if not template_path or not os.path.exists(template_path):
+            template_path = os.path.join(settings.BASE_DIR, 'accounting', 'tax_receipt_template.html')
+
+        # 2. Compiled template (cached per path + mtime)
+        template = get_receipt_template(template_path)
+
         # 3. Resolve context variables
         name = ""
         name_ta = ""
@@ -493,33 +603,12 @@ def generate_receipt_pdf(transaction):
 
         amount = str(transaction.amount)
 
-        # 4. Resolve custodian signature
-        sig_path = getattr(settings, 'CUSTODIAN_SIGNATURE_PATH', None)
-        custodian_signature = ''
-        if sig_path and os.path.exists(sig_path):
-            try:
-                with open(sig_path, 'rb') as sf:
-                    sig_data = sf.read()
-                # Determine image mimetype
-                mimetype = "image/png"
-                if sig_path.lower().endswith('.jpg') or sig_path.lower().endswith('.jpeg'):
-                    mimetype = "image/jpeg"
-                elif sig_path.lower().endswith('.gif'):
-                    mimetype = "image/gif"
-                custodian_signature = f"data:{mimetype};base64,{base64.b64encode(sig_data).decode('utf-8')}"
-            except Exception as e:
-                logger.warning(f"Failed to read custodian signature image: {e}")
-                custodian_signature = ''
-
-        if not custodian_signature:
-            # Fallback generic default signature (a transparent 1x1 GIF base64 string)
-            custodian_signature = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
-
-        # Resolve font URL for xhtml2pdf
+        # 4. Resolve custodian signature and font block (cached)
+        custodian_signature = get_custodian_signature(
+            getattr(settings, 'CUSTODIAN_SIGNATURE_PATH', None)
+        )
         _, font_path = register_tamil_font()
-        font_url = ""
-        if font_path and os.path.exists(font_path):
-            font_url = "file:///" + os.path.abspath(font_path).replace("\\", "/")
+        font_url, font_css = get_font_css(font_path)
 
         # 5. Render context
         context_dict = {
@@ -550,35 +639,19 @@ def generate_receipt_pdf(transaction):
             'amount_paid': amount,
         }
 
-        template = Template(html_content)
         context = Context(context_dict)
         html_rendered = template.render(context)
 
         # Ensure @font-face declaration for NotoSansTamil is embedded in HTML if font_url exists
-        if font_url:
-            font_css = f"""
-            <style>
-            @font-face {{
-                font-family: 'NotoSansTamil';
-                src: url('{font_url}');
-            }}
-            @font-face {{
-                font-family: 'Noto Sans Tamil';
-                src: url('{font_url}');
-            }}
-            body, table, td, th, p, span, div, h1, h2, h3, h4 {{
-                font-family: 'NotoSansTamil', 'Noto Sans Tamil', sans-serif !important;
-            }}
-            </style>
-            """
-            if '@font-face' not in html_rendered:
-                if '</head>' in html_rendered:
-                    html_rendered = html_rendered.replace('</head>', f'{font_css}</head>')
-                else:
-                    html_rendered = font_css + html_rendered
+        if font_css and '@font-face' not in html_rendered:
+            if '</head>' in html_rendered:
+                html_rendered = html_rendered.replace('</head>', f'{font_css}</head>')
+            else:
+                html_rendered = font_css + html_rendered
 
         # 6. Primary PDF rendering engine: Headless Chromium / Edge (100% browser matching for Tamil Unicode fonts and CSS)
-        headless_pdf = render_pdf_with_headless_browser(html_rendered)
+        base_url = Path(os.path.abspath(template_path)).parent.as_uri() + '/'
+        headless_pdf = render_pdf_with_headless_browser(html_rendered, base_url=base_url)
         if headless_pdf:
             return headless_pdf
 
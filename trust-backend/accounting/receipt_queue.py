@@ -0,0 +1,212 @@
+"""
+Database-backed render queue for receipt PDFs.
+
+The Receipt row itself is the queue entry.  The post_save signal inserts it
+with render_status=PENDING inside the transaction save, and the
+``process_receipt_queue`` management command renders the PDF out of band:
+
+    PENDING ──claim──> RENDERING ──ok──> READY
+                          │
+                          └─error──> PENDING (retry) / FAILED (attempts used up)
+
+Claiming is a compare-and-swap UPDATE (``WHERE render_status='PENDING'``),
+so several workers can drain the queue concurrently on SQLite as well as
+PostgreSQL without SELECT ... FOR UPDATE.  A RENDERING row whose worker died
+is handed back to the queue once RECEIPT_RENDER_STALE_SECONDS have passed,
+or marked FAILED once it has used up RECEIPT_RENDER_MAX_ATTEMPTS, so a
+receipt that crashes the worker is not retried forever.
+
+Downloads and exports that need a PDF before the worker got to it claim
+the row the same way (ensure_receipt_rendered); a row a live worker is
+rendering is waited for rather than rendered a second time.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Receipt
+
+logger = logging.getLogger(__name__)
+
+
+def receipt_pdf_filename(receipt):
+    """File name used for a receipt's PDF, e.g. TRUST_2026-27_00001.pdf."""
+    return f"{receipt.receipt_number.replace('/', '_')}.pdf"
+
+
+def render_receipt(receipt):
+    """
+    Render and store the PDF for *receipt* synchronously, marking it READY.
+
+    Used by the queue worker and, through ensure_receipt_rendered, by
+    downloads of receipts the worker has not got to.  Exceptions propagate.
+    """
+    from .receipt_generator import generate_receipt_pdf
+
+    pdf_bytes = generate_receipt_pdf(receipt.transaction)
+    receipt.pdf_file.save(
+        receipt_pdf_filename(receipt), ContentFile(pdf_bytes), save=False,
+    )
+    receipt.render_status = 'READY'
+    receipt.render_error = ''
+    receipt.rendered_at = timezone.now()
+    receipt.save(update_fields=[
+        'pdf_file', 'render_status', 'render_error', 'rendered_at',
+    ])
+    return receipt
+
+
+class ReceiptNotReady(Exception):
+    """A worker is still rendering the receipt; try again shortly."""
+
+
+def _max_attempts():
+    return getattr(settings, 'RECEIPT_RENDER_MAX_ATTEMPTS', 3)
+
+
+def _stale_cutoff(stale_after=None):
+    if stale_after is None:
+        stale_after = getattr(settings, 'RECEIPT_RENDER_STALE_SECONDS', 300)
+    return timezone.now() - timedelta(seconds=stale_after)
+
+
+def requeue_stale_receipts(stale_after=None, max_attempts=None):
+    """
+    Return RENDERING rows abandoned by a crashed worker to PENDING, or mark
+    them FAILED when they have no attempts left.
+    """
+    if max_attempts is None:
+        max_attempts = _max_attempts()
+    stale = Receipt.objects.filter(
+        render_status='RENDERING', render_started_at__lt=_stale_cutoff(stale_after),
+    )
+    failed = stale.filter(render_attempts__gte=max_attempts).update(
+        render_status='FAILED', render_error='Renderer stopped responding.',
+    )
+    return stale.update(render_status='PENDING') + failed
+
+
+def ensure_receipt_rendered(receipt, wait=None, force=False):
+    """
+    Make sure *receipt* has a stored PDF, rendering it inline if needed.
+
+    The row is claimed first, so a receipt a worker (or another request) is
+    rendering right now is not rendered twice: that render is waited for,
+    up to *wait* seconds (RECEIPT_RENDER_WAIT_SECONDS), before
+    ReceiptNotReady is raised.  With *force* a stored PDF is not reused:
+    only a render finished after this call started counts.  Render errors
+    propagate.
+    """
+    if wait is None:
+        wait = getattr(settings, 'RECEIPT_RENDER_WAIT_SECONDS', 15)
+    deadline = time.monotonic() + wait
+    since = timezone.now() if force else None
+
+    def is_rendered():
+        return (
+            receipt.render_status == 'READY' and receipt.pdf_file
+            and (since is None or (receipt.rendered_at and receipt.rendered_at >= since))
+        )
+
+    while not is_rendered():
+        claimable = Receipt.objects.filter(pk=receipt.pk).exclude(
+            render_status='RENDERING', render_started_at__gte=_stale_cutoff(),
+        )
+        if not force:
+            claimable = claimable.exclude(
+                Q(render_status='READY') & ~Q(pdf_file='') & Q(pdf_file__isnull=False)
+            )
+        claimed = claimable.update(
+            render_status='RENDERING',
+            render_started_at=timezone.now(),
+            render_attempts=F('render_attempts') + 1,
+        )
+        if claimed:
+            try:
+                return render_receipt(receipt)
+            except Exception as exc:
+                receipt.refresh_from_db(fields=['render_attempts'])
+                Receipt.objects.filter(pk=receipt.pk).update(
+                    render_status='FAILED' if receipt.render_attempts >= _max_attempts() else 'PENDING',
+                    render_error=str(exc)[:2000],
+                )
+                raise
+        if time.monotonic() >= deadline:
+            raise ReceiptNotReady(receipt.receipt_number)
+        time.sleep(0.5)
+        receipt.refresh_from_db(fields=['render_status', 'pdf_file', 'rendered_at'])
+    return receipt
+
+
+def claim_pending_receipts(limit):
+    """
+    Claim up to *limit* PENDING receipts (oldest first) for this worker.
+
+    Returns the list of claimed receipt ids.  A row another worker claimed
+    between the SELECT and the UPDATE is simply skipped.
+    """
+    candidate_ids = list(
+        Receipt.objects
+        .filter(render_status='PENDING')
+        .order_by('id')
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for receipt_id in candidate_ids:
+        updated = Receipt.objects.filter(
+            pk=receipt_id, render_status='PENDING',
+        ).update(
+            render_status='RENDERING',
+            render_started_at=timezone.now(),
+            render_attempts=F('render_attempts') + 1,
+        )
+        if updated:
+            claimed.append(receipt_id)
+    return claimed
+
+
+def process_pending_receipts(batch_size=20, max_attempts=None):
+    """
+    Claim and render one batch of queued receipts.
+
+    Returns a dict ``{"rendered": int, "retried": int, "failed": int}``.
+    """
+    if max_attempts is None:
+        max_attempts = _max_attempts()
+
+    requeue_stale_receipts(max_attempts=max_attempts)
+    stats = {'rendered': 0, 'retried': 0, 'failed': 0}
+
+    claimed = claim_pending_receipts(batch_size)
+    receipts = (
+        Receipt.objects
+        .filter(pk__in=claimed)
+        .select_related(
+            'transaction', 'transaction__account_head',
+            'transaction__entered_by', 'transaction__member',
+        )
+        .order_by('id')
+    )
+    for receipt in receipts:
+        try:
+            render_receipt(receipt)
+            stats['rendered'] += 1
+        except Exception as exc:
+            give_up = receipt.render_attempts >= max_attempts
+            Receipt.objects.filter(pk=receipt.pk).update(
+                render_status='FAILED' if give_up else 'PENDING',
+                render_error=str(exc)[:2000],
+            )
+            stats['failed' if give_up else 'retried'] += 1
+            logger.error(
+                "Receipt PDF rendering failed for %s (attempt %s/%s): %s",
+                receipt.receipt_number, receipt.render_attempts,
+                max_attempts, exc,
+            )
+    return stats
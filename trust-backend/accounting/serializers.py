@@ -105,27 +105,33 @@ class AccountHeadSerializer(serializers.ModelSerializer):
             pass
         return obj.created_by.get_username()
 
-    def get_total_debits(self, obj):
-        from django.db.models import Sum
+    # AccountHeadViewSet annotates debit_total / credit_total; heads
+    # serialized from elsewhere fall back to an aggregate.
+
+    def _totals(self, obj):
+        from django.db.models import Q, Sum
         from decimal import Decimal
-        debits = obj.transactions.filter(
-            is_deleted=False, transaction_type='DEBIT'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        return str(debits)
+        if hasattr(obj, 'debit_total'):
+            debits, credits = obj.debit_total, obj.credit_total
+        else:
+            totals = obj.transactions.filter(is_deleted=False).aggregate(
+                debits=Sum('amount', filter=Q(transaction_type='DEBIT')),
+                credits=Sum('amount', filter=Q(transaction_type='CREDIT')),
+            )
+            debits, credits = totals['debits'] or 0, totals['credits'] or 0
+        # SQLite hands back computed sums unquantized ("1500" not "1500.00")
+        cents = Decimal('0.01')
+        return Decimal(debits).quantize(cents), Decimal(credits).quantize(cents)
+
+    def get_total_debits(self, obj):
+        return str(self._totals(obj)[0])
 
     def get_total_credits(self, obj):
-        from django.db.models import Sum
-        from decimal import Decimal
-        credits = obj.transactions.filter(
-            is_deleted=False, transaction_type='CREDIT'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        return str(credits)
+        return str(self._totals(obj)[1])
 
     def get_net_balance(self, obj):
-        from decimal import Decimal
-        debits = Decimal(self.get_total_debits(obj))
-        credits = Decimal(self.get_total_credits(obj))
-        
+        debits, credits = self._totals(obj)
+
         # Debits - Credits for Assets/Expenses
         if obj.account_type in ['Asset', 'Expense']:
             return str(debits - credits)
@@ -174,6 +180,9 @@ class AccountTransactionSerializer(serializers.ModelSerializer):
     receipt_id = serializers.IntegerField(
         source='receipt.id', read_only=True, default=None,
     )
+    receipt_render_status = serializers.CharField(
+        source='receipt.render_status', read_only=True, default=None,
+    )
 
     tax_event_name = serializers.CharField(
         source='tax_event.name', read_only=True, default=None,
@@ -198,7 +207,7 @@ class AccountTransactionSerializer(serializers.ModelSerializer):
             # Tracking
             'proof_document', 'entered_by', 'entered_by_name',
             'is_deleted', 'change_log',
-            'receipt_number', 'receipt_id',
+            'receipt_number', 'receipt_id', 'receipt_render_status',
             'created_at', 'updated_at',
         ]
         read_only_fields = [
@@ -348,5 +357,9 @@ class ReceiptSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'receipt_number', 'transaction_id',
             'generated_at', 'pdf_file',
+            'render_status', 'render_attempts', 'rendered_at',
+        ]
+        read_only_fields = [
+            'receipt_number', 'generated_at', 'pdf_file',
+            'render_status', 'render_attempts', 'rendered_at',
         ]
-        read_only_fields = ['receipt_number', 'generated_at', 'pdf_file']
@@ -1,24 +1,27 @@
 """
 Django signals for the accounting app.
 
-Auto-creates a Receipt (with PDF) whenever an AccountTransaction is saved
-for the first time.
+Auto-creates a Receipt whenever an AccountTransaction is saved for the
+first time.
 
 Failure policy
 --------------
 - Receipt *row* creation (number generation + DB insert): NOT caught here.
   Any error propagates and rolls back the enclosing transaction save.
   A transaction without a receipt number is unacceptable.
-- PDF generation: caught and logged (non-fatal).  The PDF is regenerated
-  on demand the first time someone hits the download endpoint, so a
-  transient reportlab error should not prevent the transaction being recorded.
+- PDF generation: queued by default (RECEIPT_PDF_ASYNC=True).  The receipt
+  row is inserted with render_status=PENDING and rendered by the
+  ``process_receipt_queue`` worker, or on demand the first time someone hits
+  the download endpoint.  With RECEIPT_PDF_ASYNC=False the PDF is rendered
+  inline as before; failures are caught and logged (non-fatal) and the
+  receipt stays PENDING.
 """
 
 import logging
 
+from django.conf import settings
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.core.files.base import ContentFile
 
 from .models import AccountTransaction, Receipt
 
@@ -28,12 +31,12 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=AccountTransaction)
 def create_receipt_on_transaction_save(sender, instance, created, **kwargs):
     """
-    Auto-generate a Receipt record (and PDF) when a new AccountTransaction
-    is created.  Does NOT regenerate on subsequent saves / edits.
+    Auto-generate a Receipt record when a new AccountTransaction is created
+    and queue its PDF.  Does NOT regenerate on subsequent saves / edits.
 
-    Receipt number generation uses SELECT ... FOR UPDATE inside an atomic
-    block (see Receipt.generate_receipt_number), so concurrent saves queue
-    rather than collide on the sequence.
+    Receipt numbers come from an atomic per-fiscal-year counter
+    (see ReceiptSequence.reserve), so concurrent saves cannot collide on
+    the sequence.
 
     If receipt creation fails for any reason the exception is NOT caught --
     it propagates and Django rolls back the outer save, ensuring no
@@ -43,22 +46,23 @@ def create_receipt_on_transaction_save(sender, instance, created, **kwargs):
         return
 
     # --- Receipt row: must not fail silently ---
-    # generate_receipt_number() runs select_for_update inside atomic(),
-    # making the read-increment-write a serialised critical section.
+    # The counter bump joins this transaction, so a rollback also returns
+    # the number and the sequence stays gap-free.
     receipt_number = Receipt.generate_receipt_number()
     receipt = Receipt.objects.create(
         receipt_number=receipt_number,
         transaction=instance,
     )
 
-    # --- PDF generation: non-fatal, regenerated on first download ---
+    # --- PDF generation: queued, or inline and non-fatal ---
+    if getattr(settings, 'RECEIPT_PDF_ASYNC', True):
+        return
+
     # Import inside function to avoid circular import at module level.
     try:
-        from .receipt_generator import generate_receipt_pdf
+        from .receipt_queue import render_receipt
 
-        pdf_bytes = generate_receipt_pdf(instance)
-        filename = f"{receipt_number.replace('/', '_')}.pdf"
-        receipt.pdf_file.save(filename, ContentFile(pdf_bytes), save=True)
+        render_receipt(receipt)
     except Exception as exc:
         logger.error(
             "Receipt PDF generation failed for %s (transaction id=%s): %s"
@@ -75,6 +79,6 @@ def handle_transaction_delete(sender, instance, **kwargs):
     Recalculates a member's financial rollups if an AccountTransaction
     is hard deleted (e.g. from tests or Django Admin).
     """
-    if instance.member:
-        from .utils import recalculate_member_financials
-        recalculate_member_financials(instance.member, instance.transaction_date)
+    if instance.member_id:
+        from .ledger import record_transaction_change
+        record_transaction_change(instance, None)
@@ -0,0 +1,98 @@
+"""
+Streaming CSV / NDJSON / file responses for large report endpoints.
+
+Rows are produced lazily (normally from ``queryset.values_list(...)
+.iterator()``) and written to the client as they are read, so memory
+stays flat no matter how large the roster grows.  Formats that have to
+be assembled before sending (.xlsx) are written to a spooled temporary
+file by stream_spooled() and sent in chunks.
+"""
+
+import csv
+import json
+import tempfile
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+
+
+class _Echo:
+    """File-like object whose write() just returns the value (csv.writer target)."""
+
+    def write(self, value):
+        return value
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def iter_csv(header, rows):
+    """CSV text of *header* then each row of *rows*, one line at a time."""
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens Tamil text as UTF-8
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(fields, rows):
+    """One JSON object per row, keyed by *fields*, one line at a time."""
+    for row in rows:
+        yield json.dumps(
+            dict(zip(fields, row)), default=_json_default, ensure_ascii=False,
+        ) + '\n'
+
+
+def stream_csv(header, rows, filename):
+    """StreamingHttpResponse writing *header* then each row of *rows* as CSV."""
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_ndjson(fields, rows, filename=None):
+    """StreamingHttpResponse writing one JSON object per row, keyed by *fields*."""
+    response = StreamingHttpResponse(iter_ndjson(fields, rows), content_type='application/x-ndjson')
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _iter_file(fileobj):
+    try:
+        while True:
+            chunk = fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def stream_spooled(write, content_type, filename):
+    """
+    Call write(fileobj) on a SpooledTemporaryFile (memory up to 8 MB,
+    disk beyond) and stream the result back as an attachment.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        write(spool)
+        size = spool.tell()
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    response = StreamingHttpResponse(_iter_file(spool), content_type=content_type)
+    response['Content-Length'] = str(size)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,65 @@
+"""
+Background job handlers for the accounting app (see jobs/queue.py).
+
+Queued by the ?async=true variants of the account head Excel exports and
+the receipt ZIP export in accounting/views.py.
+"""
+
+import tempfile
+
+from jobs.queue import JobFailed, register
+
+from .models import AccountHead
+
+
+@register('accounting.export_account_heads')
+def export_account_heads_job(job, filename, head_ids=None, date_from=None, date_to=None):
+    from .xlsx_export import write_account_heads_workbook
+
+    heads = AccountHead.objects.all()
+    if head_ids is not None:
+        heads = heads.filter(pk__in=head_ids)
+    job.set_progress(0, message='Writing workbook')
+    with tempfile.TemporaryFile() as out:
+        write_account_heads_workbook(heads, out, date_from, date_to)
+        out.seek(0)
+        job.save_artifact(filename, out)
+    return {'filename': filename}
+
+
+@register('accounting.export_receipts')
+def export_receipts_job(job, filename, fiscal_year=None, account_head=None, member=None,
+                        include_deleted=False, workers=None):
+    """
+    Render every receipt of the selection that has no stored PDF (in
+    parallel, see receipt_export.render_receipts_parallel), then zip them.
+    """
+    from .receipt_export import (
+        filter_receipts, missing_receipt_ids, render_receipts_parallel, write_receipts_zip,
+    )
+
+    receipts = filter_receipts(
+        fiscal_year=fiscal_year, account_head=account_head,
+        member=member, include_deleted=include_deleted,
+    )
+    total = receipts.count()
+    if not total:
+        raise JobFailed('No receipts match the given filters.')
+    missing = missing_receipt_ids(receipts)
+    finished = total - len(missing)
+    job.set_progress(finished, total, 'Rendering receipts')
+
+    def on_progress(receipt_id, error):
+        nonlocal finished
+        finished += 1
+        if finished % 20 == 0 or finished == total:
+            job.set_progress(finished)
+
+    failed = render_receipts_parallel(missing, workers=workers, on_progress=on_progress)
+
+    job.set_progress(total, message='Writing archive')
+    with tempfile.TemporaryFile() as out:
+        write_receipts_zip(receipts.exclude(id__in=failed).iterator(chunk_size=200), out)
+        out.seek(0)
+        job.save_artifact(filename, out)
+    return {'filename': filename, 'receipts': total - len(failed), 'failed': len(failed)}
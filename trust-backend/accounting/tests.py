@@ -1,6 +1,9 @@
 import datetime
 from decimal import Decimal
-from django.test import TestCase
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from members.models import Member
@@ -369,3 +372,929 @@ class FinancialRollupEngineTestCase(TestCase):
         settings_file_path = os.path.join(settings.BASE_DIR, 'accounting', 'system_settings.json')
         if os.path.exists(settings_file_path):
             os.remove(settings_file_path)
+
+
+@override_settings(MEMBER_ROLLUP_MODE='recompute')
+class BatchRollupTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollupadmin', password='password123', is_staff=True)
+        self.account_head = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.user
+        )
+        self.member = Member.objects.create(name="Murugan", address="Kalingar Street")
+        self.other = Member.objects.create(name="Selvam", address="Kalingar Street")
+
+    def _tx(self, member, tx_type, amount, date):
+        return AccountTransaction.objects.create(
+            account_head=self.account_head, transaction_type=tx_type,
+            amount=Decimal(amount), transaction_date=date,
+            payment_mode='Credit' if tx_type == 'DEBIT' else 'Cash',
+            member=member, entered_by=self.user,
+        )
+
+    def test_deferred_rollups_run_once_per_block(self):
+        from unittest import mock
+        from accounting import utils
+
+        with mock.patch.object(
+            utils, 'recalculate_member_financials_bulk',
+            wraps=utils.recalculate_member_financials_bulk,
+        ) as bulk:
+            with utils.defer_member_rollups():
+                self._tx(self.member, 'DEBIT', "3000.00", datetime.date(2025, 9, 1))
+                self._tx(self.member, 'CREDIT', "1000.00", datetime.date(2025, 9, 2))
+                self._tx(self.other, 'CREDIT', "500.00", datetime.date(2025, 9, 3))
+                self.member.refresh_from_db()
+                self.assertNotEqual(self.member.annual_tax, Decimal("3000.00"))
+        self.assertEqual(bulk.call_count, 1)
+
+        self.member.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.member.annual_tax, Decimal("3000.00"))
+        self.assertEqual(self.member.amount_due, Decimal("2000.00"))
+        self.assertEqual(self.other.amount_paid, Decimal("500.00"))
+
+    def test_deferred_rollups_still_run_when_the_block_raises(self):
+        from accounting.utils import defer_member_rollups
+
+        with self.assertRaises(RuntimeError):
+            with defer_member_rollups():
+                self._tx(self.member, 'DEBIT', "3000.00", datetime.date(2025, 9, 1))
+                raise RuntimeError('row 2 is bad')
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.annual_tax, Decimal("3000.00"))
+
+    def test_bulk_rollup_uses_last_requested_tax_year_per_member(self):
+        from accounting.utils import defer_member_rollups, recalculate_member_financials_bulk
+
+        with defer_member_rollups():
+            self._tx(self.member, 'DEBIT', "100.00", datetime.date(2024, 9, 1))
+            self._tx(self.member, 'DEBIT', "700.00", datetime.date(2025, 9, 1))
+            self._tx(self.other, 'DEBIT', "250.00", datetime.date(2024, 9, 1))
+
+        # savepoint, lock, GROUP BY, member UPDATE, balance SELECT + INSERT, release
+        with self.assertNumQueries(7):
+            recalculate_member_financials_bulk([
+                (self.member.pk, datetime.date(2025, 9, 1)),
+                (self.other.pk, datetime.date(2024, 10, 1)),
+                (self.member.pk, datetime.date(2024, 12, 1)),
+            ])
+        self.member.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.member.annual_tax, Decimal("100.00"))
+        self.assertEqual(self.other.annual_tax, Decimal("250.00"))
+
+
+class IncrementalLedgerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledgeradmin', password='password123', is_staff=True)
+        self.account_head = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.user
+        )
+        self.member = Member.objects.create(name="Murugan", address="Kalingar Street")
+
+    def _tx(self, tx_type, amount, date):
+        return AccountTransaction.objects.create(
+            account_head=self.account_head, transaction_type=tx_type,
+            amount=Decimal(amount), transaction_date=date,
+            payment_mode='Credit' if tx_type == 'DEBIT' else 'Cash',
+            member=self.member, entered_by=self.user,
+        )
+
+    def _balance(self, year):
+        from accounting.models import MemberLedgerBalance
+        row = MemberLedgerBalance.objects.get(member=self.member, tax_year_start=datetime.date(year, 8, 1))
+        return row.total_debits, row.total_credits
+
+    def test_edit_soft_delete_restore_and_hard_delete_apply_deltas(self):
+        debit = self._tx('DEBIT', "3000.00", datetime.date(2025, 9, 1))
+        credit = self._tx('CREDIT', "1000.00", datetime.date(2025, 9, 2))
+        self.assertEqual(self._balance(2025), (Decimal("3000.00"), Decimal("1000.00")))
+
+        debit.amount = Decimal("3500.00")
+        debit.save()
+        credit.is_deleted = True
+        credit.save()
+        self.assertEqual(self._balance(2025), (Decimal("3500.00"), Decimal("0.00")))
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.amount_due, Decimal("3500.00"))
+
+        credit.is_deleted = False
+        credit.save()
+        debit.transaction_date = datetime.date(2025, 3, 1)  # previous tax year
+        debit.save()
+        self.assertEqual(self._balance(2025), (Decimal("0.00"), Decimal("1000.00")))
+        self.assertEqual(self._balance(2024), (Decimal("3500.00"), Decimal("0.00")))
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.annual_tax, Decimal("3500.00"))
+
+        credit.delete()
+        self.assertEqual(self._balance(2025), (Decimal("0.00"), Decimal("0.00")))
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        import io
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from accounting.models import MemberLedgerBalance
+
+        self._tx('DEBIT', "3000.00", datetime.date(2025, 9, 1))
+        call_command('reconcile_member_balances', stdout=io.StringIO())
+
+        MemberLedgerBalance.objects.update(total_debits=Decimal("1.00"))
+        with self.assertRaises(CommandError):
+            call_command('reconcile_member_balances', stdout=io.StringIO())
+        call_command('reconcile_member_balances', fix=True, stdout=io.StringIO())
+        self.assertEqual(self._balance(2025), (Decimal("3000.00"), Decimal("0.00")))
+
+
+class ReceiptRenderQueueTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='queueaccountant', password='password123', is_staff=True)
+        self.account_head = AccountHead.objects.create(
+            name="Kodai Counter",
+            account_type="Revenue",
+            is_active=True,
+            created_by=self.user
+        )
+
+    def _create_transaction(self):
+        return AccountTransaction.objects.create(
+            account_head=self.account_head,
+            transaction_type='CREDIT',
+            amount=Decimal("500.00"),
+            transaction_date=datetime.date(2025, 9, 15),
+            payment_mode='Cash',
+            donor_name="Festival Donor",
+            entered_by=self.user
+        )
+
+    def test_receipt_is_queued_and_rendered_by_worker(self):
+        from accounting.receipt_queue import process_pending_receipts
+
+        tx = self._create_transaction()
+        receipt = tx.receipt
+        self.assertEqual(receipt.render_status, 'PENDING')
+        self.assertFalse(receipt.pdf_file)
+
+        stats = process_pending_receipts(batch_size=10)
+        self.assertEqual(stats['rendered'], 1)
+
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.render_status, 'READY')
+        self.assertEqual(receipt.render_attempts, 1)
+        self.assertTrue(receipt.pdf_file.read().startswith(b'%PDF'))
+
+    def test_failed_render_is_retried_then_marked_failed(self):
+        from unittest import mock
+        from accounting.receipt_queue import process_pending_receipts
+
+        tx = self._create_transaction()
+        with mock.patch('accounting.receipt_generator.generate_receipt_pdf', side_effect=RuntimeError('boom')):
+            first = process_pending_receipts(max_attempts=2)
+            second = process_pending_receipts(max_attempts=2)
+
+        self.assertEqual(first['retried'], 1)
+        self.assertEqual(second['failed'], 1)
+        tx.receipt.refresh_from_db()
+        self.assertEqual(tx.receipt.render_status, 'FAILED')
+        self.assertIn('boom', tx.receipt.render_error)
+
+    def test_download_renders_pending_receipt_on_demand(self):
+        from rest_framework.test import APIClient
+
+        tx = self._create_transaction()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(f'/api/accounting/receipts/{tx.receipt.id}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        tx.receipt.refresh_from_db()
+        self.assertEqual(tx.receipt.render_status, 'READY')
+
+    @override_settings(RECEIPT_RENDER_WAIT_SECONDS=0)
+    def test_download_does_not_rerender_a_receipt_a_worker_holds(self):
+        from unittest import mock
+        from rest_framework.test import APIClient
+        from accounting.models import Receipt
+        from accounting.receipt_queue import claim_pending_receipts
+
+        tx = self._create_transaction()
+        claim_pending_receipts(10)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/accounting/receipts/{tx.receipt.id}/download/'
+
+        with mock.patch('accounting.receipt_generator.generate_receipt_pdf', return_value=b'%PDF-x') as gen:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '5')
+            gen.assert_not_called()
+
+            # Once the claim goes stale the worker is presumed dead.
+            Receipt.objects.filter(pk=tx.receipt.pk).update(
+                render_started_at=timezone.now() - datetime.timedelta(hours=1),
+            )
+            self.assertEqual(client.get(url).status_code, 200)
+            self.assertEqual(gen.call_count, 1)
+
+    def test_receipt_that_keeps_crashing_the_worker_is_failed(self):
+        from accounting.models import Receipt
+        from accounting.receipt_queue import claim_pending_receipts, requeue_stale_receipts
+
+        tx = self._create_transaction()
+        for _ in range(2):
+            self.assertEqual(claim_pending_receipts(10), [tx.receipt.id])
+            Receipt.objects.filter(pk=tx.receipt.pk).update(
+                render_started_at=timezone.now() - datetime.timedelta(hours=1),
+            )
+            self.assertEqual(requeue_stale_receipts(max_attempts=2), 1)
+        tx.receipt.refresh_from_db()
+        self.assertEqual(tx.receipt.render_status, 'FAILED')
+        self.assertEqual(tx.receipt.render_attempts, 2)
+
+
+_FAILING_RECEIPT_IDS = set()
+
+
+def _fake_render_receipt_by_id(receipt_id, force=False):
+    """Picklable stand-in for receipt_export._render_receipt_by_id."""
+    if receipt_id in _FAILING_RECEIPT_IDS:
+        raise RuntimeError('render failed')
+    return receipt_id
+
+
+class ReceiptExportTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='exportadmin', password='password123', is_staff=True)
+        self.account_head = AccountHead.objects.create(
+            name="Annadhanam",
+            account_type="Revenue",
+            is_active=True,
+            created_by=self.admin
+        )
+        self.transactions = [
+            AccountTransaction.objects.create(
+                account_head=self.account_head,
+                transaction_type='CREDIT',
+                amount=Decimal("100.00") * (i + 1),
+                transaction_date=datetime.date(2025, 9, 15),
+                payment_mode='Cash',
+                donor_name=f"Donor {i}",
+                entered_by=self.admin
+            )
+            for i in range(3)
+        ]
+
+    def test_command_reuses_ready_pdfs_and_writes_zip(self):
+        import io
+        import os
+        import tempfile
+        import zipfile
+        from unittest import mock
+        from django.core.management import call_command
+        from accounting.receipt_queue import render_receipt
+
+        with mock.patch('accounting.receipt_generator.generate_receipt_pdf', return_value=b'%PDF-stored'):
+            render_receipt(self.transactions[0].receipt)
+
+        output = os.path.join(tempfile.mkdtemp(), 'receipts.zip')
+        with mock.patch('accounting.receipt_generator.generate_receipt_pdf', return_value=b'%PDF-fresh') as gen:
+            call_command(
+                'export_receipts', account_head=self.account_head.id,
+                output=output, workers=1, stdout=io.StringIO(),
+            )
+        self.assertEqual(gen.call_count, 2)
+
+        with zipfile.ZipFile(output) as zf:
+            names = sorted(zf.namelist())
+            self.assertEqual(len(names), 3)
+            first = self.transactions[0].receipt.receipt_number.replace('/', '_') + '.pdf'
+            self.assertEqual(zf.read(first), b'%PDF-stored')
+        self.assertFalse(os.path.exists(output + '.progress'))
+        self.assertFalse(os.path.exists(output + '.part'))
+
+    def test_regenerate_replaces_stored_pdfs(self):
+        import io
+        import os
+        import tempfile
+        import zipfile
+        from unittest import mock
+        from django.core.management import call_command
+        from accounting.receipt_queue import render_receipt
+
+        for tx in self.transactions:
+            with mock.patch('accounting.receipt_generator.generate_receipt_pdf', return_value=b'%PDF-old'):
+                render_receipt(tx.receipt)
+
+        output = os.path.join(tempfile.mkdtemp(), 'receipts.zip')
+        with mock.patch('accounting.receipt_generator.generate_receipt_pdf', return_value=b'%PDF-new') as gen:
+            call_command(
+                'export_receipts', account_head=self.account_head.id, regenerate=True,
+                output=output, workers=1, stdout=io.StringIO(),
+            )
+        self.assertEqual(gen.call_count, 3)
+
+        with zipfile.ZipFile(output) as zf:
+            self.assertEqual({zf.read(name) for name in zf.namelist()}, {b'%PDF-new'})
+        receipt = self.transactions[0].receipt
+        receipt.refresh_from_db()
+        with receipt.pdf_file.open('rb') as fh:
+            self.assertEqual(fh.read(), b'%PDF-new')
+
+    def test_export_endpoint_streams_zip_for_admin(self):
+        import io
+        import zipfile
+        from unittest import mock
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        url = f'/api/accounting/receipts/export/?account_head={self.account_head.id}'
+        # One render process: forked workers cannot see this test's rows.
+        with mock.patch('accounting.receipt_export.os.cpu_count', return_value=1), \
+                mock.patch('accounting.receipt_generator.generate_receipt_pdf', return_value=b'%PDF-fake') as gen:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # Everything is rendered before the first byte is sent.
+            self.assertEqual(gen.call_count, 3)
+            body = b''.join(response.streaming_content)
+            self.assertEqual(gen.call_count, 3)
+
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            self.assertEqual(len(zf.namelist()), 3)
+        self.assertEqual(client.get('/api/accounting/receipts/export/').status_code, 400)
+        for params in ('account_head=abc', 'member=1.5', 'account_head=x&async=true'):
+            self.assertEqual(client.get(f'/api/accounting/receipts/export/?{params}').status_code, 400)
+
+    def test_export_endpoint_fails_before_streaming_when_a_render_fails(self):
+        from unittest import mock
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        with mock.patch('accounting.receipt_export.os.cpu_count', return_value=1), \
+                mock.patch('accounting.receipt_generator.generate_receipt_pdf', side_effect=RuntimeError('boom')):
+            response = client.get(f'/api/accounting/receipts/export/?account_head={self.account_head.id}')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('async=true', response.data['error'])
+
+    @skipUnless(connection.vendor == 'sqlite', "closing the parent's connection would end the test transaction")
+    def test_parallel_render_collects_results_from_worker_processes(self):
+        from unittest import mock
+        from accounting.receipt_export import render_receipts_parallel
+
+        ids = [tx.receipt.id for tx in self.transactions]
+        _FAILING_RECEIPT_IDS.add(ids[1])
+        self.addCleanup(_FAILING_RECEIPT_IDS.clear)
+        progress = []
+        # Forked workers cannot see this test's uncommitted rows, so the
+        # per-receipt render is swapped for a module-level stand-in.
+        with mock.patch('accounting.receipt_export._render_receipt_by_id', _fake_render_receipt_by_id):
+            failed = render_receipts_parallel(
+                ids, workers=2, on_progress=lambda rid, error: progress.append((rid, error is None)),
+            )
+        self.assertEqual(failed, [ids[1]])
+        self.assertEqual(sorted(progress), sorted([(ids[0], True), (ids[1], False), (ids[2], True)]))
+
+
+class ReceiptSequenceTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='seqaccountant', password='password123', is_staff=True)
+        self.account_head = AccountHead.objects.create(
+            name="Hundi",
+            account_type="Revenue",
+            is_active=True,
+            created_by=self.user
+        )
+
+    def _create_transaction(self):
+        return AccountTransaction.objects.create(
+            account_head=self.account_head,
+            transaction_type='CREDIT',
+            amount=Decimal("50.00"),
+            transaction_date=datetime.date(2025, 9, 15),
+            payment_mode='Cash',
+            donor_name="Hundi Collection",
+            entered_by=self.user
+        )
+
+    def test_block_reservation_is_consecutive_and_continues_existing_numbers(self):
+        from accounting.models import Receipt, ReceiptSequence
+
+        first = self._create_transaction().receipt.receipt_number
+        fiscal_year = Receipt._fiscal_year_string()
+        # Simulate an upgrade: no counter row yet, receipts already issued.
+        ReceiptSequence.objects.all().delete()
+
+        block = Receipt.reserve_receipt_numbers(3)
+        self.assertEqual(first, f"TRUST/{fiscal_year}/00001")
+        self.assertEqual(block, [f"TRUST/{fiscal_year}/{n:05d}" for n in (2, 3, 4)])
+        self.assertEqual(Receipt.generate_receipt_number(), f"TRUST/{fiscal_year}/00005")
+        self.assertEqual(ReceiptSequence.objects.get(fiscal_year=fiscal_year).last_value, 5)
+
+    def test_rolled_back_reservation_leaves_no_gap(self):
+        from django.db import transaction as db_transaction
+        from accounting.models import Receipt
+
+        self._create_transaction()
+        try:
+            with db_transaction.atomic():
+                Receipt.reserve_receipt_numbers(10)
+                raise RuntimeError('abort')
+        except RuntimeError:
+            pass
+
+        self.assertTrue(self._create_transaction().receipt.receipt_number.endswith('/00002'))
+
+
+class BrowserPoolTestCase(TestCase):
+    class FakeWorker:
+        created = 0
+
+        def __init__(self):
+            type(self).created += 1
+            self.render_count = 0
+            self.healthy = True
+            self.closed = False
+
+        def is_healthy(self):
+            return self.healthy
+
+        def render(self, html_content, base_url=None):
+            self.render_count += 1
+            return b'%PDF-fake ' + html_content.encode('utf-8')
+
+        def close(self):
+            self.closed = True
+
+    def setUp(self):
+        self.FakeWorker.created = 0
+
+    def test_workers_are_reused_and_recycled_after_max_renders(self):
+        from accounting.browser_pool import BrowserPool
+
+        pool = BrowserPool(worker_factory=self.FakeWorker, size=1, max_renders=2)
+        self.assertEqual(pool.render('<p>1</p>'), b'%PDF-fake <p>1</p>')
+        pool.render('<p>2</p>')
+        self.assertEqual(self.FakeWorker.created, 1)
+
+        # Third render needs a fresh worker: the first hit max_renders.
+        pool.render('<p>3</p>')
+        self.assertEqual(self.FakeWorker.created, 2)
+
+    def test_unhealthy_idle_worker_is_replaced(self):
+        from accounting.browser_pool import BrowserPool
+
+        pool = BrowserPool(worker_factory=self.FakeWorker, size=1, max_renders=10)
+        pool.render('<p>1</p>')
+        stale = pool._idle.get_nowait()
+        stale.healthy = False
+        pool._idle.put(stale)
+
+        pool.render('<p>2</p>')
+        self.assertTrue(stale.closed)
+        self.assertEqual(self.FakeWorker.created, 2)
+
+    def test_worker_navigates_to_the_base_url_once(self):
+        import base64
+        from unittest import mock
+        from accounting.browser_pool import BrowserWorker
+
+        replies = {
+            'Target.createTarget': {'targetId': 'T1'},
+            'Target.attachToTarget': {'sessionId': 'S1'},
+            'Page.getFrameTree': {'frameTree': {'frame': {'id': 'F1'}}},
+            'Page.printToPDF': {'data': base64.b64encode(b'%PDF-tab').decode()},
+        }
+        calls = []
+
+        def call(method, params=None, session_id=None, timeout=None):
+            calls.append(method)
+            return replies.get(method, {})
+
+        with mock.patch('accounting.browser_pool.subprocess.Popen'):
+            worker = BrowserWorker('/usr/bin/chromium')
+        self.addCleanup(worker.close)
+        worker.call = call
+        worker.wait_for_event = mock.Mock(return_value={})
+
+        for i in range(3):
+            self.assertEqual(worker.render(f'<p>{i}</p>', base_url='file:///templates/'), b'%PDF-tab')
+        self.assertEqual(calls.count('Page.navigate'), 1)
+        self.assertEqual(calls.count('Target.createTarget'), 1)
+        self.assertEqual(calls.count('Page.setDocumentContent'), 3)
+
+        worker.render('<p>3</p>', base_url='file:///other/')
+        self.assertEqual(calls.count('Page.navigate'), 2)
+        self.assertEqual(calls.count('Target.closeTarget'), 1)
+
+    def test_failed_pooled_render_falls_back_to_one_shot_browser(self):
+        from unittest import mock
+        from accounting.receipt_generator import render_pdf_with_headless_browser
+
+        broken = mock.Mock()
+        broken.render.side_effect = RuntimeError('pool worker died')
+        with mock.patch('accounting.browser_pool.find_browser_executable', return_value='/usr/bin/chromium'), \
+                mock.patch('accounting.browser_pool.get_browser_pool', return_value=broken), \
+                mock.patch('accounting.receipt_generator._render_pdf_one_shot', return_value=b'%PDF-one-shot') as one_shot:
+            self.assertEqual(render_pdf_with_headless_browser('<p>1</p>'), b'%PDF-one-shot')
+        one_shot.assert_called_once_with('/usr/bin/chromium', '<p>1</p>')
+
+    def test_browser_executable_is_resolved_once(self):
+        from unittest import mock
+        from accounting.browser_pool import find_browser_executable
+
+        find_browser_executable.cache_clear()
+        try:
+            with mock.patch('accounting.browser_pool.shutil.which', return_value='/usr/bin/chromium') as which:
+                self.assertEqual(find_browser_executable(), '/usr/bin/chromium')
+                self.assertEqual(find_browser_executable(), '/usr/bin/chromium')
+            self.assertEqual(which.call_count, 1)
+        finally:
+            find_browser_executable.cache_clear()
+
+
+class ReceiptTemplateCacheTestCase(TestCase):
+    def setUp(self):
+        from accounting.receipt_generator import invalidate_receipt_template_cache
+        import tempfile
+
+        invalidate_receipt_template_cache()
+        with tempfile.NamedTemporaryFile(suffix='.html', delete=False, mode='w', encoding='utf-8') as tf:
+            tf.write("<p>{{ receipt_no }}</p>")
+            self.template_path = tf.name
+
+    def tearDown(self):
+        import os
+        if os.path.exists(self.template_path):
+            os.remove(self.template_path)
+
+    def test_template_is_compiled_once_until_file_changes(self):
+        import os
+        from django.template import Context
+        from accounting.receipt_generator import get_receipt_template
+
+        first = get_receipt_template(self.template_path)
+        self.assertIs(get_receipt_template(self.template_path), first)
+
+        with open(self.template_path, 'w', encoding='utf-8') as f:
+            f.write("<p>No. {{ receipt_no }}</p>")
+        stat = os.stat(self.template_path)
+        os.utime(self.template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        second = get_receipt_template(self.template_path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render(Context({'receipt_no': 'X'})), "<p>No. X</p>")
+
+    def test_explicit_invalidation_drops_cached_entries(self):
+        from accounting.receipt_generator import (
+            get_receipt_template, invalidate_receipt_template_cache,
+        )
+
+        first = get_receipt_template(self.template_path)
+        invalidate_receipt_template_cache()
+        self.assertIsNot(get_receipt_template(self.template_path), first)
+
+
+class MemberBalancesEndpointTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.admin = User.objects.create_user(username='treasurer', password='password123', is_staff=True)
+        self.account_head = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.admin
+        )
+        self.heads = []
+        for name, city, debit, credit in [
+            ("Murugan", "Madurai", "3000.00", "1000.00"),
+            ("Selvam", "Chennai", "2000.00", "2000.00"),
+            ("Raman", "Madurai", "5000.00", None),
+        ]:
+            member = Member.objects.create(name=name, address="Street", address_city=city, is_family_head=True)
+            for tx_type, amount in (('DEBIT', debit), ('CREDIT', credit)):
+                if amount:
+                    AccountTransaction.objects.create(
+                        account_head=self.account_head, transaction_type=tx_type,
+                        amount=Decimal(amount), transaction_date=datetime.date(2025, 9, 1),
+                        payment_mode='Credit' if tx_type == 'DEBIT' else 'Cash',
+                        member=member, entered_by=self.admin,
+                    )
+            self.heads.append(member)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = '/api/accounting/transactions/member-balances/'
+
+    def test_plain_list_uses_one_query_and_keeps_shape(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len([q for q in ctx.captured_queries if 'members_member' in q['sql'] and 'SUM' in q['sql']]), 1
+        )
+        self.assertEqual([row['name'] for row in response.data], ["Murugan", "Raman", "Selvam"])
+        murugan = response.data[0]
+        self.assertEqual(Decimal(murugan['total_debits']), Decimal("3000.00"))
+        self.assertEqual(Decimal(murugan['running_balance']), Decimal("2000.00"))
+
+    def test_filters_ordering_pagination_and_csv(self):
+        response = self.client.get(self.url, {
+            'outstanding': 'true', 'city': 'madurai', 'ordering': '-running_balance', 'page': 1,
+        })
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([row['name'] for row in response.data['results']], ["Raman", "Murugan"])
+
+        response = self.client.get(self.url, {'export': 'csv'})
+        body = b''.join(response.streaming_content).decode('utf-8-sig')
+        lines = body.strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,member_id,name'))
+        self.assertEqual(len(lines), 4)
+
+
+class AccountHeadTotalsTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.admin = User.objects.create_user(username='headadmin', password='password123', is_staff=True)
+        self.revenue = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.admin
+        )
+        self.expense = AccountHead.objects.create(
+            name="Temple Repairs", account_type="Expense", is_active=True, created_by=self.admin
+        )
+        for head, tx_type, amount, date in [
+            (self.revenue, 'CREDIT', "1000.00", datetime.date(2025, 9, 1)),
+            (self.revenue, 'CREDIT', "500.00", datetime.date(2026, 2, 1)),
+            (self.revenue, 'DEBIT', "200.00", datetime.date(2026, 2, 1)),
+            (self.expense, 'DEBIT', "300.00", datetime.date(2025, 9, 1)),
+        ]:
+            AccountTransaction.objects.create(
+                account_head=head, transaction_type=tx_type, amount=Decimal(amount),
+                transaction_date=date, payment_mode='Cash', entered_by=self.admin,
+                paid_to="Vendor" if tx_type == 'DEBIT' else '',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _by_name(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {row['name']: row for row in response.data['results']}
+
+    def test_list_totals_come_from_one_grouped_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self._by_name(self.client.get('/api/accounting/account-heads/'))
+        self.assertEqual(len([q for q in ctx.captured_queries if 'SUM' in q['sql']]), 1)
+        self.assertEqual(rows["Kodai Vari"]['total_credits'], "1500.00")
+        self.assertEqual(rows["Kodai Vari"]['net_balance'], "1300.00")
+        self.assertEqual(rows["Temple Repairs"]['net_balance'], "300.00")
+        self.assertEqual(rows["Temple Repairs"]['total_credits'], "0.00")
+
+    def test_date_range_narrows_totals(self):
+        rows = self._by_name(self.client.get(
+            '/api/accounting/account-heads/', {'from': '2026-01-01', 'to': '2026-03-31'},
+        ))
+        self.assertEqual(rows["Kodai Vari"]['total_credits'], "500.00")
+        self.assertEqual(rows["Kodai Vari"]['total_debits'], "200.00")
+        self.assertEqual(rows["Temple Repairs"]['total_debits'], "0.00")
+
+        response = self.client.get('/api/accounting/account-heads/', {'from': '01-01-2026'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('from', response.data['error'])
+
+    def test_writes_skip_the_totals_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(
+                f'/api/accounting/account-heads/{self.expense.pk}/', {'description': 'Roof'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'GROUP BY' in q['sql']])
+        self.assertEqual(response.data['total_debits'], "300.00")
+
+
+class TrustAccountLedgerTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from accounting.models import TrustAccount
+        self.admin = User.objects.create_user(username='cashier', password='password123', is_staff=True)
+        self.head = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.admin
+        )
+        self.account = TrustAccount.objects.create(
+            account_name="Main Cash", account_type="Cash",
+            associated_entity_type="Trust_Direct", created_by=self.admin,
+        )
+        member = Member.objects.create(name="Murugan", address="Street", is_family_head=True)
+        # Two entries share a date so the keyset has to fall back to id.
+        for tx_type, amount, date in [
+            ('DEBIT', "1000.00", datetime.date(2025, 4, 1)),
+            ('CREDIT', "250.00", datetime.date(2025, 5, 1)),
+            ('DEBIT', "400.00", datetime.date(2025, 5, 1)),
+            ('CREDIT', "100.00", datetime.date(2025, 6, 1)),
+            ('DEBIT', "50.00", datetime.date(2025, 7, 1)),
+        ]:
+            AccountTransaction.objects.create(
+                account_head=self.head, trust_account=self.account, transaction_type=tx_type,
+                amount=Decimal(amount), transaction_date=date, payment_mode='Cash',
+                member=member, entered_by=self.admin,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = f'/api/accounting/trust-accounts/{self.account.account_id}/ledger/'
+
+    def _walk(self, **params):
+        balances, cursor = [], None
+        while True:
+            query = dict(params, limit=2)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, 200)
+            balances += [row['running_balance'] for row in response.data['transactions']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                return balances
+
+    def test_keyset_pages_match_full_statement(self):
+        full = self.client.get(self.url).data
+        expected = [row['running_balance'] for row in full['transactions']]
+        self.assertEqual(expected, ["1000.00", "750.00", "1150.00", "1050.00", "1100.00"])
+        self.assertEqual(full['transactions'][0]['donor_name'], "Murugan")
+        self.assertEqual(self._walk(), expected)
+        self.assertEqual(self._walk(window='true'), expected)
+
+    def test_date_range_opens_with_prior_balance(self):
+        response = self.client.get(self.url, {'from': '2025-05-01', 'to': '2025-06-30', 'window': 'true'})
+        self.assertEqual(response.data['opening_balance'], "1000.00")
+        self.assertEqual(
+            [row['running_balance'] for row in response.data['transactions']], ["750.00", "1150.00", "1050.00"]
+        )
+        self.assertEqual(response.data['closing_balance'], "1050.00")
+        self.assertEqual(self.client.get(self.url, {'cursor': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'from': '2025-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'to': 'yesterday'}).status_code, 400)
+
+
+class DashboardSummaryTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.admin = User.objects.create_user(username='dashadmin', password='password123', is_staff=True)
+        self.kodai = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.admin
+        )
+        self.repairs = AccountHead.objects.create(
+            name="Temple Repairs", account_type="Expense", is_active=True, created_by=self.admin
+        )
+        for head, tx_type, mode, commodity, amount, date in [
+            (self.kodai, 'CREDIT', 'Cash', '', "1000.00", datetime.date(2025, 9, 1)),
+            (self.kodai, 'CREDIT', 'UPI', '', "500.00", datetime.date(2026, 2, 1)),
+            (self.kodai, 'CREDIT', 'Commodities', 'Gold', "8.50", datetime.date(2026, 2, 1)),
+            (self.repairs, 'DEBIT', 'Cash', '', "300.00", datetime.date(2026, 2, 1)),
+        ]:
+            AccountTransaction.objects.create(
+                account_head=head, transaction_type=tx_type, amount=Decimal(amount),
+                payment_mode=mode, commodity_type=commodity, transaction_date=date,
+                entered_by=self.admin, paid_to="Vendor" if tx_type == 'DEBIT' else '',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_dashboard_summary_is_one_grouped_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/accounting/transactions/dashboard-summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'accounting_accounttransaction' in q['sql']]), 1)
+        data = response.data
+        self.assertEqual(data['fiat']['total_credits'], "1500.00")
+        self.assertEqual(data['fiat']['net_balance'], "1200.00")
+        self.assertEqual(data['gold']['total_credits'], "8.50")
+        self.assertEqual(data['silver']['transaction_count'], 0)
+        self.assertEqual(data['payment_modes']['Cash']['transaction_count'], 2)
+        self.assertEqual([h['name'] for h in data['heads']], ["Kodai Vari", "Temple Repairs"])
+        self.assertEqual(data['totals']['transaction_count'], 4)
+
+    def test_existing_endpoints_honour_date_range(self):
+        summary = self.client.get('/api/accounting/transactions/summary/', {'from': '2026-01-01'}).data
+        self.assertEqual(summary['total_transactions'], 3)
+        self.assertEqual(summary['total_expense'], "300.00")
+        commodity = self.client.get('/api/accounting/transactions/commodity-summary/', {'from': '2026-01-01'}).data
+        self.assertEqual(set(commodity), {'fiat', 'gold', 'silver', 'other'})
+        self.assertEqual(commodity['fiat']['total_credits'], "500.00")
+
+    def test_malformed_filters_are_rejected(self):
+        for path in ('summary', 'commodity-summary', 'dashboard-summary'):
+            url = f'/api/accounting/transactions/{path}/'
+            for params in ({'from': '2025-13-01'}, {'to': 'garbage'}, {'trust_account': 'abc'}):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400, (path, params))
+                self.assertIn('error', response.data)
+
+
+class AccountHeadExcelExportTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from accounting.models import StaffProfile
+        self.admin = User.objects.create_user(username='xlsxadmin', password='password123', is_staff=True)
+        StaffProfile.objects.create(user=self.admin, name="Treasurer Raman", role='ACCOUNTANT')
+        self.kodai = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=self.admin
+        )
+        self.repairs = AccountHead.objects.create(
+            name="Temple Repairs", account_type="Expense", is_active=True, created_by=self.admin
+        )
+        member = Member.objects.create(name="Murugan", address="Street", is_family_head=True)
+        for head, tx_type, amount, date in [
+            (self.kodai, 'CREDIT', "1000.00", datetime.date(2025, 9, 1)),
+            (self.kodai, 'CREDIT', "500.00", datetime.date(2026, 2, 1)),
+            (self.repairs, 'DEBIT', "300.00", datetime.date(2026, 2, 1)),
+        ]:
+            AccountTransaction.objects.create(
+                account_head=head, transaction_type=tx_type, amount=Decimal(amount),
+                transaction_date=date, payment_mode='Cash', entered_by=self.admin,
+                member=member if tx_type == 'CREDIT' else None,
+                paid_to="Vendor" if tx_type == 'DEBIT' else '',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _workbook(self, response):
+        import io
+        import openpyxl
+        self.assertEqual(response.status_code, 200)
+        return openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_export_all_streams_summary_and_head_sheets(self):
+        wb = self._workbook(self.client.get('/api/accounting/account-heads/export-all/'))
+        self.assertEqual(wb.sheetnames[0], 'Summary')
+        self.assertCountEqual(wb.sheetnames[1:], [
+            'Kodai Vari Credits', 'Kodai Vari Debits', 'Temple Repairs Credits', 'Temple Repairs Debits',
+        ])
+        summary = wb['Summary']
+        self.assertEqual(summary.cell(row=5, column=1).value, 'Account Head')
+        self.assertEqual(summary.cell(row=8, column=1).value, 'TOTAL')
+        self.assertEqual(summary.cell(row=8, column=3).value, 1500.0)
+
+        credits = wb['Kodai Vari Credits']
+        self.assertEqual(credits.max_row, 4)
+        self.assertEqual(credits.cell(row=3, column=6).value, "Murugan")
+        self.assertEqual(credits.cell(row=3, column=12).value, "Treasurer Raman")
+        self.assertEqual(credits.column_dimensions['B'].width, 28)
+
+    def test_query_count_is_independent_of_row_count(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = f'/api/accounting/account-heads/{self.kodai.pk}/export/'
+        # A fresh User per request, as authentication provides in production
+        # (the resolved role is memoised on the user object).
+        self.client.force_authenticate(user=User.objects.get(pk=self.admin.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            wb = self._workbook(self.client.get(url, {'from': '2026-01-01'}))
+        before = len(ctx.captured_queries)
+        self.assertEqual(wb['Kodai Vari Credits'].max_row, 3)
+        for _ in range(5):
+            AccountTransaction.objects.create(
+                account_head=self.kodai, transaction_type='CREDIT', amount=Decimal("10.00"),
+                transaction_date=datetime.date(2026, 2, 2), payment_mode='UPI', entered_by=self.admin,
+            )
+        self.client.force_authenticate(user=User.objects.get(pk=self.admin.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            self._workbook(self.client.get(url, {'from': '2026-01-01'}))
+        self.assertEqual(len(ctx.captured_queries), before)
+
+
+class TransactionIndexTestCase(TestCase):
+    def test_ledger_page_reads_the_partial_index(self):
+        from accounting.models import TrustAccount
+        qs = (
+            AccountTransaction.objects
+            .filter(trust_account=TrustAccount(account_id='7c4ad3c1-93b4-4cb2-9d4c-4f5d1b0a6f10'),
+                    is_deleted=False, transaction_date__gte=datetime.date(2026, 4, 1))
+            .order_by('transaction_date', 'id')
+            .values_list('id', 'transaction_type', 'amount')[:100]
+        )
+        self.assertIn('acct_txn_trust_date_id_live', qs.explain())
+
+    def test_benchmark_command_restores_the_indexes(self):
+        import io
+        from django.core.management import call_command
+        from django.db import connection
+
+        out = io.StringIO()
+        call_command('benchmark_transaction_indexes', seed=300, repeat=1, stdout=out)
+        self.assertIn('trust ledger page (100 rows)', out.getvalue())
+        self.assertEqual(AccountTransaction.objects.count(), 300)
+        with connection.cursor() as cursor:
+            present = connection.introspection.get_constraints(cursor, AccountTransaction._meta.db_table)
+        for index in AccountTransaction._meta.indexes:
+            self.assertIn(index.name, present)
@@ -0,0 +1,144 @@
+"""
+Trust account ledger statements.
+
+A statement is the account's non-deleted transactions in
+(transaction_date, id) order with a running balance (DEBIT adds, CREDIT
+subtracts).  Pages are cut with a keyset on that same pair, so fetching
+page N never scans or sums pages 1..N-1 in Python: the balance carried
+into a page is one SUM over the rows before the cursor, done in SQL.
+
+The running balance within a page is either accumulated in Python from
+that opening balance, or, with window=True, computed by the database as
+SUM(...) OVER (ORDER BY transaction_date, id) and offset by the opening
+balance.
+"""
+
+import datetime
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Q, Sum, When, Window
+
+from .models import AccountTransaction
+
+ZERO = Decimal('0.00')
+CENTS = Decimal('0.01')
+
+ROW_FIELDS = (
+    'id', 'transaction_date', 'transaction_type', 'amount', 'payment_mode',
+    'commodity_type', 'donor_name', 'donor_name_ta', 'paid_to', 'purpose',
+    'purpose_description', 'member__name', 'member__name_ta', 'receipt__receipt_number',
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _signed_amount():
+    return Case(
+        When(transaction_type='DEBIT', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def encode_cursor(transaction_date, pk):
+    return f"{transaction_date.isoformat()}_{pk}"
+
+
+def decode_cursor(cursor):
+    """'2025-09-01_123' -> (date(2025, 9, 1), 123)."""
+    try:
+        date_part, pk_part = cursor.split('_', 1)
+        return datetime.date.fromisoformat(date_part), int(pk_part)
+    except (AttributeError, ValueError):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+
+def _after(cursor):
+    date, pk = cursor
+    return Q(transaction_date__gt=date) | Q(transaction_date=date, id__gt=pk)
+
+
+def _before(cursor):
+    date, pk = cursor
+    return Q(transaction_date__lt=date) | Q(transaction_date=date, id__lte=pk)
+
+
+def account_transactions(account):
+    return AccountTransaction.objects.filter(trust_account=account, is_deleted=False)
+
+
+def opening_balance(account, date_from=None, cursor=None):
+    """Balance carried into the statement: everything before date_from / up to cursor."""
+    boundary = Q()
+    if cursor:
+        boundary = _before(cursor)
+    elif date_from:
+        boundary = Q(transaction_date__lt=date_from)
+    else:
+        return ZERO
+    total = (
+        account_transactions(account).filter(boundary).order_by()
+        .aggregate(total=Sum(_signed_amount()))['total']
+    )
+    return Decimal(total or 0).quantize(CENTS)
+
+
+def statement_page(account, date_from=None, date_to=None, cursor=None, limit=None, window=False):
+    """
+    Return (opening_balance, rows, next_cursor).
+
+    *cursor* is a decoded (date, id) pair, *limit* None for the whole
+    range.  Rows are dicts ready for the API, running_balance included.
+    """
+    qs = account_transactions(account)
+    if date_from:
+        qs = qs.filter(transaction_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(transaction_date__lte=date_to)
+    if cursor:
+        qs = qs.filter(_after(cursor))
+    qs = qs.order_by('transaction_date', 'id')
+
+    fields = list(ROW_FIELDS)
+    if window:
+        qs = qs.annotate(page_running=Window(
+            Sum(_signed_amount()), order_by=[F('transaction_date').asc(), F('id').asc()],
+        ))
+        fields.append('page_running')
+    qs = qs.values(*fields)
+
+    rows = list(qs[:limit + 1] if limit else qs)
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['transaction_date'], rows[-1]['id'])
+
+    opening = opening_balance(account, date_from=date_from, cursor=cursor)
+    balance = opening
+    data = []
+    for row in rows:
+        if window:
+            # The window runs over the filtered range after the cursor,
+            # i.e. exactly this page and its successors.
+            balance = (opening + Decimal(row['page_running'])).quantize(CENTS)
+        elif row['transaction_type'] == 'DEBIT':
+            balance += row['amount']
+        else:
+            balance -= row['amount']
+        data.append({
+            'id': row['id'],
+            'transaction_date': str(row['transaction_date']),
+            'transaction_type': row['transaction_type'],
+            'amount': str(row['amount']),
+            'payment_mode': row['payment_mode'],
+            'commodity_type': row['commodity_type'],
+            'donor_name': row['donor_name'] or row['member__name'] or '',
+            'donor_name_ta': row['donor_name_ta'] or row['member__name_ta'] or '',
+            'paid_to': row['paid_to'],
+            'purpose': row['purpose'] or row['purpose_description'],
+            'receipt_number': row['receipt__receipt_number'],
+            'running_balance': str(balance),
+        })
+    return opening, data, next_cursor
@@ -1,44 +1,174 @@
+import logging
+import threading
+from contextlib import contextmanager
 from decimal import Decimal
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Case, DateField, Q, Sum, Value, When
 from members.utils import getCurrentTaxYearRange
 
+logger = logging.getLogger(__name__)
+
+_rollup_state = threading.local()
+
+
 def recalculate_member_financials(member, date):
     """
     Recalculates a member's annual_tax (debit rollup) and amount_paid (credit rollup)
     for the tax year corresponding to the provided date.
-    Runs inside a database transaction block with select_for_update for structural integrity.
+
+    With MEMBER_ROLLUP_MODE="incremental" the totals are copied from the
+    maintained MemberLedgerBalance row instead (see accounting/ledger.py).
+    Inside a defer_member_rollups() block the recalculation is queued and
+    runs once per member when the block exits.
     """
     if not member or not date:
         return
+    request_member_rollup(member.pk, date)
+
+
+def request_member_rollup(member_id, date):
+    """recalculate_member_financials by member id."""
+    if not member_id or not date:
+        return
+
+    pending = getattr(_rollup_state, 'pending', None)
+    if pending is not None:
+        # Last requested tax year wins, as with back-to-back direct calls.
+        pending.pop(member_id, None)
+        pending[member_id] = date
+        return
+
+    _run_rollups([(member_id, date)])
+
+
+def _run_rollups(pairs):
+    """Refresh rollups per settings.MEMBER_ROLLUP_MODE (see accounting/ledger.py)."""
+    from .ledger import is_incremental, sync_member_rollups
+
+    if is_incremental():
+        sync_member_rollups(pairs)
+    else:
+        recalculate_member_financials_bulk(pairs)
+
+
+def recalculate_member_financials_bulk(pairs):
+    """
+    Recalculate rollups for many ``(member_id, date)`` pairs at once.
 
-    # Import models locally to avoid circular dependencies
+    *date* may be any day in the wanted tax year.  When a member appears
+    more than once the last pair wins, matching what sequential calls to
+    recalculate_member_financials would leave behind.
+
+    Per chunk of members: lock the Member rows, compute debit and credit
+    sums for every (member, tax year) with one conditional-aggregation
+    GROUP BY, then write annual_tax / amount_paid / amount_due with
+    bulk_update.  Member.save() side effects (ID generation, succession,
+    credential provisioning) are not re-run; only rollup fields change.
+    The recomputed totals are also stored as MemberLedgerBalance rows.
+    """
+    from django.utils import timezone
     from members.models import Member
+    from .ledger import store_balances
     from .models import AccountTransaction
 
-    start_date, end_date = getCurrentTaxYearRange(date)
+    wanted = {}
+    for member_id, date in pairs:
+        if member_id and date:
+            wanted.pop(member_id, None)
+            wanted[member_id] = getCurrentTaxYearRange(date)
+    if not wanted:
+        return
+
+    member_ids = sorted(wanted)
+    now = timezone.now()
 
     with transaction.atomic():
-        # Lock Member record to prevent concurrent updates
-        member_to_update = Member.objects.select_for_update().get(pk=member.pk)
-
-        # Calculate sum of all DEBIT transactions in the fiscal year
-        debits_sum = AccountTransaction.objects.filter(
-            member=member_to_update,
-            transaction_type='DEBIT',
-            transaction_date__range=(start_date, end_date),
-            is_deleted=False
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Calculate sum of all CREDIT transactions in the fiscal year
-        credits_sum = AccountTransaction.objects.filter(
-            member=member_to_update,
-            transaction_type='CREDIT',
-            transaction_date__range=(start_date, end_date),
-            is_deleted=False
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Update member fields
-        member_to_update.annual_tax = debits_sum
-        member_to_update.amount_paid = credits_sum
-        member_to_update.save()
+        for i in range(0, len(member_ids), 500):
+            chunk = member_ids[i:i + 500]
+            # Lock Member records to prevent concurrent updates
+            locked = list(
+                Member.objects.select_for_update()
+                .filter(pk__in=chunk).order_by().values_list('pk', flat=True)
+            )
+            if not locked:
+                continue
+
+            by_year = {}
+            for member_id in locked:
+                by_year.setdefault(wanted[member_id], []).append(member_id)
+
+            scope = Q()
+            for year_range, ids in by_year.items():
+                scope |= Q(member_id__in=ids, transaction_date__range=year_range)
+            tax_year = Case(
+                *[
+                    When(transaction_date__range=year_range, then=Value(year_range[0]))
+                    for year_range in by_year
+                ],
+                output_field=DateField(),
+            )
+
+            sums = {
+                (row['member_id'], row['tax_year']): row
+                for row in AccountTransaction.objects
+                .filter(scope, is_deleted=False)
+                .annotate(tax_year=tax_year)
+                .values('member_id', 'tax_year')
+                .annotate(
+                    debits=Sum('amount', filter=Q(transaction_type='DEBIT')),
+                    credits=Sum('amount', filter=Q(transaction_type='CREDIT')),
+                )
+            }
+
+            members = []
+            balances = {}
+            for member_id in locked:
+                row = sums.get((member_id, wanted[member_id][0]), {})
+                annual_tax = row.get('debits') or Decimal('0.00')
+                amount_paid = row.get('credits') or Decimal('0.00')
+                balances[(member_id, wanted[member_id][0])] = (annual_tax, amount_paid)
+                members.append(Member(
+                    pk=member_id,
+                    annual_tax=annual_tax,
+                    amount_paid=amount_paid,
+                    amount_due=annual_tax - amount_paid,
+                    updated_at=now,
+                ))
+            Member.objects.bulk_update(
+                members, ['annual_tax', 'amount_paid', 'amount_due', 'updated_at'],
+            )
+            store_balances(balances)
+
+
+@contextmanager
+def defer_member_rollups():
+    """
+    Queue member rollups requested inside the block and run them once per
+    member, in one batch, when the outermost block exits.
+
+    Use around imports and bulk edits so a member with N new transactions
+    is recomputed once instead of N times.  The queue is flushed even if
+    the block raises: outside an atomic block the writes made before the
+    error are already committed and need their rollups.  Only a
+    transaction that is being rolled back (needs_rollback) skips it.
+    """
+    if getattr(_rollup_state, 'pending', None) is not None:
+        yield  # nested: the outermost block flushes
+        return
+
+    _rollup_state.pending = {}
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        pending = _rollup_state.pending
+        _rollup_state.pending = None
+        if not failed:
+            _run_rollups(pending.items())
+        elif pending and not transaction.get_connection().needs_rollback:
+            try:
+                _run_rollups(pending.items())
+            except Exception:
+                # Do not mask the error that ended the block.
+                logger.exception("Member rollups after a failed block did not run")
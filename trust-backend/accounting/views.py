@@ -10,7 +10,9 @@ Includes:
 - Summary endpoints
 """
 
+import datetime
 import json
+import uuid
 from decimal import Decimal
 
 from django.contrib.auth.models import User
@@ -19,6 +21,7 @@ from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
@@ -31,6 +34,31 @@ from .serializers import (
     ReceiptSerializer, TrustAccountSerializer,
 )
 from .permissions import IsAccountantOrAdmin, IsAdmin
+from .receipt_generator import invalidate_receipt_template_cache
+from jobs.views import async_requested, enqueue_response
+from members.authentication import principal_for
+
+
+def _date_param(request, name):
+    """?<name>=YYYY-MM-DD as a date (None when absent); malformed is a 400."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({'error': f"'{name}' must be a date in YYYY-MM-DD format."})
+
+
+def _uuid_param(request, name):
+    """?<name>=<uuid> as a UUID (None when absent); malformed is a 400."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValidationError({'error': f"'{name}' must be a valid account id."})
 
 
 # ---------------------------------------------------------------------------
@@ -103,39 +131,48 @@ class TrustAccountViewSet(viewsets.ModelViewSet):
         account.save()
         return Response({'message': f'"{account.account_name}" activated.'})
 
+    LEDGER_MAX_LIMIT = 1000
+
     @action(detail=True, methods=['get'])
     def ledger(self, request, pk=None):
-        """Ledger statement: Chronological list of transactions and running balance."""
+        """
+        Ledger statement: chronological transactions with running balance.
+
+        Query params:
+            from / to   transaction_date range (YYYY-MM-DD)
+            limit       page size (max 1000); omit for the whole range
+            cursor      next_cursor from the previous page
+            window      true = running balance via SUM() OVER in the database
+        """
+        from .trust_ledger import InvalidCursor, decode_cursor, statement_page
+
         account = self.get_object()
-        txns = AccountTransaction.objects.filter(
-            trust_account=account, is_deleted=False
-        ).order_by('transaction_date', 'id')
-        
-        data = []
-        balance = Decimal('0')
-        for t in txns:
-            if t.transaction_type == 'DEBIT':
-                balance += t.amount
-            else:
-                balance -= t.amount
-                
-            data.append({
-                'id': t.id,
-                'transaction_date': str(t.transaction_date),
-                'transaction_type': t.transaction_type,
-                'amount': str(t.amount),
-                'payment_mode': t.payment_mode,
-                'commodity_type': t.commodity_type,
-                'donor_name': t.donor_name or (t.member.name if t.member else ''),
-                'donor_name_ta': t.donor_name_ta or (t.member.name_ta if t.member else ''),
-                'paid_to': t.paid_to,
-                'purpose': t.purpose or t.purpose_description,
-                'receipt_number': t.receipt.receipt_number if hasattr(t, 'receipt') and t.receipt else None,
-                'running_balance': str(balance)
-            })
+        params = request.query_params
+        cursor = params.get('cursor')
+        try:
+            cursor = decode_cursor(cursor) if cursor else None
+        except InvalidCursor as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        limit = params.get('limit')
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                return Response({'error': 'limit must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+            limit = min(int(limit), self.LEDGER_MAX_LIMIT)
+
+        opening, data, next_cursor = statement_page(
+            account,
+            date_from=_date_param(request, 'from'),
+            date_to=_date_param(request, 'to'),
+            cursor=cursor,
+            limit=limit,
+            window=params.get('window') == 'true',
+        )
         return Response({
             'account_name': account.account_name,
             'account_type': account.account_type,
+            'opening_balance': str(opening),
+            'closing_balance': data[-1]['running_balance'] if data else str(opening),
+            'next_cursor': next_cursor,
             'transactions': data
         })
 
@@ -157,8 +194,46 @@ class AccountHeadViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['-created_at']
 
+    # Actions that read the annotated totals; writes skip the GROUP BY.
+    TOTALS_ACTIONS = ('list', 'retrieve', 'summary')
+
     def get_queryset(self):
-        return AccountHead.objects.all()
+        """
+        For reads, heads with their debit/credit totals and transaction
+        count annotated in one grouped query. ?from=YYYY-MM-DD&to=YYYY-MM-DD
+        narrows the totals to a period; heads with no activity in it still
+        list, at zero.
+        """
+        from django.db.models import DecimalField, Value
+        from django.db.models.functions import Coalesce
+
+        qs = AccountHead.objects.select_related(
+            'created_by__staff_profile', 'created_by__member_profile',
+        )
+        if self.action not in self.TOTALS_ACTIONS:
+            return qs
+
+        live = Q(transactions__is_deleted=False)
+        date_from = _date_param(self.request, 'from')
+        date_to = _date_param(self.request, 'to')
+        if date_from:
+            live &= Q(transactions__transaction_date__gte=date_from)
+        if date_to:
+            live &= Q(transactions__transaction_date__lte=date_to)
+
+        money = DecimalField(max_digits=14, decimal_places=2)
+        zero = Value(Decimal('0.00'), output_field=money)
+        return qs.annotate(
+            debit_total=Coalesce(Sum(
+                'transactions__amount',
+                filter=live & Q(transactions__transaction_type='DEBIT'),
+            ), zero),
+            credit_total=Coalesce(Sum(
+                'transactions__amount',
+                filter=live & Q(transactions__transaction_type='CREDIT'),
+            ), zero),
+            transaction_count=Count('transactions', filter=live),
+        )
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -197,15 +272,8 @@ class AccountHeadViewSet(viewsets.ModelViewSet):
     def summary(self, request, pk=None):
         """Per-head summary: total debits, credits, net, count."""
         head = self.get_object()
-        txns = AccountTransaction.objects.filter(
-            account_head=head, is_deleted=False,
-        )
-        total_debits = txns.filter(
-            transaction_type='DEBIT',
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        total_credits = txns.filter(
-            transaction_type='CREDIT',
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        total_debits = Decimal(head.debit_total).quantize(Decimal('0.01'))
+        total_credits = Decimal(head.credit_total).quantize(Decimal('0.01'))
 
         if head.account_type in ['Asset', 'Expense']:
             net_balance = total_debits - total_credits
@@ -219,7 +287,7 @@ class AccountHeadViewSet(viewsets.ModelViewSet):
             'total_debits': str(total_debits),
             'total_credits': str(total_credits),
             'net_balance': str(net_balance),
-            'transaction_count': txns.count(),
+            'transaction_count': head.transaction_count,
         })
 
     @action(detail=True, methods=['get'])
@@ -232,6 +300,7 @@ class AccountHeadViewSet(viewsets.ModelViewSet):
         return _build_export_response(
             request, [head],
             filename=f"AccountHead_{head.name.replace(' ', '_')}.xlsx",
+            head_ids=[head.pk],
         )
 
     @action(detail=False, methods=['get'], url_path='export-all')
@@ -391,101 +460,121 @@ class AccountTransactionViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def _dashboard_summary(self, request):
+        from .dashboard import dashboard_summary
+        return dashboard_summary(
+            date_from=_date_param(request, 'from'),
+            date_to=_date_param(request, 'to'),
+            trust_account=_uuid_param(request, 'trust_account'),
+        )
+
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Overall summary across all heads."""
-        qs = AccountTransaction.objects.filter(is_deleted=False)
-        total_debits = qs.filter(
-            transaction_type='DEBIT',
-        ).aggregate(t=Sum('amount'))['t'] or Decimal('0')
-        total_credits = qs.filter(
-            transaction_type='CREDIT',
-        ).aggregate(t=Sum('amount'))['t'] or Decimal('0')
-
+        """Overall summary across all heads. Accepts ?from, ?to, ?trust_account."""
+        totals = self._dashboard_summary(request)['totals']
         return Response({
-            'total_income': str(total_credits),
-            'total_expense': str(total_debits),
-            'net_balance': str(total_credits - total_debits),
-            'total_transactions': qs.count(),
+            'total_income': str(totals.credits),
+            'total_expense': str(totals.debits),
+            'net_balance': str(totals.credits - totals.debits),
+            'total_transactions': totals.count,
         })
 
     @action(detail=False, methods=['get'], url_path='commodity-summary')
     def commodity_summary(self, request):
         """
         Natively calculates and summarizes physical weight assets: Gold and Silver,
-        alongside fiat currency.
+        alongside fiat currency. Accepts ?from, ?to, ?trust_account.
         """
-        qs = AccountTransaction.objects.filter(is_deleted=False)
-        
-        # Fiat summary (exclude Commodities payment mode)
-        fiat_credits = qs.filter(transaction_type='CREDIT').exclude(payment_mode='Commodities').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        fiat_debits = qs.filter(transaction_type='DEBIT').exclude(payment_mode='Commodities').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
-        # Gold physical weight summary (payment_mode='Commodities', commodity_type='Gold')
-        gold_credits = qs.filter(payment_mode='Commodities', commodity_type='Gold', transaction_type='CREDIT').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        gold_debits = qs.filter(payment_mode='Commodities', commodity_type='Gold', transaction_type='DEBIT').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
-        # Silver physical weight summary (payment_mode='Commodities', commodity_type='Silver')
-        silver_credits = qs.filter(payment_mode='Commodities', commodity_type='Silver', transaction_type='CREDIT').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        silver_debits = qs.filter(payment_mode='Commodities', commodity_type='Silver', transaction_type='DEBIT').aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        from .dashboard import serialize_summary
+        data = serialize_summary(self._dashboard_summary(request))
+        return Response({key: data[key] for key in ('fiat', 'gold', 'silver', 'other')})
 
-        # Other physical weight summary
-        other_credits = qs.filter(payment_mode='Commodities', commodity_type='Other', transaction_type='CREDIT').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        other_debits = qs.filter(payment_mode='Commodities', commodity_type='Other', transaction_type='DEBIT').aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
-        return Response({
-            'fiat': {
-                'total_credits': str(fiat_credits),
-                'total_debits': str(fiat_debits),
-                'net_balance': str(fiat_credits - fiat_debits),
-            },
-            'gold': {
-                'total_credits': str(gold_credits),
-                'total_debits': str(gold_debits),
-                'net_balance': str(gold_credits - gold_debits),
-            },
-            'silver': {
-                'total_credits': str(silver_credits),
-                'total_debits': str(silver_debits),
-                'net_balance': str(silver_credits - silver_debits),
-            },
-            'other': {
-                'total_credits': str(other_credits),
-                'total_debits': str(other_debits),
-                'net_balance': str(other_credits - other_debits),
-            }
-        })
+    @action(detail=False, methods=['get'], url_path='dashboard-summary')
+    def dashboard_summary(self, request):
+        """
+        Everything the dashboard shows in one round-trip: totals, fiat and
+        commodity buckets, per-payment-mode and per-head splits.
+        Accepts ?from, ?to, ?trust_account.
+        """
+        from .dashboard import serialize_summary
+        return Response(serialize_summary(self._dashboard_summary(request)))
+
+    MEMBER_BALANCE_FIELDS = (
+        'id', 'member_id', 'name', 'name_ta', 'phone', 'address_city',
+        'total_debits', 'total_credits', 'running_balance',
+    )
+    MEMBER_BALANCE_ORDERING = {
+        'name', 'member_id', 'total_debits', 'total_credits', 'running_balance',
+    }
 
     @action(detail=False, methods=['get'], url_path='member-balances')
     def member_balances(self, request):
         """
         Roster of all members showing their Name and their exact running financial balance.
         Balance = Cumulative DEBIT (due/billed) - Cumulative CREDIT (paid).
+
+        One grouped query regardless of roster size.
+
+        Query params:
+          ?outstanding=true           only members who still owe (balance > 0)
+          ?city=<name>                exact city match (English or Tamil)
+          ?ordering=-running_balance  any of name, member_id, total_debits,
+                                      total_credits, running_balance (± prefix)
+          ?page=<n>                   paginated response (count/next/results);
+                                      without it the full list is returned
+          ?export=csv | ndjson        stream the full roster
         """
+        from django.db.models import DecimalField, F, Value
+        from django.db.models.functions import Coalesce
         from members.models import Member
-        members = Member.objects.filter(is_active=True, is_family_head=True).order_by('name')
-        
-        data = []
-        for m in members:
-            debits = AccountTransaction.objects.filter(
-                member=m, transaction_type='DEBIT', is_deleted=False
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-            
-            credits = AccountTransaction.objects.filter(
-                member=m, transaction_type='CREDIT', is_deleted=False
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-            
-            data.append({
-                'id': m.id,
-                'member_id': m.member_id,
-                'name': m.name,
-                'name_ta': m.name_ta,
-                'phone': m.phone,
-                'total_debits': str(debits),
-                'total_credits': str(credits),
-                'running_balance': str(debits - credits)
-            })
-        return Response(data)
+        from .streaming import stream_csv, stream_ndjson
+
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+        live = Q(donation_transactions__is_deleted=False)
+        qs = (
+            Member.objects.filter(is_active=True, is_family_head=True)
+            .annotate(
+                total_debits=Coalesce(Sum(
+                    'donation_transactions__amount',
+                    filter=live & Q(donation_transactions__transaction_type='DEBIT'),
+                ), zero),
+                total_credits=Coalesce(Sum(
+                    'donation_transactions__amount',
+                    filter=live & Q(donation_transactions__transaction_type='CREDIT'),
+                ), zero),
+            )
+            .annotate(running_balance=F('total_debits') - F('total_credits'))
+        )
+
+        if request.query_params.get('outstanding') == 'true':
+            qs = qs.filter(running_balance__gt=0)
+        city = request.query_params.get('city')
+        if city:
+            qs = qs.filter(Q(address_city__iexact=city) | Q(address_city_ta=city))
+
+        ordering = request.query_params.get('ordering', 'name')
+        if ordering.lstrip('-') not in self.MEMBER_BALANCE_ORDERING:
+            ordering = 'name'
+        qs = qs.order_by(ordering, 'id')
+
+        export = request.query_params.get('export')
+        if export in ('csv', 'ndjson'):
+            rows = qs.values_list(*self.MEMBER_BALANCE_FIELDS).iterator(chunk_size=500)
+            if export == 'csv':
+                return stream_csv(self.MEMBER_BALANCE_FIELDS, rows, 'member_balances.csv')
+            return stream_ndjson(self.MEMBER_BALANCE_FIELDS, rows)
+
+        def as_row(values):
+            return {
+                key: str(values[key]) if isinstance(values[key], Decimal) else values[key]
+                for key in self.MEMBER_BALANCE_FIELDS
+            }
+
+        values = qs.values(*self.MEMBER_BALANCE_FIELDS)
+        if 'page' in request.query_params:
+            page = self.paginate_queryset(values)
+            return self.get_paginated_response([as_row(v) for v in page])
+        return Response([as_row(v) for v in values])
 
     @action(detail=False, methods=['get'], url_path='my-donations')
     def my_donations(self, request):
@@ -493,10 +582,8 @@ class AccountTransactionViewSet(viewsets.ModelViewSet):
         Member-facing endpoint: returns all INCOME transactions linked
         to the logged-in member.
         """
-        user = request.user
-        try:
-            member = user.member_profile
-        except Exception:
+        member_id = principal_for(request.user).member_id
+        if member_id is None:
             return Response(
                 {'error': 'No member profile found.'},
                 status=status.HTTP_404_NOT_FOUND,
@@ -504,7 +591,7 @@ class AccountTransactionViewSet(viewsets.ModelViewSet):
 
         qs = AccountTransaction.objects.filter(
             transaction_type='INCOME',
-            member=member,
+            member_id=member_id,
             is_deleted=False,
         ).select_related('account_head', 'receipt').order_by('-transaction_date')
 
@@ -550,41 +637,41 @@ class ReceiptViewSet(viewsets.ReadOnlyModelViewSet):
             'transaction__entered_by', 'transaction__member',
         )
 
-        # Admin: unrestricted
-        if user.is_staff:
-            return base_qs
+        principal = principal_for(user)
 
-        # Accountant: unrestricted
-        try:
-            profile = user.staff_profile
-            if profile.role == 'ACCOUNTANT' and profile.is_active:
-                return base_qs
-        except Exception:
-            pass
+        # Admin / Accountant: unrestricted
+        if principal.sees_all:
+            return base_qs
 
         # Member: scope to own receipts only
-        try:
-            member = user.member_profile
-            return base_qs.filter(transaction__member=member)
-        except Exception:
-            pass
+        if principal.member_id is not None:
+            return base_qs.filter(transaction__member_id=principal.member_id)
 
         # Unknown user type — return nothing
         return base_qs.none()
 
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
-        """Download receipt PDF."""
-        receipt = self.get_object()  # enforces get_queryset() scoping
+        """
+        Download receipt PDF.
 
-        # If PDF doesn't exist yet, generate it on the fly
-        if not receipt.pdf_file:
-            from .receipt_generator import generate_receipt_pdf
-            from django.core.files.base import ContentFile
+        Serves the stored file once the render queue has marked it READY;
+        otherwise renders it on the fly so the user never waits on the queue.
+        A receipt a worker is rendering right now is waited for instead
+        (503 with Retry-After if that takes too long).
+        """
+        from .receipt_queue import ReceiptNotReady, ensure_receipt_rendered
 
-            pdf_bytes = generate_receipt_pdf(receipt.transaction)
-            filename = f"{receipt.receipt_number.replace('/', '_')}.pdf"
-            receipt.pdf_file.save(filename, ContentFile(pdf_bytes), save=True)
+        receipt = self.get_object()  # enforces get_queryset() scoping
+        try:
+            ensure_receipt_rendered(receipt)
+        except ReceiptNotReady:
+            response = Response(
+                {'error': 'The receipt PDF is being generated. Please try again shortly.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response['Retry-After'] = '5'
+            return response
 
         response = HttpResponse(
             receipt.pdf_file.read(),
@@ -595,257 +682,106 @@ class ReceiptViewSet(viewsets.ReadOnlyModelViewSet):
         )
         return response
 
-
-# ---------------------------------------------------------------------------
-# Excel export helper (openpyxl)
-# ---------------------------------------------------------------------------
-
-def _build_export_response(request, account_heads, filename):
-    """
-    Build an .xlsx HttpResponse with Income / Expense / Summary sheets
-    for the given account head(s).
-    """
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-    date_from = request.query_params.get('from')
-    date_to = request.query_params.get('to')
-
-    wb = openpyxl.Workbook()
-    # Remove default sheet
-    wb.remove(wb.active)
-
-    header_font = Font(bold=True, size=11, color='FFFFFF')
-    header_fill = PatternFill(start_color='4338CA', end_color='4338CA', fill_type='solid')
-    header_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin'),
+    @action(
+        detail=False, methods=['get'], url_path='export',
+        permission_classes=[permissions.IsAuthenticated, IsAdmin],
     )
+    def export(self, request):
+        """
+        Admin only.  Stream a ZIP of receipt PDFs.
+
+        Query params (at least one): ?fiscal_year=2026-27, ?account_head=<id>,
+        ?member=<id>; ?include_deleted=true also exports receipts of deleted
+        transactions.  Stored PDFs are reused; missing ones are rendered in
+        the process pool before the archive starts streaming, and a 503 is
+        returned if any of them fail.  For very large sets pass ?async=true:
+        a background job renders the missing PDFs in parallel and the ZIP
+        is downloaded from /api/jobs/<id>/download/ when it finishes.
+        """
+        from django.http import StreamingHttpResponse
+        from .receipt_export import (
+            filter_receipts, iter_receipts_zip, missing_receipt_ids, render_receipts_parallel,
+        )
 
-    overall_debits = Decimal('0')
-    overall_credits = Decimal('0')
+        fiscal_year = request.query_params.get('fiscal_year')
+        account_head = request.query_params.get('account_head')
+        member = request.query_params.get('member')
+        if not (fiscal_year or account_head or member):
+            return Response(
+                {'error': 'Provide fiscal_year, account_head or member.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            account_head = int(account_head) if account_head else None
+            member = int(member) if member else None
+        except ValueError:
+            return Response(
+                {'error': 'account_head and member must be integer ids.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-    for head in account_heads:
-        qs = AccountTransaction.objects.filter(
-            account_head=head, is_deleted=False,
-        ).select_related('member', 'entered_by', 'receipt')
+        receipts = filter_receipts(
+            fiscal_year=fiscal_year,
+            account_head=account_head,
+            member=member,
+            include_deleted=request.query_params.get('include_deleted') == 'true',
+        )
+        if not receipts.exists():
+            return Response(
+                {'error': 'No receipts match the given filters.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        if date_from:
-            qs = qs.filter(transaction_date__gte=date_from)
-        if date_to:
-            qs = qs.filter(transaction_date__lte=date_to)
+        label = fiscal_year or (f"head_{account_head}" if account_head else f"member_{member}")
+        if async_requested(request):
+            return enqueue_response(request, 'accounting.export_receipts', {
+                'filename': f"receipts_{label}.zip",
+                'fiscal_year': fiscal_year,
+                'account_head': account_head,
+                'member': member,
+                'include_deleted': request.query_params.get('include_deleted') == 'true',
+            })
 
-        income_txns = qs.filter(transaction_type='CREDIT').order_by('transaction_date')
-        expense_txns = qs.filter(transaction_type='DEBIT').order_by('transaction_date')
-
-        head_income = income_txns.aggregate(t=Sum('amount'))['t'] or Decimal('0')
-        head_expense = expense_txns.aggregate(t=Sum('amount'))['t'] or Decimal('0')
-        overall_credits += head_income
-        overall_debits += head_expense
-
-        # Truncate sheet name to 31 chars (Excel limit)
-        safe_name = head.name[:28]
-
-        # --- Income (Credit) sheet ---
-        ws_income = wb.create_sheet(title=f"{safe_name} Credits")
-        ws_income.cell(row=1, column=1, value='ஸ்ரீ ராமஜெயம் | Sri Ramajeyam').font = Font(bold=True, size=14, color='D97706')
-        ws_income.merge_cells('A1:L1')
-        ws_income.cell(row=1, column=1).alignment = Alignment(horizontal='center')
-
-        income_headers = [
-            'Date', 'Donor Name', 'Donor Name (Tamil)', 'Contact', 'Member ID', 'Member Name',
-            'Amount', 'Payment Mode', 'Purpose/Remarks', 'Purpose/Remarks (Tamil)', 'Receipt No', 'Entered By',
-        ]
-        for col, hdr in enumerate(income_headers, 1):
-            cell = ws_income.cell(row=2, column=col, value=hdr)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_align
-            cell.border = thin_border
-
-        for row_idx, txn in enumerate(income_txns, 3):
-            entered_name = _get_display_name(txn.entered_by)
-            receipt_no = ''
-            try:
-                receipt_no = txn.receipt.receipt_number
-            except Exception:
-                pass
+        failed = render_receipts_parallel(missing_receipt_ids(receipts))
+        if failed:
+            return Response(
+                {'error': f"{len(failed)} receipt(s) could not be rendered; "
+                          f"try again, or pass async=true to export in the background."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
 
-            vals = [
-                txn.transaction_date.strftime('%Y-%m-%d'),
-                txn.donor_name,
-                txn.donor_name_ta,
-                txn.donor_contact,
-                txn.member.member_id if txn.member else '',
-                txn.member.name if txn.member else '',
-                float(txn.amount),
-                txn.payment_mode,
-                txn.purpose,
-                txn.purpose_ta,
-                receipt_no,
-                entered_name,
-            ]
-            for col, val in enumerate(vals, 1):
-                cell = ws_income.cell(row=row_idx, column=col, value=val)
-                cell.border = thin_border
-
-        # --- Expense (Debit) sheet ---
-        ws_expense = wb.create_sheet(title=f"{safe_name} Debits")
-        ws_expense.cell(row=1, column=1, value='ஸ்ரீ ராமஜெயம் | Sri Ramajeyam').font = Font(bold=True, size=14, color='D97706')
-        ws_expense.merge_cells('A1:K1')
-        ws_expense.cell(row=1, column=1).alignment = Alignment(horizontal='center')
-
-        expense_headers = [
-            'Date', 'Paid To', 'Paid To (Tamil)', 'Purpose/Description', 'Purpose/Description (Tamil)',
-            'Amount', 'Payment Mode', 'Bill Reference', 'Receipt No', 'Entered By',
-        ]
-        for col, hdr in enumerate(expense_headers, 1):
-            cell = ws_expense.cell(row=2, column=col, value=hdr)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_align
-            cell.border = thin_border
-
-        for row_idx, txn in enumerate(expense_txns, 3):
-            entered_name = _get_display_name(txn.entered_by)
-            receipt_no = ''
-            try:
-                receipt_no = txn.receipt.receipt_number
-            except Exception:
-                pass
+        response = StreamingHttpResponse(
+            iter_receipts_zip(receipts.iterator(chunk_size=200)),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="receipts_{label}.zip"'
+        return response
 
-            vals = [
-                txn.transaction_date.strftime('%Y-%m-%d'),
-                txn.paid_to,
-                txn.paid_to_ta,
-                txn.purpose_description,
-                txn.purpose_description_ta,
-                float(txn.amount),
-                txn.payment_mode,
-                txn.bill_reference,
-                receipt_no,
-                entered_name,
-            ]
-            for col, val in enumerate(vals, 1):
-                cell = ws_expense.cell(row=row_idx, column=col, value=val)
-                cell.border = thin_border
-
-    # --- Summary sheet ---
-    ws_summary = wb.create_sheet(title='Summary', index=0)
-    summary_header_fill = PatternFill(
-        start_color='059669', end_color='059669', fill_type='solid',
-    )
 
-    ws_summary.cell(row=1, column=1, value='ஸ்ரீ ராமஜெயம் | Sri Ramajeyam').font = Font(
-        bold=True, size=14, color='D97706',
-    )
-    ws_summary.merge_cells('A1:E1')
-    ws_summary.cell(row=1, column=1).alignment = Alignment(horizontal='center')
+# ---------------------------------------------------------------------------
+# Excel export helper (openpyxl)
+# ---------------------------------------------------------------------------
 
-    ws_summary.cell(row=2, column=1, value='Account Head Report Summary').font = Font(
-        bold=True, size=14,
-    )
-    ws_summary.merge_cells('A2:E2')
-
-    date_range_str = ''
-    if date_from or date_to:
-        date_range_str = f"From: {date_from or 'Start'} — To: {date_to or 'Present'}"
-        ws_summary.cell(row=3, column=1, value=date_range_str)
-        ws_summary.merge_cells('A3:E3')
-
-    start_row = 5
-    for col, hdr in enumerate(
-        ['Account Head', 'Account Type', 'Total Credits', 'Total Debits', 'Net Balance'], 1,
-    ):
-        cell = ws_summary.cell(row=start_row, column=col, value=hdr)
-        cell.font = header_font
-        cell.fill = summary_header_fill
-        cell.alignment = header_align
-        cell.border = thin_border
-
-    row = start_row + 1
-    overall_net_balance = Decimal('0')
-    for head in account_heads:
-        qs = AccountTransaction.objects.filter(
-            account_head=head, is_deleted=False,
-        )
-        if date_from:
-            qs = qs.filter(transaction_date__gte=date_from)
-        if date_to:
-            qs = qs.filter(transaction_date__lte=date_to)
+def _build_export_response(request, account_heads, filename, head_ids=None):
+    """
+    Stream an .xlsx with Summary / Credits / Debits sheets for the given
+    account head(s). See accounting/xlsx_export.py.
 
-        hi = qs.filter(transaction_type='CREDIT').aggregate(t=Sum('amount'))['t'] or Decimal('0')
-        he = qs.filter(transaction_type='DEBIT').aggregate(t=Sum('amount'))['t'] or Decimal('0')
+    With ?async=true the workbook is built by a background job instead;
+    *head_ids* limits it to those heads (None = all heads).
+    """
+    date_from = request.query_params.get('from')
+    date_to = request.query_params.get('to')
+    if async_requested(request):
+        return enqueue_response(request, 'accounting.export_account_heads', {
+            'filename': filename, 'head_ids': head_ids,
+            'date_from': date_from, 'date_to': date_to,
+        })
 
-        if head.account_type in ['Asset', 'Expense']:
-            net_balance = he - hi
-        else:
-            net_balance = hi - he
-            
-        overall_net_balance += net_balance
-
-        ws_summary.cell(row=row, column=1, value=head.name).border = thin_border
-        ws_summary.cell(row=row, column=2, value=head.account_type).border = thin_border
-        ws_summary.cell(row=row, column=3, value=float(hi)).border = thin_border
-        ws_summary.cell(row=row, column=4, value=float(he)).border = thin_border
-        ws_summary.cell(row=row, column=5, value=float(net_balance)).border = thin_border
-        row += 1
-
-    # Totals row
-    total_font = Font(bold=True, size=11)
-    ws_summary.cell(row=row, column=1, value='TOTAL').font = total_font
-    ws_summary.cell(row=row, column=2, value='').border = thin_border
-    ws_summary.cell(
-        row=row, column=3, value=float(overall_credits),
-    ).font = total_font
-    ws_summary.cell(
-        row=row, column=4, value=float(overall_debits),
-    ).font = total_font
-    ws_summary.cell(
-        row=row, column=5, value=float(overall_net_balance),
-    ).font = total_font
-    for col in range(1, 6):
-        ws_summary.cell(row=row, column=col).border = thin_border
-
-    # Auto-width columns
-    for ws in wb.worksheets:
-        for col in ws.columns:
-            max_len = 0
-            col_letter = None
-            for cell in col:
-                if hasattr(cell, 'column_letter'):
-                    col_letter = cell.column_letter
-                if cell.value:
-                    max_len = max(max_len, len(str(cell.value)))
-            if col_letter:
-                ws.column_dimensions[col_letter].width = min(max_len + 4, 40)
-
-    # Build response
-    from io import BytesIO
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-
-    response = HttpResponse(
-        buf.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    from .xlsx_export import stream_account_heads_xlsx
+    return stream_account_heads_xlsx(
+        account_heads, filename, date_from=date_from, date_to=date_to,
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
-
-
-def _get_display_name(user):
-    """Get a human-readable name for a user."""
-    try:
-        return user.staff_profile.name
-    except Exception:
-        pass
-    try:
-        return user.member_profile.name
-    except Exception:
-        pass
-    return user.get_username()
 
 
 from rest_framework.views import APIView
@@ -913,6 +849,7 @@ class SystemSettingsView(APIView):
             try:
                 with open(target_path, 'w', encoding='utf-8') as f:
                     f.write(content)
+                invalidate_receipt_template_cache()
                 return Response({'message': f'Template "{template_name}" saved successfully.'})
             except Exception as e:
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -938,6 +875,7 @@ class SystemSettingsView(APIView):
                 config_data['active_receipt_template'] = active_template
                 with open(settings_path, 'w', encoding='utf-8') as f:
                     json.dump(config_data, f, indent=4)
+                invalidate_receipt_template_cache()
                 return Response({'message': 'Active receipt template updated successfully.'})
             except Exception as e:
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,225 @@
+"""
+Streaming .xlsx export of account head transactions.
+
+The workbook is built with openpyxl's write_only mode: each row is
+serialised to the sheet's XML as soon as it is appended, so memory does
+not grow with the number of transactions.  Rows come from
+``values_list(...).iterator()`` (no model instances), column widths are
+fixed up front instead of measured cell by cell, and the per-head
+totals for the Summary sheet come from one grouped query run before any
+sheet is written (write_only sheets must be written in order, and
+Summary is first).
+
+The finished file goes out through streaming.stream_spooled(): a
+spooled temporary file that stays in memory for small exports, rolls
+over to disk for big ones, and is streamed back in chunks.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Sum
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from .models import AccountTransaction
+from .streaming import XLSX_CONTENT_TYPE, stream_spooled
+
+ITERATOR_CHUNK_SIZE = 2000
+
+TITLE = 'ஸ்ரீ ராமஜெயம் | Sri Ramajeyam'
+
+# (header, width) per column, in sheet order.
+INCOME_COLUMNS = [
+    ('Date', 12), ('Donor Name', 28), ('Donor Name (Tamil)', 28), ('Contact', 16),
+    ('Member ID', 14), ('Member Name', 28), ('Amount', 14), ('Payment Mode', 16),
+    ('Purpose/Remarks', 36), ('Purpose/Remarks (Tamil)', 36), ('Receipt No', 24), ('Entered By', 20),
+]
+EXPENSE_COLUMNS = [
+    ('Date', 12), ('Paid To', 28), ('Paid To (Tamil)', 28), ('Purpose/Description', 36),
+    ('Purpose/Description (Tamil)', 36), ('Amount', 14), ('Payment Mode', 16),
+    ('Bill Reference', 20), ('Receipt No', 24), ('Entered By', 20),
+]
+SUMMARY_COLUMNS = [
+    ('Account Head', 36), ('Account Type', 16), ('Total Credits', 16),
+    ('Total Debits', 16), ('Net Balance', 16),
+]
+
+# Trailing three values of every row are the entered_by display-name
+# candidates, resolved like _get_display_name in views.
+_ENTERED_BY = (
+    'entered_by__staff_profile__name', 'entered_by__member_profile__name', 'entered_by__username',
+)
+INCOME_FIELDS = (
+    'transaction_date', 'donor_name', 'donor_name_ta', 'donor_contact',
+    'member__member_id', 'member__name', 'amount', 'payment_mode',
+    'purpose', 'purpose_ta', 'receipt__receipt_number',
+) + _ENTERED_BY
+EXPENSE_FIELDS = (
+    'transaction_date', 'paid_to', 'paid_to_ta', 'purpose_description',
+    'purpose_description_ta', 'amount', 'payment_mode', 'bill_reference',
+    'receipt__receipt_number',
+) + _ENTERED_BY
+
+
+class _Styles:
+    def __init__(self):
+        self.header_font = Font(bold=True, size=11, color='FFFFFF')
+        self.header_fill = PatternFill(start_color='4338CA', end_color='4338CA', fill_type='solid')
+        self.summary_fill = PatternFill(start_color='059669', end_color='059669', fill_type='solid')
+        self.header_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        self.border = Border(
+            left=Side(style='thin'), right=Side(style='thin'),
+            top=Side(style='thin'), bottom=Side(style='thin'),
+        )
+        self.title_font = Font(bold=True, size=14, color='D97706')
+        self.bold = Font(bold=True, size=14)
+        self.total_font = Font(bold=True, size=11)
+
+
+def _cell(ws, value, font=None, fill=None, alignment=None, border=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    if alignment:
+        cell.alignment = alignment
+    if border:
+        cell.border = border
+    return cell
+
+
+def _new_sheet(wb, title, columns):
+    """Create a sheet with its column widths fixed up front."""
+    ws = wb.create_sheet(title=title)
+    for idx, (_, width) in enumerate(columns, 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    return ws
+
+
+def _merged_row(ws, row_number, value, font, width, alignment=None):
+    """Append a one-value row at *row_number*, merged across *width* columns."""
+    ws.append([_cell(ws, value, font=font, alignment=alignment)])
+    ws.merged_cells.add(CellRange(f"A{row_number}:{get_column_letter(width)}{row_number}"))
+
+
+def _header_row(ws, columns, styles, fill):
+    ws.append([
+        _cell(ws, header, font=styles.header_font, fill=fill,
+              alignment=styles.header_align, border=styles.border)
+        for header, _ in columns
+    ])
+
+
+def _start_sheet(wb, title, columns, styles):
+    """Transaction sheet: title in row 1, headers in row 2."""
+    ws = _new_sheet(wb, title, columns)
+    _merged_row(ws, 1, TITLE, styles.title_font, len(columns), Alignment(horizontal='center'))
+    _header_row(ws, columns, styles, styles.header_fill)
+    return ws
+
+
+def _rows(qs, fields):
+    for values in qs.values_list(*fields).iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        *row, staff_name, member_name, username = values
+        yield row, staff_name or member_name or username or ''
+
+
+def _write_rows(ws, rows, styles):
+    for row, entered_by in rows:
+        row[0] = row[0].strftime('%Y-%m-%d')
+        ws.append([
+            _cell(ws, float(value) if isinstance(value, Decimal) else ('' if value is None else value),
+                  border=styles.border)
+            for value in row + [entered_by]
+        ])
+
+
+def head_totals(head_ids, date_from=None, date_to=None):
+    """{head_id: (credits, debits)} from one grouped query."""
+    qs = AccountTransaction.objects.filter(account_head_id__in=head_ids, is_deleted=False)
+    if date_from:
+        qs = qs.filter(transaction_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(transaction_date__lte=date_to)
+    totals = {head_id: [Decimal('0'), Decimal('0')] for head_id in head_ids}
+    for row in qs.order_by().values('account_head_id', 'transaction_type').annotate(t=Sum('amount')):
+        slot = 0 if row['transaction_type'] == 'CREDIT' else 1
+        totals[row['account_head_id']][slot] += Decimal(row['t'] or 0)
+    return {head_id: tuple(pair) for head_id, pair in totals.items()}
+
+
+def _write_summary(wb, heads, totals, styles, date_from, date_to):
+    width = len(SUMMARY_COLUMNS)
+    ws = _new_sheet(wb, 'Summary', SUMMARY_COLUMNS)
+    _merged_row(ws, 1, TITLE, styles.title_font, width, Alignment(horizontal='center'))
+    _merged_row(ws, 2, 'Account Head Report Summary', styles.bold, width)
+    if date_from or date_to:
+        _merged_row(ws, 3, f"From: {date_from or 'Start'} — To: {date_to or 'Present'}", None, width)
+    else:
+        ws.append([])
+    ws.append([])
+    _header_row(ws, SUMMARY_COLUMNS, styles, styles.summary_fill)
+
+    overall_credits = overall_debits = overall_net = Decimal('0')
+    for head in heads:
+        credits, debits = totals[head.pk]
+        if head.account_type in ['Asset', 'Expense']:
+            net_balance = debits - credits
+        else:
+            net_balance = credits - debits
+        overall_credits += credits
+        overall_debits += debits
+        overall_net += net_balance
+        ws.append([
+            _cell(ws, value, border=styles.border)
+            for value in (head.name, head.account_type, float(credits), float(debits), float(net_balance))
+        ])
+
+    ws.append([
+        _cell(ws, value, font=styles.total_font if value != '' else None, border=styles.border)
+        for value in ('TOTAL', '', float(overall_credits), float(overall_debits), float(overall_net))
+    ])
+
+
+def write_account_heads_workbook(account_heads, fileobj, date_from=None, date_to=None):
+    """Write the Summary + per-head Credits/Debits workbook to *fileobj*."""
+    heads = list(account_heads)
+    totals = head_totals([head.pk for head in heads], date_from, date_to)
+    styles = _Styles()
+    wb = Workbook(write_only=True)
+
+    _write_summary(wb, heads, totals, styles, date_from, date_to)
+
+    for head in heads:
+        qs = AccountTransaction.objects.filter(
+            account_head=head, is_deleted=False,
+        )
+        if date_from:
+            qs = qs.filter(transaction_date__gte=date_from)
+        if date_to:
+            qs = qs.filter(transaction_date__lte=date_to)
+        # Truncate sheet name to 31 chars (Excel limit)
+        safe_name = head.name[:28]
+
+        ws = _start_sheet(wb, f"{safe_name} Credits", INCOME_COLUMNS, styles)
+        _write_rows(ws, _rows(
+            qs.filter(transaction_type='CREDIT').order_by('transaction_date', 'id'), INCOME_FIELDS,
+        ), styles)
+        ws = _start_sheet(wb, f"{safe_name} Debits", EXPENSE_COLUMNS, styles)
+        _write_rows(ws, _rows(
+            qs.filter(transaction_type='DEBIT').order_by('transaction_date', 'id'), EXPENSE_FIELDS,
+        ), styles)
+
+    wb.save(fileobj)
+
+
+def stream_account_heads_xlsx(account_heads, filename, date_from=None, date_to=None):
+    """StreamingHttpResponse delivering write_account_heads_workbook() output."""
+    return stream_spooled(
+        lambda fileobj: write_account_heads_workbook(account_heads, fileobj, date_from, date_to),
+        XLSX_CONTENT_TYPE, filename,
+    )
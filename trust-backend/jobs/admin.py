@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'attempts', 'progress_current', 'progress_total', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('id', 'kind', 'error')
+    readonly_fields = ('id', 'created_at', 'started_at', 'heartbeat_at', 'finished_at')
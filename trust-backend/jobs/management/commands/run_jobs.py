@@ -0,0 +1,48 @@
+"""
+Django management command that runs queued background jobs.
+
+Usage:
+    python manage.py run_jobs            # run until interrupted
+    python manage.py run_jobs --once     # run queued jobs until the queue is empty, then exit
+
+Run one (or several) of these next to gunicorn.  See jobs/queue.py for
+the job states and retry policy.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import process_next_job
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs queued by admin endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once no job is ready to run',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to sleep when the queue is empty (default 2)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Job worker started.')
+        try:
+            while True:
+                close_old_connections()
+                job = process_next_job()
+                if job is not None:
+                    job.refresh_from_db(fields=['status'])
+                    self.stdout.write(f"{job.kind} {job.pk}: {job.status}")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Job worker stopped.'))
@@ -0,0 +1,68 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A long-running admin operation (tax generation, Excel import, full
+    exports, bulk receipt rendering) queued for the ``run_jobs`` worker.
+
+    The row is the queue entry; see jobs/queue.py for the state machine.
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, verbose_name="Job Type")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED', db_index=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time (retry backoff)")
+
+    progress_current = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    progress_message = models.CharField(max_length=255, blank=True, default='')
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    artifact = models.FileField(upload_to='jobs/', blank=True, null=True)
+
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.kind} [{self.status}] {self.id}"
+
+    def set_progress(self, current, total=None, message=None):
+        """Record progress from inside a running job (also serves as a heartbeat)."""
+        self.progress_current = current
+        fields = {'progress_current': current, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            self.progress_total = fields['progress_total'] = total
+        if message is not None:
+            self.progress_message = fields['progress_message'] = message[:255]
+        Job.objects.filter(pk=self.pk).update(**fields)
+
+    def save_artifact(self, filename, fileobj):
+        """Store *fileobj* (a binary file opened for reading) as the job's download."""
+        from django.core.files import File
+        self.artifact.save(f"{self.pk}/{filename}", File(fileobj), save=False)
+        Job.objects.filter(pk=self.pk).update(artifact=self.artifact.name)
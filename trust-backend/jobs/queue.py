@@ -0,0 +1,179 @@
+"""
+Database-backed job queue.
+
+The Job row is the queue entry; no broker is involved.  Endpoints call
+enqueue() and return the job id, and ``python manage.py run_jobs``
+claims and runs jobs out of band:
+
+    QUEUED ──claim──> RUNNING ──ok──> SUCCEEDED
+                         │
+                         ├─error──> QUEUED after a backoff (retry)
+                         └─error──> FAILED (JobFailed, or attempts used up)
+
+Claiming is a compare-and-swap UPDATE (``WHERE status='QUEUED'``), the
+same scheme as the receipt render queue, so several workers can share
+the table on SQLite as well as PostgreSQL.  While a handler runs, a
+background thread refreshes the job's heartbeat every third of
+JOB_STALE_SECONDS (Job.set_progress also counts as one), so only a job
+whose worker has died goes stale; it is then requeued, or failed if it
+has no attempts left.
+
+Handlers live in each app's tasks.py:
+
+    @register('members.generate_taxes', max_attempts=1)
+    def generate_taxes_job(job, tax_id, user_id):
+        ...
+        return {'message': ...}       # stored as job.result
+
+They receive the Job (for set_progress / save_artifact) and its params
+as keyword arguments.  Raise JobFailed for errors a retry cannot fix.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_HANDLERS = {}
+
+
+class JobFailed(Exception):
+    """Permanent failure: the job is marked FAILED without further retries."""
+
+
+def register(kind, max_attempts=None):
+    """Decorator registering *func* as the handler for jobs of *kind*."""
+    def decorator(func):
+        _HANDLERS[kind] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(kind, params=None, user=None, max_attempts=None):
+    """Queue a job of a registered *kind* and return it."""
+    if kind not in _HANDLERS:
+        raise KeyError(f"No job handler registered for {kind!r}")
+    default_attempts = _HANDLERS[kind][1] or getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+    return Job.objects.create(
+        kind=kind,
+        params=params or {},
+        created_by=user if user and user.is_authenticated else None,
+        max_attempts=max_attempts or default_attempts,
+    )
+
+
+def _stale_seconds():
+    return getattr(settings, 'JOB_STALE_SECONDS', 900)
+
+
+def requeue_stale_jobs(stale_after=None):
+    """Hand RUNNING jobs abandoned by a dead worker back to the queue (or fail them)."""
+    if stale_after is None:
+        stale_after = _stale_seconds()
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status='RUNNING', heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', error='Worker stopped responding.', finished_at=timezone.now(),
+    )
+    return stale.update(status='QUEUED') + failed
+
+
+def claim_next_job():
+    """Claim the oldest runnable QUEUED job for this worker, or return None."""
+    now = timezone.now()
+    candidate_ids = list(
+        Job.objects
+        .filter(status='QUEUED', run_after__lte=now)
+        .order_by('created_at')
+        .values_list('id', flat=True)[:5]
+    )
+    for job_id in candidate_ids:
+        updated = Job.objects.filter(pk=job_id, status='QUEUED').update(
+            status='RUNNING',
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _retry_delay(attempts):
+    backoff = getattr(settings, 'JOB_RETRY_BACKOFF_SECONDS', 30)
+    return timedelta(seconds=backoff * 2 ** max(attempts - 1, 0))
+
+
+@contextmanager
+def _heartbeat(job):
+    """Refresh *job*'s heartbeat from a background thread until the block exits."""
+    stopped = threading.Event()
+    interval = max(_stale_seconds() / 3, 1)
+
+    def beat():
+        try:
+            while not stopped.wait(interval):
+                Job.objects.filter(pk=job.pk, status='RUNNING').update(heartbeat_at=timezone.now())
+        except Exception:
+            logger.exception("Heartbeat for job %s stopped", job.pk)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job):
+    """Run a claimed job's handler and record the outcome on the row."""
+    handler = _HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise JobFailed(f"No job handler registered for {job.kind!r}")
+        with _heartbeat(job):
+            result = handler[0](job, **job.params)
+    except Exception as exc:
+        give_up = isinstance(exc, JobFailed) or job.attempts >= job.max_attempts
+        fields = {'error': str(exc)[:2000]}
+        if give_up:
+            fields.update(status='FAILED', finished_at=timezone.now())
+        else:
+            fields.update(status='QUEUED', run_after=timezone.now() + _retry_delay(job.attempts))
+        Job.objects.filter(pk=job.pk).update(**fields)
+        logger.error(
+            "Job %s (%s) failed on attempt %s/%s: %s",
+            job.pk, job.kind, job.attempts, job.max_attempts, exc,
+        )
+        return False
+
+    job.refresh_from_db(fields=['progress_current', 'progress_total'])
+    Job.objects.filter(pk=job.pk).update(
+        status='SUCCEEDED',
+        result=result,
+        error='',
+        progress_current=job.progress_total or job.progress_current,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def process_next_job():
+    """Requeue stale jobs, then claim and run one. Returns the job, or None if idle."""
+    requeue_stale_jobs()
+    job = claim_next_job()
+    if job is not None:
+        run_job(job)
+    return job
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress_percent = serializers.SerializerMethodField()
+    artifact_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'attempts', 'max_attempts',
+            'progress_current', 'progress_total', 'progress_percent', 'progress_message',
+            'result', 'error', 'artifact_url',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress_percent(self, obj):
+        if obj.status == 'SUCCEEDED':
+            return 100
+        if not obj.progress_total:
+            return None
+        return min(100, int(obj.progress_current * 100 / obj.progress_total))
+
+    def get_artifact_url(self, obj):
+        if not obj.artifact:
+            return None
+        path = f'/api/jobs/{obj.pk}/download/'
+        request = self.context.get('request')
+        return request.build_absolute_uri(path) if request else path
@@ -0,0 +1,114 @@
+import datetime
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from jobs.queue import JobFailed, enqueue, process_next_job, register
+
+
+@register('tests.flaky')
+def _flaky_job(job, fail_with=None):
+    if fail_with == 'permanent':
+        raise JobFailed('bad params')
+    if fail_with == 'transient':
+        raise RuntimeError('database went away')
+    job.set_progress(1, 1, 'done')
+    return {'ok': True}
+
+
+@register('tests.slow')
+def _slow_job(job, seconds):
+    import time
+    time.sleep(seconds)
+    return {'ok': True}
+
+
+class JobQueueTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_async_export_runs_in_worker_and_is_downloadable(self):
+        import io
+        import openpyxl
+        from rest_framework.test import APIClient
+        from accounting.models import AccountHead, AccountTransaction, StaffProfile
+
+        admin = User.objects.create_user(username='jobadmin', password='password123', is_staff=True)
+        StaffProfile.objects.create(user=admin, name="Treasurer Raman", role='ACCOUNTANT')
+        head = AccountHead.objects.create(
+            name="Kodai Vari", account_type="Revenue", is_active=True, created_by=admin,
+        )
+        AccountTransaction.objects.create(
+            account_head=head, transaction_type='CREDIT', amount=Decimal("1000.00"),
+            transaction_date=datetime.date(2026, 2, 1), payment_mode='Cash', entered_by=admin,
+            donor_name="Velu",
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = client.get('/api/accounting/account-heads/export-all/?async=true')
+            self.assertEqual(response.status_code, 202)
+            job_id = response.data['job_id']
+            self.assertTrue(response.data['status_url'].endswith(f'/api/jobs/{job_id}/'))
+            self.assertEqual(client.get(f'/api/jobs/{job_id}/').data['status'], 'QUEUED')
+
+            self.assertEqual(str(process_next_job().pk), job_id)
+            self.assertIsNone(process_next_job())
+
+            status_data = client.get(f'/api/jobs/{job_id}/').data
+            self.assertEqual(status_data['status'], 'SUCCEEDED')
+            self.assertEqual(status_data['result'], {'filename': 'All_Account_Heads.xlsx'})
+
+            download = client.get(f'/api/jobs/{job_id}/download/')
+            self.assertEqual(download.status_code, 200)
+            wb = openpyxl.load_workbook(io.BytesIO(b''.join(download.streaming_content)))
+            self.assertIn('Kodai Vari Credits', wb.sheetnames)
+
+        other = User.objects.create_user(username='member1', password='password123')
+        client.force_authenticate(user=other)
+        self.assertEqual(client.get(f'/api/jobs/{job_id}/').status_code, 404)
+
+    @override_settings(JOB_RETRY_BACKOFF_SECONDS=0)
+    def test_transient_errors_retry_until_attempts_run_out(self):
+        job = enqueue('tests.flaky', {'fail_with': 'transient'}, max_attempts=2)
+        process_next_job()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+        self.assertIn('database went away', job.error)
+
+        process_next_job()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+
+        permanent = enqueue('tests.flaky', {'fail_with': 'permanent'})
+        process_next_job()
+        permanent.refresh_from_db()
+        self.assertEqual((permanent.status, permanent.attempts), ('FAILED', 1))
+        self.assertEqual(permanent.error, 'bad params')
+
+
+class JobHeartbeatTestCase(TransactionTestCase):
+    @override_settings(JOB_STALE_SECONDS=3)
+    def test_running_job_keeps_sending_heartbeats(self):
+        from jobs.queue import claim_next_job, requeue_stale_jobs, run_job
+
+        job = enqueue('tests.slow', {'seconds': 2.5})
+        job = claim_next_job()
+        started = job.heartbeat_at
+        worker = threading.Thread(target=run_job, args=(job,))
+        worker.start()
+        time.sleep(2)
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, started)
+        # Not stale while its worker is alive, even after the first heartbeat ages out.
+        self.assertEqual(requeue_stale_jobs(stale_after=1.5), 0)
+        worker.join()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCEEDED')
@@ -0,0 +1,59 @@
+"""
+Job status API and the helpers endpoints use to offer ?async=true.
+
+    GET /api/jobs/             the caller's jobs (admins see all)
+    GET /api/jobs/<id>/        status, progress, result payload, artifact_url
+    GET /api/jobs/<id>/download/   the job's artifact (export file)
+"""
+
+from django.http import FileResponse
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Job
+from .queue import enqueue
+from .serializers import JobSerializer
+
+
+def async_requested(request):
+    """True when the caller asked for ?async=true (query string or body)."""
+    value = request.query_params.get('async')
+    if value is None and hasattr(request.data, 'get'):
+        value = request.data.get('async')
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def enqueue_response(request, kind, params):
+    """Queue a job for *request*'s user and answer 202 with its id and status URL."""
+    job = enqueue(kind, params, user=request.user)
+    return Response(
+        {
+            'job_id': str(job.pk),
+            'status': job.status,
+            'status_url': request.build_absolute_uri(f'/api/jobs/{job.pk}/'),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        qs = Job.objects.all()
+        if not self.request.user.is_staff:
+            qs = qs.filter(created_by=self.request.user)
+        if self.action == 'list':
+            qs = qs[:50]
+        return qs
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if not job.artifact:
+            return Response({'error': 'This job has no file to download.'}, status=status.HTTP_404_NOT_FOUND)
+        filename = job.artifact.name.rsplit('/', 1)[-1]
+        return FileResponse(job.artifact.open('rb'), as_attachment=True, filename=filename)
@@ -66,25 +66,14 @@ class TaxMasterAdmin(admin.ModelAdmin):
 
     @admin.action(description='Generate taxes for all active family heads')
     def generate_taxes(self, request, queryset):
-        from .utils import calculate_member_tax_count
+        from .family_graph import FamilyIndex
+        from .tax_engine import upsert_member_taxes
+        counts = FamilyIndex.load().head_tax_counts()
         for tax_master in queryset:
-            members = Member.objects.filter(is_family_head=True, is_active=True)
-            created_count = 0
-            for member in members:
-                tax_count = calculate_member_tax_count(member)
-                total_tax = tax_count * tax_master.base_amount
-                
-                # Check if tax already exists
-                obj, created = MemberTax.objects.update_or_create(
-                    member=member,
-                    tax=tax_master,
-                    defaults={
-                        'tax_count': tax_count,
-                        'total_tax': total_tax,
-                    }
-                )
-                if created:
-                    created_count += 1
+            created_count = upsert_member_taxes(tax_master, {
+                member_id: (tax_count, tax_count * tax_master.base_amount)
+                for member_id, tax_count in counts.items()
+            })
             self.message_user(request, f"Generated {created_count} new taxes for '{tax_master.name}'.")
 
 @admin.register(MemberTax)
@@ -5,3 +5,6 @@ class MembersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'members'
     verbose_name = 'Trust Members'
+
+    def ready(self):
+        import members.signals  # noqa: F401
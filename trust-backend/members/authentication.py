@@ -0,0 +1,168 @@
+"""
+Token authentication with the caller's role resolved once per request.
+
+Every API call used to pay for the token lookup and then probe
+``user.staff_profile`` / ``Member.objects.get(user=...)`` again in each
+permission class and get_queryset().  CachedTokenAuthentication resolves
+
+    token -> user -> role (ADMIN / ACCOUNTANT / MEMBER) -> member id
+
+in one query and attaches it to request.user, where principal_for()
+finds it.  When the default cache is shared between processes (Redis,
+Memcached, database, file), the result is also cached for AUTH_CACHE_TTL
+seconds:
+
+    auth:token:<sha256 of key>  -> user id
+    auth:user:<user id>         -> (User, Principal)
+
+members/signals.py drops them when a Token is deleted (logout,
+revocation) or the User, its StaffProfile or its Member changes.  A
+process-local cache (LocMemCache, Django's default) is not used: the
+worker that handles a logout or deactivation could not invalidate the
+others' copies, so the token is looked up on every request instead.
+
+Users authenticated any other way (admin session, force_authenticate in
+tests) are resolved on first use by principal_for() and memoised on the
+user object for the rest of the request.  DRF authenticates inside the
+view, after Django middleware has run, so no middleware is involved.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+ADMIN = 'ADMIN'
+ACCOUNTANT = 'ACCOUNTANT'
+MEMBER = 'MEMBER'
+
+
+class Principal:
+    """Who is calling: role plus the ids the views scope querysets by."""
+
+    __slots__ = ('user_id', 'role', 'member_id', 'staff_id')
+
+    def __init__(self, user_id=None, role=None, member_id=None, staff_id=None):
+        self.user_id = user_id
+        self.role = role
+        self.member_id = member_id
+        self.staff_id = staff_id
+
+    def __repr__(self):
+        return f"Principal(user={self.user_id}, role={self.role}, member={self.member_id})"
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN
+
+    @property
+    def is_accountant(self):
+        return self.role == ACCOUNTANT
+
+    @property
+    def sees_all(self):
+        """Admins and active accountants read every member's records."""
+        return self.role in (ADMIN, ACCOUNTANT)
+
+
+ANONYMOUS = Principal()
+
+
+def _ttl():
+    return getattr(settings, 'AUTH_CACHE_TTL', 60)
+
+
+# Cache backends private to one process; see the module docstring.
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def caching_enabled():
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return _ttl() > 0 and backend not in PROCESS_LOCAL_BACKENDS
+
+
+def token_cache_key(key):
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def resolve_principal(user):
+    """Role and member id of *user* from one query over its profiles."""
+    row = (
+        User.objects.filter(pk=user.pk)
+        .values('staff_profile__id', 'staff_profile__role', 'staff_profile__is_active', 'member_profile__id')
+        .first()
+    ) or {}
+    if user.is_staff:
+        role = ADMIN
+    elif row.get('staff_profile__role') == ACCOUNTANT and row.get('staff_profile__is_active'):
+        role = ACCOUNTANT
+    elif row.get('member_profile__id'):
+        role = MEMBER
+    else:
+        role = None
+    return Principal(
+        user_id=user.pk, role=role,
+        member_id=row.get('member_profile__id'),
+        staff_id=row.get('staff_profile__id'),
+    )
+
+
+def principal_for(user):
+    """The resolved Principal of *user* (request.user), computed at most once per request."""
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    principal = getattr(user, '_principal', None)
+    if principal is None:
+        principal = resolve_principal(user)
+        user._principal = principal
+    return principal
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def invalidate_token(key):
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that answers repeat calls from the cache."""
+
+    def authenticate_credentials(self, key):
+        use_cache = caching_enabled()
+        token_key = token_cache_key(key)
+        cached = None
+        if use_cache:
+            user_id = cache.get(token_key)
+            cached = cache.get(user_cache_key(user_id)) if user_id is not None else None
+
+        if cached is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            user = token.user
+            cached = (user, resolve_principal(user))
+            if use_cache:
+                cache.set_many({
+                    token_key: user.pk,
+                    user_cache_key(user.pk): cached,
+                }, _ttl())
+
+        user, principal = cached
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        user._principal = principal
+        return (user, key)
@@ -0,0 +1,144 @@
+"""
+In-memory family-tree index.
+
+``FamilyIndex.load()`` reads the columns the tax and succession rules need
+for every member in one query and keeps the father -> children adjacency
+list in memory.  Walking it costs no further queries, so a tax count that
+used to cost one query per node in the tree (children_set.all() and the
+sibling filter in utils.calculate_member_tax_count) becomes a dict lookup.
+
+Used by the bulk tax engine, the tax-count preview endpoint and the
+succession workflow.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import Member
+
+ZERO = Decimal('0.0')
+
+
+class FamilyNode:
+    __slots__ = (
+        'id', 'father_id', 'gender', 'marital_status',
+        'is_active', 'is_family_head', 'date_of_birth',
+    )
+
+    def __init__(self, id, father_id, gender, marital_status,
+                 is_active, is_family_head, date_of_birth):
+        self.id = id
+        self.father_id = father_id
+        self.gender = gender
+        self.marital_status = marital_status
+        self.is_active = is_active
+        self.is_family_head = is_family_head
+        self.date_of_birth = date_of_birth
+
+    @property
+    def is_active_head(self):
+        return self.is_family_head and self.is_active
+
+
+class FamilyIndex:
+    """
+    Snapshot of the member family tree.
+
+    Same rules as members.utils.get_member_and_descendants_tax /
+    calculate_member_tax_count, computed once per subtree.  A corrupt
+    father chain (a cycle) contributes nothing instead of recursing forever.
+    """
+
+    FIELDS = (
+        'id', 'father_id', 'gender', 'marital_status',
+        'is_active', 'is_family_head', 'date_of_birth',
+    )
+
+    def __init__(self, rows):
+        self.nodes = {}
+        self.children = defaultdict(list)
+        for row in rows:
+            node = FamilyNode(*row)
+            self.nodes[node.id] = node
+            if node.father_id:
+                self.children[node.father_id].append(node.id)
+        self._subtree_tax = {}
+
+    @classmethod
+    def load(cls, queryset=None):
+        """Build the index from *queryset* (default: all members) in one query."""
+        if queryset is None:
+            queryset = Member.objects.all()
+        return cls(queryset.values_list(*cls.FIELDS).iterator(chunk_size=2000))
+
+    # -- Tax counts ----------------------------------------------------------
+
+    def descendants_tax(self, member_id):
+        """Contribution of *member_id* and their non-head descendants."""
+        return self._descendants_tax(member_id, set())
+
+    def _descendants_tax(self, member_id, path):
+        cached = self._subtree_tax.get(member_id)
+        if cached is not None:
+            return cached
+        if member_id in path:
+            return ZERO
+        node = self.nodes[member_id]
+        if node.is_active_head:
+            self._subtree_tax[member_id] = ZERO
+            return ZERO
+
+        tax = ZERO
+        if node.is_active and node.gender == 'Male':
+            tax += Decimal('0.5') if node.marital_status == 'Unmarried' else Decimal('1.0')
+        path.add(member_id)
+        for child_id in self.children[member_id]:
+            tax += self._descendants_tax(child_id, path)
+        path.discard(member_id)
+        self._subtree_tax[member_id] = tax
+        return tax
+
+    def tax_count(self, member_id):
+        """Tax count multiplier of an active family head (0 for anyone else)."""
+        node = self.nodes.get(member_id)
+        if node is None or not node.is_active_head:
+            return ZERO
+
+        tax_count = Decimal('1.0')
+        path = {member_id}
+        # 1. Sibling dependencies
+        if node.father_id:
+            for sibling_id in self.children[node.father_id]:
+                if sibling_id != member_id:
+                    tax_count += self._descendants_tax(sibling_id, path)
+        # 2. Family head's own children/grandchildren
+        for child_id in self.children[member_id]:
+            tax_count += self._descendants_tax(child_id, path)
+        return tax_count
+
+    def head_ids(self):
+        return [pk for pk, node in self.nodes.items() if node.is_active_head]
+
+    def head_tax_counts(self, head_ids=None):
+        """Return {head_id: tax_count} for *head_ids* (default: every active head)."""
+        if head_ids is None:
+            head_ids = self.head_ids()
+        return {pk: self.tax_count(pk) for pk in head_ids}
+
+    # -- Succession ----------------------------------------------------------
+
+    def successor_of(self, member_id):
+        """
+        Id of the member who inherits headship from *member_id*: the eldest
+        active son, else the eldest active child, else None.  Children with
+        no date of birth rank after those with one.
+        """
+        children = [
+            self.nodes[pk] for pk in self.children[member_id]
+            if self.nodes[pk].is_active
+        ]
+        if not children:
+            return None
+        children.sort(key=lambda n: (n.date_of_birth is None, n.date_of_birth or 0, n.id))
+        sons = [n for n in children if n.gender == 'Male']
+        return (sons or children)[0].id
@@ -0,0 +1,165 @@
+"""
+Process-local typeahead index for the member picker (/api/members/lookup/).
+
+The transaction form looks up a donor on every keystroke.  Instead of a
+query per keystroke, each worker keeps a snapshot of the active family
+heads, built from one values_list() query:
+
+    tokens   sorted list of search tokens (members/search.py normalisation)
+    postings (row, weight) aligned with tokens
+    rows     (id, member_id, name, name_ta, phone, city) per member
+
+A query word is a bisect over ``tokens`` for its prefix range, so a
+lookup never touches the database.  The snapshot is rebuilt when the
+member version counter in the cache differs from the one it was built
+at; members/signals.py and the bulk importer bump the counter.  With the
+default per-process cache other workers only see a bump after
+MEMBER_LOOKUP_MAX_AGE seconds, when the snapshot is rebuilt regardless;
+configure a shared CACHES backend to refresh them immediately.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .search import MIN_PREFIX_LENGTH, member_tokens, query_terms
+
+VERSION_KEY = 'members:lookup:version'
+
+LOOKUP_WEIGHTS = {
+    'member_id': 4,
+    'name': 4,
+    'name_ta': 4,
+    'phone': 4,
+    'address_city': 1,
+    'address_city_ta': 1,
+}
+
+LookupRow = namedtuple('LookupRow', ['id', 'member_id', 'name', 'name_ta', 'phone', 'city'])
+_SourceRow = namedtuple('_SourceRow', ['id', *LOOKUP_WEIGHTS])
+
+
+def _max_age():
+    return getattr(settings, 'MEMBER_LOOKUP_MAX_AGE', 300)
+
+
+def current_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def bump_version():
+    """Mark every worker's snapshot stale."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+class _Snapshot:
+    __slots__ = ('version', 'built_at', 'tokens', 'postings', 'rows')
+
+    def __init__(self, version, source_rows):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.rows = []
+        entries = []
+        for source in source_rows:
+            index = len(self.rows)
+            self.rows.append(LookupRow(
+                source.id, source.member_id, source.name, source.name_ta, source.phone,
+                source.address_city or source.address_city_ta,
+            ))
+            entries.extend(
+                (token, index, weight)
+                for token, weight in member_tokens(source, LOOKUP_WEIGHTS).items()
+            )
+        entries.sort()
+        self.tokens = [token for token, _, _ in entries]
+        self.postings = [(index, weight) for _, index, weight in entries]
+
+    def _best_weights(self, forms):
+        best = {}
+        for form in forms:
+            lo = bisect_left(self.tokens, form)
+            if len(form) < MIN_PREFIX_LENGTH:
+                hi = bisect_right(self.tokens, form, lo)
+            else:
+                hi = bisect_left(self.tokens, form + '\U0010ffff', lo)
+            for i in range(lo, hi):
+                index, weight = self.postings[i]
+                if self.tokens[i] == form:
+                    weight += 1
+                if best.get(index, 0) < weight:
+                    best[index] = weight
+        return best
+
+    def lookup(self, q, limit):
+        scores = None
+        for forms in query_terms(q):
+            best = self._best_weights(forms)
+            if scores is None:
+                scores = best
+            else:
+                scores = {index: score + best[index] for index, score in scores.items() if index in best}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        top = heapq.nsmallest(
+            limit, scores.items(),
+            key=lambda item: (-item[1], self.rows[item[0]].name, self.rows[item[0]].id),
+        )
+        return [self.rows[index] for index, _ in top]
+
+
+class MemberLookupIndex:
+    """Holds the current snapshot; rebuilds it when it is stale."""
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        from .models import Member
+
+        return [
+            _SourceRow(*row) for row in
+            Member.objects.filter(is_active=True, is_family_head=True)
+            .order_by().values_list('id', *LOOKUP_WEIGHTS)
+        ]
+
+    def _fresh(self, snapshot, version):
+        return (snapshot is not None and snapshot.version == version
+                and time.monotonic() - snapshot.built_at < _max_age())
+
+    def snapshot(self):
+        version = current_version()
+        snapshot = self._snapshot
+        if self._fresh(snapshot, version):
+            return snapshot
+        # While one thread rebuilds, the others keep answering from the
+        # previous snapshot instead of queueing behind it.
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            if not self._fresh(snapshot, version):
+                snapshot = _Snapshot(version, self._load())
+                self._snapshot = snapshot
+        finally:
+            self._lock.release()
+        return snapshot
+
+    def lookup(self, q, limit=10):
+        return self.snapshot().lookup(q, limit)
+
+    def clear(self):
+        self._snapshot = None
+
+
+member_lookup = MemberLookupIndex()
@@ -0,0 +1,148 @@
+"""
+Django management command that copies every table of an existing SQLite
+database into the configured database (normally PostgreSQL).
+
+Usage:
+    DB_ENGINE=postgresql python manage.py migrate
+    DB_ENGINE=postgresql python manage.py copy_sqlite_database db.sqlite3
+    DB_ENGINE=postgresql python manage.py copy_sqlite_database db.sqlite3 --batch-size 5000 --noinput
+
+Both databases must be migrated to the same state.  The target's tables
+are emptied first, then filled with the source rows as they are (primary
+keys, timestamps, hashed passwords and tokens included) using batched
+INSERTs that bypass model save() and signals, so no member ids, receipts,
+credentials or rollups are regenerated.  Everything runs in one target
+transaction: a failure leaves the target as it was.  Finally the id
+sequences are moved past the copied rows.
+"""
+
+import os
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+SOURCE_ALIAS = 'sqlite_source'
+
+
+class Command(BaseCommand):
+    help = 'Copy all data from a SQLite database file into the configured database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sqlite_file', type=str, help='Path to the source db.sqlite3')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Target database alias (default "default")',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Rows per INSERT batch (default 2000)',
+        )
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Do not ask before emptying the target database',
+        )
+
+    def handle(self, *args, **options):
+        path = options['sqlite_file']
+        target = options['database']
+        batch_size = options['batch_size']
+        if not os.path.isfile(path):
+            raise CommandError(f'File not found: {path}')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+        })[DEFAULT_DB_ALIAS]
+        try:
+            self._copy(connections[SOURCE_ALIAS], connections[target], batch_size, options['interactive'])
+        finally:
+            connections[SOURCE_ALIAS].close()
+            del connections[SOURCE_ALIAS]
+            del connections.settings[SOURCE_ALIAS]
+            ContentType.objects.clear_cache()
+
+    def _copy(self, source, target, batch_size, interactive):
+        if source.settings_dict['NAME'] == target.settings_dict['NAME']:
+            raise CommandError('Source and target are the same database.')
+
+        applied_source = set(MigrationRecorder(source).applied_migrations())
+        applied_target = set(MigrationRecorder(target).applied_migrations())
+        if applied_source != applied_target:
+            raise CommandError(
+                f'Migration state differs ({len(applied_source - applied_target)} applied only '
+                f'in the source, {len(applied_target - applied_source)} only in the target). '
+                f'Run migrate on both databases first.'
+            )
+
+        if interactive:
+            answer = input(
+                f"All data in the '{target.alias}' database "
+                f"({target.settings_dict['NAME']}) will be replaced. Type 'yes' to continue: "
+            )
+            if answer != 'yes':
+                raise CommandError('Copy cancelled.')
+
+        models = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+            and router.allow_migrate_model(target.alias, model)
+        ]
+        tables = [model._meta.db_table for model in models]
+
+        # Foreign keys are deferred to commit on both backends, so tables
+        # can be filled in any order inside the one transaction.
+        with transaction.atomic(using=target.alias):
+            target.ops.execute_sql_flush(
+                target.ops.sql_flush(no_style(), tables, allow_cascade=True)
+            )
+            total = 0
+            for model in models:
+                copied = self._copy_table(model, source, target, batch_size)
+                total += copied
+                if copied:
+                    self.stdout.write(f'{model._meta.label}: {copied}')
+            with target.cursor() as cursor:
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied {total} rows from {len(models)} tables into {target.alias}.'
+        ))
+
+    @staticmethod
+    def _copy_table(model, source, target, batch_size):
+        fields = model._meta.concrete_fields
+        qn = target.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            qn(model._meta.db_table),
+            ', '.join(qn(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        rows = (
+            model._base_manager.using(source.alias)
+            .order_by('pk')
+            .values_list(*[field.attname for field in fields])
+            .iterator(chunk_size=batch_size)
+        )
+
+        copied = 0
+        batch = []
+        with target.cursor() as cursor:
+            for row in rows:
+                batch.append([
+                    field.get_db_prep_save(value, connection=target)
+                    for field, value in zip(fields, row)
+                ])
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    copied += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                copied += len(batch)
+        return copied
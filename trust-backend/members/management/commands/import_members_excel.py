@@ -3,14 +3,14 @@ Django management command to bulk-import members from a Tamil Excel file.
 
 Usage:
     python manage.py import_members_excel <path_to_excel>
+    python manage.py import_members_excel <path_to_excel> --dry-run
 
 The Excel file format is documented in members/utils.py.
 """
 
 from django.core.management.base import BaseCommand, CommandError
-import openpyxl
 
-from members.utils import process_excel_workbook
+from members.utils import open_import_workbook, process_excel_workbook
 
 
 class Command(BaseCommand):
@@ -22,12 +22,16 @@ class Command(BaseCommand):
             type=str,
             help='Path to the .xlsx file to import',
         )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate the file and report problems without importing',
+        )
 
     def handle(self, *args, **options):
         filepath = options['excel_file']
 
         try:
-            wb = openpyxl.load_workbook(filepath, data_only=True)
+            wb = open_import_workbook(filepath)
         except FileNotFoundError:
             raise CommandError(f'File not found: {filepath}')
         except Exception as exc:
@@ -35,14 +39,25 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Processing {filepath} ...\n')
 
-        results = process_excel_workbook(wb)
+        try:
+            results = process_excel_workbook(wb, dry_run=options['dry_run'])
+        finally:
+            wb.close()
 
         # Print summary
-        self.stdout.write(self.style.SUCCESS(
-            f"\nImport complete: "
-            f"{results['created']} created, "
-            f"{results['skipped']} skipped"
-        ))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nDry run: "
+                f"{results['would_create']} would be created, "
+                f"{results['skipped']} would be skipped, "
+                f"{len(results['warnings'])} warning(s)"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nImport complete: "
+                f"{results['created']} created, "
+                f"{results['skipped']} skipped"
+            ))
 
         if results['errors']:
             self.stdout.write(self.style.WARNING('\nDetails:'))
@@ -50,3 +65,7 @@ class Command(BaseCommand):
                 self.stdout.write(
                     f"  Row {err['row']}: {err['name']} — {err['reason']}"
                 )
+        for warning in results.get('warnings', []):
+            self.stdout.write(
+                f"  Row {warning['row']}: {warning['name']} — warning: {warning['reason']}"
+            )
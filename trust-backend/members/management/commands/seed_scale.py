@@ -0,0 +1,586 @@
+"""
+Django management command that fills an empty database with a large,
+realistic synthetic trust for load and performance testing.
+
+Usage (against a scratch database, never production):
+    DB_SQLITE_PATH=/tmp/scale.sqlite3 python manage.py migrate
+    DB_SQLITE_PATH=/tmp/scale.sqlite3 python manage.py seed_scale --members 10000
+    DB_SQLITE_PATH=/tmp/scale.sqlite3 python manage.py seed_scale --members 100000 \\
+        --transactions 2000000 --years 6 --seed 7 --until 2026-07-31
+
+What is generated:
+- Families of --generations generations: founders, their sons' and
+  daughters' families, with --children children per married man on
+  average and the --male-ratio / --married-ratio mix.  Old members are
+  marked expired; each family's head follows the succession rule (eldest
+  active son), and some married brothers head their own families.
+  Family heads get a login (username = member id, password --password).
+- Account heads (general, expense and one Kodai pair per tax year),
+  trust accounts (cash, bank, commodities) and two accountants.
+- One generated TaxMaster per tax year with MemberTax rows and DEBIT
+  bills from the family tree's tax counts, and instalment payments.
+- Donations and expenses up to --transactions AccountTransaction rows in
+  total, each with a Receipt numbered per fiscal year in date order.
+  Receipts are READY without a stored PDF (rendered on download).
+
+Everything is written with bulk_create, so no model save() side effects
+or signals run; member rollups, MemberLedgerBalance rows, ReceiptSequence
+counters, the search index and the lookup version are brought up to date
+at the end.  The same --seed and --until produce the same data.
+"""
+
+import datetime
+import random
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounting.ledger import compute_all_balances, store_balances, tax_year_start
+from accounting.models import (
+    AccountHead, AccountTransaction, Receipt, ReceiptSequence, StaffProfile, TrustAccount,
+)
+from members.family_graph import FamilyIndex
+from members.lookup import bump_version
+from members.models import Member, MemberTax, TaxMaster
+from members.search import rebuild_search_index
+
+MALE_NAMES = [
+    ('Murugan', 'முருகன்'), ('Selvam', 'செல்வம்'), ('Karthikeyan', 'கார்த்திகேயன்'),
+    ('Ganesan', 'கணேசன்'), ('Senthil', 'செந்தில்'), ('Kumar', 'குமார்'), ('Ravi', 'ரவி'),
+    ('Saravanan', 'சரவணன்'), ('Arun', 'அருண்'), ('Bala', 'பாலா'), ('Vijay', 'விஜய்'),
+    ('Subramani', 'சுப்பிரமணி'), ('Palani', 'பழனி'), ('Raja', 'ராஜா'), ('Suresh', 'சுரேஷ்'),
+    ('Ramesh', 'ரமேஷ்'), ('Mani', 'மணி'), ('Muthu', 'முத்து'), ('Pandi', 'பாண்டி'),
+    ('Velu', 'வேலு'), ('Kannan', 'கண்ணன்'), ('Siva', 'சிவா'), ('Sundar', 'சுந்தர்'),
+    ('Prakash', 'பிரகாஷ்'), ('Dinesh', 'தினேஷ்'), ('Ganapathy', 'கணபதி'),
+    ('Ayyanar', 'அய்யனார்'), ('Karuppasamy', 'கருப்பசாமி'), ('Perumal', 'பெருமாள்'),
+    ('Manikandan', 'மணிகண்டன்'),
+]
+FEMALE_NAMES = [
+    ('Lakshmi', 'லட்சுமி'), ('Meena', 'மீனா'), ('Priya', 'பிரியா'), ('Devi', 'தேவி'),
+    ('Valli', 'வள்ளி'), ('Kavitha', 'கவிதா'), ('Selvi', 'செல்வி'), ('Malathi', 'மாலதி'),
+    ('Revathi', 'ரேவதி'), ('Anitha', 'அனிதா'), ('Sumathi', 'சுமதி'), ('Pushpa', 'புஷ்பா'),
+    ('Kamala', 'கமலா'), ('Saraswathi', 'சரஸ்வதி'), ('Jothi', 'ஜோதி'),
+    ('Muthulakshmi', 'முத்துலட்சுமி'), ('Parvathi', 'பார்வதி'), ('Indira', 'இந்திரா'),
+    ('Geetha', 'கீதா'), ('Radha', 'ராதா'),
+]
+CITIES = [
+    ('Madurai', 'மதுரை'), ('Tirunelveli', 'திருநெல்வேலி'), ('Thoothukudi', 'தூத்துக்குடி'),
+    ('Virudhunagar', 'விருதுநகர்'), ('Sivakasi', 'சிவகாசி'), ('Chennai', 'சென்னை'),
+    ('Coimbatore', 'கோயம்புத்தூர்'), ('Tiruchendur', 'திருச்செந்தூர்'),
+    ('Kovilpatti', 'கோவில்பட்டி'), ('Sankarankovil', 'சங்கரன்கோவில்'),
+]
+STREETS = ['North Car Street', 'South Car Street', 'East Street', 'Temple Street', 'Main Bazaar', 'Middle Street']
+VENDORS = [
+    'Sri Murugan Electricals', 'TNEB', 'Annai Flower Stall', 'Raja Sound Service',
+    'Lakshmi Catering', 'Balaji Traders', 'Temple Priest', 'Siva Decorations',
+]
+GENERAL_HEADS = [
+    ('General Fund', 'பொது நிதி'), ('Annadhanam', 'அன்னதானம்'),
+    ('Temple Renovation', 'கோவில் திருப்பணி'), ('Hundi Collection', 'உண்டியல் வசூல்'),
+]
+EXPENSE_HEADS = [
+    ('Electricity', 'மின்சாரம்'), ('Priest Honorarium', 'அர்ச்சகர் சம்பளம்'),
+    ('Maintenance', 'பராமரிப்பு'),
+]
+DONATION_AMOUNTS = [101, 201, 251, 501, 1001, 2001, 5001, 10001, 25001]
+EXPENSE_AMOUNTS = [250, 500, 1200, 2500, 4000, 7500, 15000, 40000]
+
+SEPARATE_HEAD_RATIO = 0.5   # married brothers of a successor who head their own family
+DELETED_RATIO = 0.01        # soft-deleted donations / expenses
+DONOR_MEMBER_RATIO = 0.55   # donations linked to a member
+
+
+class Person:
+    __slots__ = (
+        'index', 'father', 'gender', 'married', 'dob', 'expired', 'head',
+        'name', 'name_ta', 'spouse', 'spouse_ta', 'city', 'address', 'phone', 'children',
+    )
+
+    def __init__(self, index, father, gender, dob):
+        self.index = index
+        self.father = father
+        self.gender = gender
+        self.dob = dob
+        self.married = False
+        self.expired = False
+        self.head = False
+        self.spouse = self.spouse_ta = ''
+        self.phone = None
+        self.children = []
+
+    @property
+    def active(self):
+        return not self.expired
+
+    @property
+    def is_head(self):
+        return self.head and not self.expired
+
+
+def _years_before(date, years, rng):
+    return date - datetime.timedelta(days=int(years * 365.25) + rng.randrange(365))
+
+
+def _age(dob, until):
+    return (until - dob).days / 365.25
+
+
+def _poisson(rng, mean):
+    # Knuth; the means involved are small.
+    limit, k, p = pow(2.718281828459045, -mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _date_between(rng, start, end):
+    return start + datetime.timedelta(days=rng.randrange((end - start).days + 1))
+
+
+class Command(BaseCommand):
+    help = 'Fill an empty database with synthetic families, taxes and transactions for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=10000, help='Members to create (default 10000)')
+        parser.add_argument('--generations', type=int, default=3, help='Generations per family (default 3)')
+        parser.add_argument(
+            '--children', type=float, default=2.4,
+            help='Average children per married man (default 2.4)',
+        )
+        parser.add_argument('--male-ratio', type=float, default=0.5, help='Share of boys (default 0.5)')
+        parser.add_argument(
+            '--married-ratio', type=float, default=0.7,
+            help='Share of adults (21+) who are married (default 0.7)',
+        )
+        parser.add_argument('--years', type=int, default=5, help='Tax years of history (default 5)')
+        parser.add_argument(
+            '--transactions', type=int, default=None,
+            help='Total AccountTransaction rows (default 20 per member)',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default 1)')
+        parser.add_argument(
+            '--until', type=datetime.date.fromisoformat, default=None,
+            help='Last transaction date, YYYY-MM-DD (default today)',
+        )
+        parser.add_argument('--password', default='member123', help='Password of every seeded login')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['members'] < 1 or options['generations'] < 1 or options['years'] < 1:
+            raise CommandError('--members, --generations and --years must be at least 1.')
+        if not 0 <= options['male_ratio'] <= 1 or not 0 <= options['married_ratio'] <= 1:
+            raise CommandError('--male-ratio and --married-ratio must be between 0 and 1.')
+        if Member.objects.exists() or AccountTransaction.objects.exists() or AccountHead.objects.exists():
+            raise CommandError(
+                'The database already has members, account heads or transactions; '
+                'seed_scale only fills an empty one (python manage.py flush).'
+            )
+
+        self.rng = random.Random(options['seed'])
+        self.until = options['until'] or datetime.date.today()
+        self.batch_size = options['batch_size']
+        target_txns = options['transactions']
+        if target_txns is None:
+            target_txns = options['members'] * 20
+        started = time.perf_counter()
+
+        people = self._plan_families(
+            options['members'], options['generations'], options['children'],
+            options['male_ratio'], options['married_ratio'],
+        )
+        with transaction.atomic():
+            self._create_staff()
+            member_pks = self._insert_members(people, make_password(options['password']))
+            self._create_heads_and_accounts(options['years'])
+            tax_rows = self._create_tax_events(people, member_pks, options['years'])
+        self._insert_transactions(people, member_pks, tax_rows, target_txns)
+        self._finish(member_pks)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(people)} members, {AccountTransaction.objects.count()} transactions '
+            f'in {time.perf_counter() - started:.0f}s.'
+        ))
+
+    # ------------------------------------------------------------------
+    # Families
+    # ------------------------------------------------------------------
+
+    def _plan_families(self, target, generations, children, male_ratio, married_ratio):
+        """People in insertion order (every father before his children)."""
+        rng, until = self.rng, self.until
+        people = []
+
+        def add(father, gender, dob):
+            person = Person(len(people), father, gender, dob)
+            age = _age(dob, until)
+            person.expired = rng.random() < min(max((age - 60) / 40, 0), 0.95)
+            person.married = age >= 21 and rng.random() < married_ratio * min((age - 18) / 12, 1)
+            person.name, person.name_ta = rng.choice(MALE_NAMES if gender == 'Male' else FEMALE_NAMES)
+            if father is not None:
+                person.name = f'{person.name} {father.name[0]}'
+                person.name_ta = f'{father.name_ta[0]}. {person.name_ta}'
+                person.city, person.address = father.city, father.address
+                father.children.append(person)
+            else:
+                person.city = rng.choice(CITIES)
+                person.address = f'{rng.randint(1, 250)}, {rng.choice(STREETS)}, {person.city[0]}'
+            if gender == 'Male' and person.married:
+                person.spouse, person.spouse_ta = rng.choice(FEMALE_NAMES)
+            people.append(person)
+            return person
+
+        while len(people) < target:
+            founder = add(None, 'Male', _years_before(until, 28 * (generations - 1) + rng.randint(35, 55), rng))
+            founder.married = True
+            founder.spouse, founder.spouse_ta = rng.choice(FEMALE_NAMES)
+            generation = [founder]
+            for _ in range(generations - 1):
+                next_generation = []
+                for parent in generation:
+                    if parent.gender != 'Male' or not parent.married:
+                        continue
+                    for _ in range(_poisson(rng, children)):
+                        dob = parent.dob + datetime.timedelta(days=rng.randint(22 * 365, 40 * 365))
+                        if dob <= until and len(people) < target:
+                            gender = 'Male' if rng.random() < male_ratio else 'Female'
+                            next_generation.append(add(parent, gender, dob))
+                generation = next_generation
+            self._assign_head(founder)
+
+        phones = rng.sample(range(6 * 10 ** 9, 10 ** 10), len(people))
+        for person, phone in zip(people, phones):
+            if person.is_head or (person.active and _age(person.dob, until) >= 18 and rng.random() < 0.5):
+                person.phone = str(phone)
+        return people
+
+    def _assign_head(self, founder):
+        """
+        The founder while alive, else the successor the app would promote
+        (eldest active son, else eldest active child); some married
+        brothers of a successor head their own families.
+        """
+        node = founder
+        while node.expired:
+            children = sorted((c for c in node.children if c.active), key=lambda c: c.dob)
+            sons = [c for c in children if c.gender == 'Male']
+            if not children:
+                return
+            for brother in sons[1:]:
+                if brother.married and self.rng.random() < SEPARATE_HEAD_RATIO:
+                    brother.head = True
+            node = (sons or children)[0]
+        node.head = True
+
+    def _insert_members(self, people, password_hash):
+        """Insert generation by generation; returns {person index: Member pk}."""
+        depth = {}
+        for person in people:
+            depth[person.index] = 0 if person.father is None else depth[person.father.index] + 1
+        ordered = sorted(people, key=lambda person: depth[person.index])
+        # member_id follows insertion (pk) order, so Member.save() continues
+        # the sequence from the last row.
+        member_ids = {person.index: f'KT-{number:04d}' for number, person in enumerate(ordered, 1)}
+
+        heads = [person for person in ordered if person.is_head]
+        users = User.objects.bulk_create(
+            [User(username=member_ids[person.index], password=password_hash) for person in heads],
+            batch_size=self.batch_size,
+        )
+        user_ids = {person.index: user.pk for person, user in zip(heads, users)}
+
+        pks = {}
+        for level in range(max(depth.values()) + 1):
+            batch = []
+            for person in ordered:
+                if depth[person.index] != level:
+                    continue
+                father = person.father
+                batch.append(Member(
+                    user_id=user_ids.get(person.index),
+                    member_id=member_ids[person.index],
+                    name=person.name,
+                    name_ta=person.name_ta,
+                    phone=person.phone,
+                    date_of_birth=person.dob,
+                    address=person.address,
+                    address_city=person.city[0],
+                    address_city_ta=person.city[1],
+                    father_id=pks[father.index] if father else None,
+                    father_name=father.name if father else '',
+                    father_name_ta=father.name_ta if father else '',
+                    mother_name=father.spouse if father else '',
+                    mother_name_ta=father.spouse_ta if father else '',
+                    spouse_name=person.spouse,
+                    spouse_name_ta=person.spouse_ta,
+                    gender=person.gender,
+                    marital_status='Married' if person.married else 'Unmarried',
+                    annual_tax=Decimal('0.00'),
+                    amount_paid=Decimal('0.00'),
+                    amount_due=Decimal('0.00'),
+                    is_family_head=person.is_head,
+                    is_active=person.active,
+                    is_expired=person.expired,
+                    password_reset_required=person.is_head,
+                ))
+            members = Member.objects.bulk_create(batch, batch_size=self.batch_size)
+            level_people = [person for person in ordered if depth[person.index] == level]
+            pks.update((person.index, member.pk) for person, member in zip(level_people, members))
+        if any(pk is None for pk in pks.values()):
+            raise CommandError('This database backend does not return ids from bulk inserts.')
+        self.stdout.write(f'{len(people)} members ({len(heads)} family heads)')
+        return pks
+
+    # ------------------------------------------------------------------
+    # Staff, account heads, trust accounts, tax events
+    # ------------------------------------------------------------------
+
+    def _create_staff(self):
+        self.admin, _ = User.objects.get_or_create(
+            username='seed_admin', defaults={'is_staff': True},
+        )
+        self.accountants = []
+        for number in (1, 2):
+            user, _ = User.objects.get_or_create(username=f'seed_accountant{number}')
+            StaffProfile.objects.get_or_create(
+                user=user, defaults={'name': f'Accountant {number}', 'phone': f'50000000{number:02d}'},
+            )
+            self.accountants.append(user)
+
+    def _create_heads_and_accounts(self, years):
+        def heads(rows, **fields):
+            return AccountHead.objects.bulk_create([
+                AccountHead(name=name, name_ta=name_ta, created_by=self.admin, **fields)
+                for name, name_ta in rows
+            ])
+
+        last = tax_year_start(self.until)
+        self.tax_years = [datetime.date(year, 8, 1) for year in range(last.year - years + 1, last.year + 1)]
+        self.general_heads = heads(GENERAL_HEADS, head_type='General', account_type='Revenue')
+        self.expense_heads = heads(EXPENSE_HEADS, head_type='General', account_type='Expense')
+        self.kodai_heads = dict(zip(self.tax_years, heads(
+            [(f'Kovil Kodai {start.year}', f'கோவில் கொடை {start.year}') for start in self.tax_years],
+            head_type='Kodai', account_type='Revenue',
+        )))
+        self.kodai_expense_heads = dict(zip(self.tax_years, heads(
+            [(f'Kodai Expenses {start.year}', f'கொடை செலவுகள் {start.year}') for start in self.tax_years],
+            head_type='Kodai', account_type='Expense',
+        )))
+
+        def account(name, account_type, **fields):
+            return TrustAccount(
+                account_id=uuid.UUID(int=self.rng.getrandbits(128), version=4),
+                account_name=name, account_type=account_type,
+                associated_entity_type='Trust_Direct', created_by=self.admin, **fields,
+            )
+
+        self.cash_account, *self.bank_accounts, self.commodity_account = TrustAccount.objects.bulk_create([
+            account('Trust Cash', 'Cash'),
+            account('SBI Current', 'Bank', account_number='30000000001', bank_name='SBI', branch_name='Madurai'),
+            account('IOB Savings', 'Bank', account_number='10000000002', bank_name='IOB', branch_name='Tirunelveli'),
+            account('Gold and Silver', 'Commodities'),
+        ])
+
+    def _payment_account(self, mode):
+        if mode == 'Cash':
+            return self.cash_account
+        return self.rng.choice(self.bank_accounts)
+
+    def _create_tax_events(self, people, member_pks, years):
+        """
+        One generated TaxMaster per tax year with its MemberTax rows.
+        Returns the bill and payment transactions to insert, as
+        (date, fields) pairs.
+        """
+        rng = self.rng
+        heads = [person for person in people if person.is_head]
+        counts = FamilyIndex.load().head_tax_counts([member_pks[person.index] for person in heads])
+        Member.objects.bulk_update(
+            [Member(pk=pk, tax_count=float(count)) for pk, count in counts.items()],
+            ['tax_count'], batch_size=self.batch_size,
+        )
+
+        rows = []
+        member_taxes = []
+        base = Decimal(rng.choice([1000, 1500, 2000]))
+        for start in self.tax_years:
+            bill_date = min(start + datetime.timedelta(days=rng.randrange(15)), self.until)
+            end = min(start + datetime.timedelta(days=364), self.until)
+            tax = TaxMaster.objects.create(
+                name=f'Kodai Vari {start.year}-{(start.year + 1) % 100:02d}',
+                base_amount=base, account_head=self.kodai_heads[start],
+                status='Generated', generated_date=bill_date,
+            )
+            for person in heads:
+                member_id = member_pks[person.index]
+                total = (counts[member_id] * base).quantize(Decimal('0.00'))
+                donor = {
+                    'member_id': member_id, 'donor_name': person.name,
+                    'donor_name_ta': person.name_ta, 'donor_contact': person.phone or '',
+                    'tax_event': tax,
+                }
+                rows.append((bill_date, dict(
+                    donor, account_head=self.kodai_heads[start], transaction_type='DEBIT',
+                    amount=total, payment_mode='Credit', purpose=f'Tax Kodai: {tax.name}',
+                    entered_by=self.admin,
+                )))
+                roll = rng.random()
+                paid_total = total if roll < 0.75 else (
+                    (total * Decimal(rng.randint(3, 8)) / 10).quantize(Decimal('1')) if roll < 0.9 else Decimal('0')
+                )
+                instalments = rng.randint(1, 3) if paid_total else 0
+                remaining = paid_total
+                for number in range(instalments):
+                    amount = remaining if number == instalments - 1 else (paid_total / instalments).quantize(Decimal('1'))
+                    remaining -= amount
+                    mode = rng.choices(['Cash', 'UPI', 'Bank Transfer', 'Cheque'], [50, 30, 15, 5])[0]
+                    rows.append((_date_between(rng, bill_date, end), dict(
+                        donor, account_head=self.kodai_heads[start], transaction_type='CREDIT',
+                        amount=amount, payment_mode=mode, trust_account=self._payment_account(mode),
+                        purpose=f'Tax payment: {tax.name}', entered_by=rng.choice(self.accountants),
+                    )))
+                member_taxes.append(MemberTax(
+                    member_id=member_id, tax=tax, tax_count=counts[member_id], total_tax=total,
+                    amount_paid=paid_total, amount_due=total - paid_total,
+                ))
+        MemberTax.objects.bulk_create(member_taxes, batch_size=self.batch_size)
+        self.stdout.write(f'{len(self.tax_years)} tax events, {len(member_taxes)} member taxes')
+        return rows
+
+    # ------------------------------------------------------------------
+    # Transactions and receipts
+    # ------------------------------------------------------------------
+
+    def _donation(self, date, donors):
+        rng = self.rng
+        start = tax_year_start(date)
+        head = self.kodai_heads[start] if rng.random() < 0.35 else rng.choice(self.general_heads)
+        fields = {'account_head': head, 'transaction_type': 'CREDIT'}
+        if rng.random() < DONOR_MEMBER_RATIO:
+            person, member_id = rng.choice(donors)
+            fields.update(
+                member_id=member_id, donor_name=person.name, donor_name_ta=person.name_ta,
+                donor_contact=person.phone or '',
+            )
+        else:
+            name, name_ta = rng.choice(MALE_NAMES + FEMALE_NAMES)
+            fields.update(donor_name=name, donor_name_ta=name_ta)
+        if rng.random() < 0.02:
+            fields.update(
+                payment_mode='Commodities', commodity_type=rng.choice(['Gold', 'Silver', 'Other']),
+                trust_account=self.commodity_account, amount=Decimal(rng.choice(DONATION_AMOUNTS[4:])),
+            )
+        else:
+            mode = rng.choices(['Cash', 'UPI', 'Bank Transfer', 'Cheque'], [55, 30, 10, 5])[0]
+            fields.update(
+                payment_mode=mode, trust_account=self._payment_account(mode),
+                amount=Decimal(rng.choice(DONATION_AMOUNTS)),
+            )
+        fields['purpose'] = f'Donation - {head.name}'
+        return fields
+
+    def _expense(self, date):
+        rng = self.rng
+        start = tax_year_start(date)
+        head = self.kodai_expense_heads[start] if rng.random() < 0.3 else rng.choice(self.expense_heads)
+        mode = rng.choices(['Cash', 'Bank Transfer', 'Cheque'], [40, 40, 20])[0]
+        return {
+            'account_head': head, 'transaction_type': 'DEBIT', 'payment_mode': mode,
+            'trust_account': self._payment_account(mode),
+            'amount': Decimal(rng.choice(EXPENSE_AMOUNTS)),
+            'paid_to': rng.choice(VENDORS),
+            'purpose_description': head.name,
+            'bill_reference': f'BILL-{rng.randint(1000, 99999)}' if rng.random() < 0.6 else '',
+        }
+
+    def _insert_transactions(self, people, member_pks, tax_rows, target):
+        rng = self.rng
+        donors = [
+            (person, member_pks[person.index]) for person in people
+            if person.active and (person.is_head or _age(person.dob, self.until) >= 18)
+        ]
+        by_month = defaultdict(list)
+        for date, fields in tax_rows:
+            by_month[(date.year, date.month)].append((date, fields))
+
+        first_day, last_day = self.tax_years[0], self.until
+        total_days = (last_day - first_day).days + 1
+        filler = max(target - len(tax_rows), 0)
+        sequences = {}
+        done = emitted = 0
+        month = first_day
+        while month <= last_day:
+            next_month = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            month_end = min(next_month - datetime.timedelta(days=1), last_day)
+            quota = round(filler * ((month_end - first_day).days + 1) / total_days) - emitted
+            emitted += quota
+
+            rows = by_month.pop((month.year, month.month), [])
+            for _ in range(quota):
+                date = _date_between(rng, month, month_end)
+                fields = self._donation(date, donors) if rng.random() < 0.65 else self._expense(date)
+                if rng.random() < DELETED_RATIO:
+                    fields['is_deleted'] = True
+                    fields['change_log'] = [{
+                        'field': 'is_deleted', 'old': 'False', 'new': 'True',
+                        'at': datetime.datetime.combine(date, datetime.time(18)).isoformat(),
+                        'by': rng.choice(self.accountants).username,
+                    }]
+                fields.setdefault('entered_by', rng.choice(self.accountants))
+                rows.append((date, fields))
+            rows.sort(key=lambda row: row[0])
+
+            with transaction.atomic():
+                for i in range(0, len(rows), self.batch_size):
+                    chunk = rows[i:i + self.batch_size]
+                    txns = AccountTransaction.objects.bulk_create([
+                        AccountTransaction(transaction_date=date, **fields) for date, fields in chunk
+                    ])
+                    receipts = []
+                    for tx in txns:
+                        fiscal_year = Receipt._fiscal_year_string(tx.transaction_date)
+                        sequences[fiscal_year] = sequences.get(fiscal_year, 0) + 1
+                        receipts.append(Receipt(
+                            receipt_number=f'TRUST/{fiscal_year}/{sequences[fiscal_year]:05d}',
+                            transaction_id=tx.pk, render_status='READY',
+                        ))
+                    Receipt.objects.bulk_create(receipts)
+            done += len(rows)
+            if rows:
+                self.stdout.write(f'  {month:%Y-%m}: {done} transactions')
+            month = next_month
+
+        for fiscal_year, last_value in sequences.items():
+            ReceiptSequence.objects.update_or_create(
+                fiscal_year=fiscal_year, defaults={'last_value': last_value},
+            )
+
+    # ------------------------------------------------------------------
+
+    def _finish(self, member_pks):
+        """Rebuild what the bypassed save() hooks and signals would maintain."""
+        current = tax_year_start(self.until)
+        pks = sorted(member_pks.values())
+        with transaction.atomic():
+            for i in range(0, len(pks), 500):
+                balances = compute_all_balances(pks[i:i + 500])
+                store_balances(balances)
+                Member.objects.bulk_update(
+                    [
+                        Member(pk=member_id, annual_tax=debits, amount_paid=credits, amount_due=debits - credits)
+                        for (member_id, start), (debits, credits) in balances.items()
+                        if start == current
+                    ],
+                    ['annual_tax', 'amount_paid', 'amount_due'],
+                )
+        self.stdout.write('Member rollups and ledger balances rebuilt')
+        rebuild_search_index()
+        bump_version()
+        self.stdout.write('Search index rebuilt')
@@ -0,0 +1,156 @@
+# Generated by Django 5.0.1 on 2026-10-18 14:22
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the members.search tokenizer as of this migration, so later
+# changes to the live module do not change what the backfill writes.
+# Members are re-tokenised with the current rules by post_save and by
+# members.search.rebuild_search_index().
+
+FIELD_WEIGHTS = {
+    'name': 4,
+    'name_ta': 4,
+    'phone': 4,
+    'father_name': 2,
+    'father_name_ta': 2,
+    'address_city': 1,
+    'address_city_ta': 1,
+}
+MAX_TOKEN_LENGTH = 64
+
+_WORD_RE = re.compile(r'[0-9a-z\u0B80-\u0BFF]+')
+_TAMIL_RE = re.compile(r'[\u0B80-\u0BFF]')
+_JOINERS = dict.fromkeys(map(ord, '\u200b\u200c\u200d\ufeff'))
+
+_TA_VOWELS = {
+    'அ': 'a', 'ஆ': 'a', 'இ': 'i', 'ஈ': 'i', 'உ': 'u', 'ஊ': 'u',
+    'எ': 'e', 'ஏ': 'e', 'ஐ': 'ai', 'ஒ': 'o', 'ஓ': 'o', 'ஔ': 'au',
+}
+_TA_VOWEL_SIGNS = {
+    'ா': 'a', 'ி': 'i', 'ீ': 'i', 'ு': 'u', 'ூ': 'u', 'ெ': 'e',
+    'ே': 'e', 'ை': 'ai', 'ொ': 'o', 'ோ': 'o', 'ௌ': 'au',
+}
+_TA_CONSONANTS = {
+    'க': 'k', 'ங': 'ng', 'ச': 'c', 'ஞ': 'nj', 'ட': 't', 'ண': 'n',
+    'த': 't', 'ந': 'n', 'ப': 'p', 'ம': 'm', 'ய': 'y', 'ர': 'r',
+    'ல': 'l', 'வ': 'v', 'ழ': 'zh', 'ள': 'l', 'ற': 'r', 'ன': 'n',
+    'ஜ': 'j', 'ஷ': 'sh', 'ஸ': 's', 'ஹ': 'h',
+}
+_TA_VIRAMA = '்'
+
+_LATIN_DIGRAPHS = [
+    ('zh', 'l'), ('sh', 's'), ('ch', 's'), ('th', 't'), ('dh', 't'),
+    ('ph', 'p'), ('bh', 'p'), ('kh', 'k'), ('gh', 'k'),
+    ('ee', 'i'), ('oo', 'u'),
+]
+_LATIN_LETTERS = str.maketrans({
+    'g': 'k', 'd': 't', 'b': 'p', 'j': 's', 'c': 's', 'z': 's',
+    'w': 'v', 'q': 'k', 'f': 'p', 'x': 'ks', 'h': None,
+})
+_REPEATS_RE = re.compile(r'(.)\1+')
+
+
+def _transliterate_tamil(word):
+    out = []
+    for i, ch in enumerate(word):
+        if ch in _TA_CONSONANTS:
+            out.append(_TA_CONSONANTS[ch])
+            nxt = word[i + 1] if i + 1 < len(word) else ''
+            if nxt != _TA_VIRAMA and nxt not in _TA_VOWEL_SIGNS:
+                out.append('a')
+        elif ch in _TA_VOWEL_SIGNS:
+            out.append(_TA_VOWEL_SIGNS[ch])
+        elif ch in _TA_VOWELS:
+            out.append(_TA_VOWELS[ch])
+        elif ch.isascii():
+            out.append(ch)
+    return ''.join(out)
+
+
+def _fold_latin(word):
+    for digraph, letter in _LATIN_DIGRAPHS:
+        word = word.replace(digraph, letter)
+    return _REPEATS_RE.sub(r'\1', word.translate(_LATIN_LETTERS))
+
+
+def _normalize_text(text):
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize('NFKD', text.translate(_JOINERS).lower())
+    text = ''.join(
+        ch for ch in text
+        if not (unicodedata.category(ch) == 'Mn' and not _TAMIL_RE.match(ch))
+    )
+    return unicodedata.normalize('NFC', text)
+
+
+def _word_forms(word):
+    if word.isdigit():
+        if len(word) == 12 and word.startswith('91'):
+            return {word[2:]}
+        if len(word) == 11 and word.startswith('0'):
+            return {word[1:]}
+        return {word}
+    if _TAMIL_RE.search(word):
+        forms = {word, _fold_latin(_transliterate_tamil(word))}
+    else:
+        forms = {_fold_latin(word)}
+    return {form[:MAX_TOKEN_LENGTH] for form in forms if form}
+
+
+def member_tokens(member):
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = getattr(member, field, None)
+        if not value:
+            continue
+        for word in _WORD_RE.findall(_normalize_text(value)):
+            for form in _word_forms(word):
+                if tokens.get(form, 0) < weight:
+                    tokens[form] = weight
+    return tokens
+
+
+def index_existing_members(apps, schema_editor):
+    Member = apps.get_model('members', 'Member')
+    MemberSearchToken = apps.get_model('members', 'MemberSearchToken')
+    db_alias = schema_editor.connection.alias
+    batch = []
+    for member in Member.objects.using(db_alias).only('pk', *FIELD_WEIGHTS).iterator(chunk_size=1000):
+        batch.extend(
+            MemberSearchToken(member_id=member.pk, token=token, weight=weight)
+            for token, weight in member_tokens(member).items()
+        )
+        if len(batch) >= 5000:
+            MemberSearchToken.objects.using(db_alias).bulk_create(batch)
+            batch = []
+    MemberSearchToken.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0016_member_address_city_member_address_city_ta_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='members.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'member', 'weight'], name='member_search_token_cov', opclasses=['varchar_pattern_ops', 'int8_ops', 'int2_ops'])],
+                'unique_together': {('member', 'token')},
+            },
+        ),
+        migrations.RunPython(index_existing_members, migrations.RunPython.noop),
+    ]
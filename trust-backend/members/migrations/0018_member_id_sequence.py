@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0017_member_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Member ID Sequence',
+            },
+        ),
+    ]
@@ -133,15 +133,7 @@ class Member(models.Model):
 
         # Auto-generate member_id
         if not self.member_id:
-            # Generate next member ID
-            last = Member.objects.order_by('-id').first()
-            if last and last.member_id:
-                try:
-                    num = int(last.member_id.split('-')[1]) + 1
-                except (IndexError, ValueError):
-                    num = 1
-            else:
-                num = 1
+            num = MemberIdSequence.reserve(1)
             self.member_id = f'KT-{num:04d}'
             
         from decimal import Decimal
@@ -305,3 +297,74 @@ class Transaction(models.Model):
             import uuid
             self.receipt_number = f"RCPT-{uuid.uuid4().hex[:8].upper()}"
         super().save(*args, **kwargs)
+
+
+class MemberSearchToken(models.Model):
+    """Normalised word of a member's searchable fields (see members/search.py)"""
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('member', 'token')
+        indexes = [
+            # Covers the prefix scan and the per-member probes of a search;
+            # varchar_pattern_ops lets PostgreSQL use it for LIKE 'x%'.
+            models.Index(
+                fields=['token', 'member', 'weight'], name='member_search_token_cov',
+                opclasses=['varchar_pattern_ops', 'int8_ops', 'int2_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.token} ({self.member_id})"
+
+
+class MemberIdSequence(models.Model):
+    """
+    Last KT- member number handed out (a single row).
+
+    reserve() bumps it in place, so Member.save() and the bulk importer
+    never read the same "newest member" and collide on member_id.
+    """
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Member ID Sequence"
+
+    def __str__(self):
+        return f"KT-{self.last_value:04d}"
+
+    @staticmethod
+    def _highest_issued():
+        """The newest member's KT- number: the rule used before this counter existed."""
+        last = Member.objects.order_by('-id').only('member_id').first()
+        if last and last.member_id:
+            try:
+                return int(last.member_id.split('-')[1])
+            except (IndexError, ValueError):
+                return 0
+        return 0
+
+    @classmethod
+    def reserve(cls, count=1):
+        """
+        Atomically add *count* to the counter and return the new last value;
+        the reserved block is (last - count + 1 .. last).
+
+        The UPDATE holds the row lock until the caller's transaction ends,
+        and rolls back with it.
+        """
+        from django.db import transaction
+        from django.db.models import F
+
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        with transaction.atomic():
+            # Write first so SQLite takes its write lock up front.
+            if not cls.objects.filter(pk=1).update(last_value=F('last_value') + count):
+                # First member id ever (or first run after upgrading).
+                cls.objects.get_or_create(pk=1, defaults={'last_value': cls._highest_issued()})
+                cls.objects.filter(pk=1).update(last_value=F('last_value') + count)
+            return cls.objects.values_list('last_value', flat=True).get(pk=1)
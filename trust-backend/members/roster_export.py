@@ -0,0 +1,135 @@
+"""
+Member roster export (xlsx / CSV / NDJSON).
+
+Members are read with ``iterator(chunk_size=...)`` and their children
+prefetched per chunk through the real reverse accessor, children_set,
+so the export costs two queries per chunk and holds at most one chunk
+of members in memory.  The xlsx variant uses openpyxl's write_only mode
+with fixed column widths; CSV and NDJSON stream row by row.
+"""
+
+from django.db.models import Prefetch
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from accounting.streaming import (
+    XLSX_CONTENT_TYPE, iter_csv, iter_ndjson, stream_csv, stream_ndjson, stream_spooled,
+)
+
+from .models import Member
+
+CHUNK_SIZE = 1000
+
+# (header, ndjson key, xlsx width)
+ROSTER_COLUMNS = [
+    ('Member ID', 'member_id', 14),
+    ('Name', 'name', 28),
+    ('Name (Tamil)', 'name_ta', 28),
+    ('Phone', 'phone', 16),
+    ('DOB', 'date_of_birth', 12),
+    ('Address', 'address', 40),
+    ('Address (Tamil)', 'address_ta', 40),
+    ('Father Name', 'father_name', 28),
+    ('Father Name (Tamil)', 'father_name_ta', 28),
+    ('Mother Name', 'mother_name', 28),
+    ('Mother Name (Tamil)', 'mother_name_ta', 28),
+    ('Spouse Name', 'spouse_name', 28),
+    ('Spouse Name (Tamil)', 'spouse_name_ta', 28),
+    ('Children', 'children', 50),
+    ('Annual Tax', 'annual_tax', 14),
+    ('Amount Paid', 'amount_paid', 14),
+    ('Amount Due', 'amount_due', 14),
+    ('Status', 'payment_status', 12),
+]
+DOB_COLUMN = 4
+
+_MEMBER_FIELDS = [key for _, key, _ in ROSTER_COLUMNS if key not in ('children', 'payment_status')]
+
+
+def roster_queryset():
+    children = Member.objects.only('father_id', 'name', 'date_of_birth', 'gender')
+    return Member.objects.only(*_MEMBER_FIELDS).prefetch_related(
+        Prefetch('children_set', queryset=children),
+    )
+
+
+def _children_label(member):
+    return '; '.join(
+        f"{c.name} ({c.date_of_birth.strftime('%d/%m/%Y') if c.date_of_birth else ''}, {c.gender})"
+        for c in member.children_set.all()
+    )
+
+
+def iter_roster_rows(queryset=None):
+    """One list per member, in ROSTER_COLUMNS order."""
+    queryset = roster_queryset() if queryset is None else queryset
+    for member in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            member.member_id,
+            member.name, member.name_ta,
+            member.phone,
+            member.date_of_birth,
+            member.address, member.address_ta,
+            member.father_name, member.father_name_ta,
+            member.mother_name, member.mother_name_ta,
+            member.spouse_name, member.spouse_name_ta,
+            _children_label(member),
+            member.annual_tax, member.amount_paid, member.amount_due,
+            member.payment_status,
+        ]
+
+
+def write_roster_workbook(fileobj, rows):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Members")
+    for idx, (_, _, width) in enumerate(ROSTER_COLUMNS, 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.freeze_panes = 'A2'
+
+    bold = Font(bold=True)
+    header = []
+    for title, _, _ in ROSTER_COLUMNS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = bold
+        header.append(cell)
+    ws.append(header)
+
+    for row in rows:
+        dob = row[DOB_COLUMN]
+        if dob:
+            cell = WriteOnlyCell(ws, value=dob)
+            cell.number_format = 'DD/MM/YYYY'
+            row[DOB_COLUMN] = cell
+        ws.append(row)
+    wb.save(fileobj)
+
+
+ROSTER_FILENAMES = {'xlsx': 'members.xlsx', 'csv': 'members.csv', 'ndjson': 'members.ndjson'}
+
+
+def write_roster(fileobj, export='xlsx', queryset=None):
+    """Write the roster in the given format to a binary *fileobj* (background jobs)."""
+    rows = iter_roster_rows(queryset)
+    if export == 'xlsx':
+        write_roster_workbook(fileobj, rows)
+        return
+    if export == 'csv':
+        lines = iter_csv([title for title, _, _ in ROSTER_COLUMNS], rows)
+    else:
+        lines = iter_ndjson([key for _, key, _ in ROSTER_COLUMNS], rows)
+    for line in lines:
+        fileobj.write(line.encode('utf-8'))
+
+
+def roster_response(export='xlsx', queryset=None):
+    """Streaming response for the roster in the given format."""
+    rows = iter_roster_rows(queryset)
+    if export == 'csv':
+        return stream_csv([title for title, _, _ in ROSTER_COLUMNS], rows, ROSTER_FILENAMES['csv'])
+    if export == 'ndjson':
+        return stream_ndjson([key for _, key, _ in ROSTER_COLUMNS], rows, ROSTER_FILENAMES['ndjson'])
+    return stream_spooled(
+        lambda fileobj: write_roster_workbook(fileobj, rows), XLSX_CONTENT_TYPE, ROSTER_FILENAMES['xlsx'],
+    )
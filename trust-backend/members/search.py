@@ -0,0 +1,291 @@
+"""
+Bilingual member search over a normalised token table.
+
+Each member's name, father's name and city (English and Tamil) and phone
+are split into tokens stored in MemberSearchToken with a field weight:
+
+- English words are lower-cased, stripped of accents and folded to a
+  phonetic skeleton (fold_latin), so "Murugan", "Muruhan" and the
+  transliterated "murukan" all index as "murukan".
+- Tamil words are kept in NFC form (joiners removed) and also
+  transliterated to Latin and folded, so a Tamil-only name is found by
+  typing it in English and vice versa.
+- Phone numbers are kept as digits (country code / trunk 0 dropped).
+
+A query matches members for which every query word is a prefix of one
+of their tokens (words shorter than MIN_PREFIX_LENGTH must match whole).
+The prefix test is a range scan of a covering (token, member, weight)
+index, and the rank is the sum over query words of the best matching
+token's weight (+1 for a whole-token match).  Tokens are rebuilt by a
+post_save signal (members/signals.py) and by the bulk importer
+(index_members); rebuild_search_index() re-tokenises existing rows.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, When
+
+FIELD_WEIGHTS = {
+    'name': 4,
+    'name_ta': 4,
+    'phone': 4,
+    'father_name': 2,
+    'father_name_ta': 2,
+    'address_city': 1,
+    'address_city_ta': 1,
+}
+SEARCH_FIELDS = frozenset(FIELD_WEIGHTS)
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TERMS = 5
+# Shorter query words only match whole tokens (initials, "S" in "Murugan S").
+MIN_PREFIX_LENGTH = 2
+
+_WORD_RE = re.compile(r'[0-9a-z\u0B80-\u0BFF]+')
+_TAMIL_RE = re.compile(r'[\u0B80-\u0BFF]')
+_JOINERS = dict.fromkeys(map(ord, '\u200b\u200c\u200d\ufeff'))
+
+# ---------------------------------------------------------------------------
+# Tamil -> Latin transliteration
+# ---------------------------------------------------------------------------
+
+# Long and short vowels share a letter: only the folded skeleton is
+# compared, and English spellings do not mark length reliably.
+_TA_VOWELS = {
+    'அ': 'a', 'ஆ': 'a', 'இ': 'i', 'ஈ': 'i', 'உ': 'u', 'ஊ': 'u',
+    'எ': 'e', 'ஏ': 'e', 'ஐ': 'ai', 'ஒ': 'o', 'ஓ': 'o', 'ஔ': 'au',
+}
+_TA_VOWEL_SIGNS = {
+    'ா': 'a', 'ி': 'i', 'ீ': 'i', 'ு': 'u', 'ூ': 'u', 'ெ': 'e',
+    'ே': 'e', 'ை': 'ai', 'ொ': 'o', 'ோ': 'o', 'ௌ': 'au',
+}
+_TA_CONSONANTS = {
+    'க': 'k', 'ங': 'ng', 'ச': 'c', 'ஞ': 'nj', 'ட': 't', 'ண': 'n',
+    'த': 't', 'ந': 'n', 'ப': 'p', 'ம': 'm', 'ய': 'y', 'ர': 'r',
+    'ல': 'l', 'வ': 'v', 'ழ': 'zh', 'ள': 'l', 'ற': 'r', 'ன': 'n',
+    'ஜ': 'j', 'ஷ': 'sh', 'ஸ': 's', 'ஹ': 'h',
+}
+_TA_VIRAMA = '்'
+
+
+def transliterate_tamil(word):
+    """Rough Latin spelling of a Tamil word ("முருகன்" -> "murukan")."""
+    out = []
+    for i, ch in enumerate(word):
+        if ch in _TA_CONSONANTS:
+            out.append(_TA_CONSONANTS[ch])
+            nxt = word[i + 1] if i + 1 < len(word) else ''
+            if nxt != _TA_VIRAMA and nxt not in _TA_VOWEL_SIGNS:
+                out.append('a')
+        elif ch in _TA_VOWEL_SIGNS:
+            out.append(_TA_VOWEL_SIGNS[ch])
+        elif ch in _TA_VOWELS:
+            out.append(_TA_VOWELS[ch])
+        elif ch.isascii():
+            out.append(ch)
+    return ''.join(out)
+
+
+# ---------------------------------------------------------------------------
+# Normalisation
+# ---------------------------------------------------------------------------
+
+# Spellings of the same Tamil sound collapse to one letter; order matters
+# (digraphs before the single-letter table).
+_LATIN_DIGRAPHS = [
+    ('zh', 'l'), ('sh', 's'), ('ch', 's'), ('th', 't'), ('dh', 't'),
+    ('ph', 'p'), ('bh', 'p'), ('kh', 'k'), ('gh', 'k'),
+    ('ee', 'i'), ('oo', 'u'),
+]
+_LATIN_LETTERS = str.maketrans({
+    'g': 'k', 'd': 't', 'b': 'p', 'j': 's', 'c': 's', 'z': 's',
+    'w': 'v', 'q': 'k', 'f': 'p', 'x': 'ks', 'h': None,
+})
+_REPEATS_RE = re.compile(r'(.)\1+')
+# "+91 98765-43210" -> "9876543210"
+_PHONE_PREFIX_RE = re.compile(r'^\s*(\+|00)91[\s-]*(?=\d)')
+_DIGIT_GAP_RE = re.compile(r'(?<=\d)[\s-]+(?=\d)')
+
+
+def fold_latin(word):
+    """Phonetic skeleton of a Latin word: "Karthikeyan" -> "kartikeyan"."""
+    for digraph, letter in _LATIN_DIGRAPHS:
+        word = word.replace(digraph, letter)
+    return _REPEATS_RE.sub(r'\1', word.translate(_LATIN_LETTERS))
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(text):
+    """Lower-case, accent-free, NFC text with zero-width joiners removed."""
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize('NFKD', text.translate(_JOINERS).lower())
+    text = ''.join(
+        ch for ch in text
+        if not (unicodedata.category(ch) == 'Mn' and not _TAMIL_RE.match(ch))
+    )
+    return unicodedata.normalize('NFC', text)
+
+
+def normalize_phone(digits):
+    if len(digits) == 12 and digits.startswith('91'):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+
+# Names and cities repeat heavily, so both caches hit on most words.
+@lru_cache(maxsize=65536)
+def word_forms(word):
+    """Index / query forms of one normalised word."""
+    if word.isdigit():
+        return frozenset([normalize_phone(word)])
+    if _TAMIL_RE.search(word):
+        forms = {word, fold_latin(transliterate_tamil(word))}
+    else:
+        forms = {fold_latin(word)}
+    return frozenset(form[:MAX_TOKEN_LENGTH] for form in forms if form)
+
+
+def member_tokens(member, weights=FIELD_WEIGHTS):
+    """{token: weight} for a Member (or any object with the *weights* fields)."""
+    tokens = {}
+    for field, weight in weights.items():
+        value = getattr(member, field, None)
+        if not value:
+            continue
+        for word in _WORD_RE.findall(normalize_text(value)):
+            for form in word_forms(word):
+                if tokens.get(form, 0) < weight:
+                    tokens[form] = weight
+    return tokens
+
+
+def query_terms(q):
+    """One set of alternative forms per query word (at most MAX_QUERY_TERMS)."""
+    q = _DIGIT_GAP_RE.sub('', _PHONE_PREFIX_RE.sub('', q or ''))
+    terms = []
+    for word in _WORD_RE.findall(normalize_text(q)):
+        forms = word_forms(word)
+        if forms and forms not in terms:
+            terms.append(forms)
+    return terms[:MAX_QUERY_TERMS]
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+def index_members(members):
+    """Rebuild the search tokens of *members* (saved Member instances)."""
+    from .models import MemberSearchToken
+
+    members = [m for m in members if m.pk]
+    if not members:
+        return
+    MemberSearchToken.objects.filter(member_id__in=[m.pk for m in members]).delete()
+    MemberSearchToken.objects.bulk_create(
+        [
+            MemberSearchToken(member_id=member.pk, token=token, weight=weight)
+            for member in members
+            for token, weight in member_tokens(member).items()
+        ],
+        batch_size=1000,
+    )
+
+
+def index_member(member):
+    index_members([member])
+
+
+def rebuild_search_index(queryset=None, chunk_size=1000):
+    """Re-tokenise every member of *queryset* (default: all). Returns the count."""
+    from .models import Member
+
+    queryset = Member.objects.all() if queryset is None else queryset
+    queryset = queryset.order_by('pk').only('pk', *SEARCH_FIELDS)
+    chunk = []
+    total = 0
+    for member in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(member)
+        if len(chunk) >= chunk_size:
+            index_members(chunk)
+            total += len(chunk)
+            chunk = []
+    index_members(chunk)
+    return total + len(chunk)
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+def _term_q(forms):
+    # SQLite's LIKE is case-insensitive and cannot use a plain index, but a
+    # code-point range can; PostgreSQL uses the varchar_pattern_ops index.
+    q = Q()
+    for form in forms:
+        if len(form) < MIN_PREFIX_LENGTH:
+            q |= Q(token=form)
+        elif connection.vendor == 'sqlite':
+            q |= Q(token__gte=form, token__lt=form + '\U0010ffff')
+        else:
+            q |= Q(token__startswith=form)
+    return q
+
+
+def _best_weight(forms):
+    """Best weight among a term's matching tokens, +1 for a whole-token match."""
+    return Max(Case(
+        When(token__in=forms, then=F('weight') + 1),
+        default=F('weight'),
+        output_field=IntegerField(),
+    ))
+
+
+def search_member_ids(q, limit=20, member_id=None):
+    """
+    [(member_id, score)] best first for query *q*.  *member_id* restricts
+    the search to that member (callers who may only see themselves).
+
+    The term with the fewest matching tokens drives the query; every other
+    term is probed per candidate through the (token, member, weight) index,
+    so a common word ("madurai") does not have to be grouped in full.
+    """
+    from .models import MemberSearchToken
+
+    terms = query_terms(q)
+    if not terms:
+        return []
+
+    tokens = MemberSearchToken.objects.all()
+    if member_id is not None:
+        tokens = tokens.filter(member_id=member_id)
+    counts = [tokens.filter(_term_q(forms)).count() for forms in terms]
+    if not all(counts):
+        return []
+    driver, *others = [forms for _, forms in sorted(zip(counts, terms), key=lambda pair: pair[0])]
+
+    others_best = [
+        Subquery(
+            MemberSearchToken.objects
+            .filter(_term_q(forms), member_id=OuterRef('member_id'))
+            .values('member_id').annotate(best=_best_weight(forms)).values('best'),
+            output_field=IntegerField(),
+        )
+        for forms in others
+    ]
+    rows = (
+        tokens.filter(_term_q(driver))
+        .values('member_id')
+        .annotate(score=sum(others_best, _best_weight(driver)))
+        .order_by(F('score').desc(nulls_last=True), 'member_id')
+        .values_list('member_id', 'score')[:limit]
+    )
+    # A NULL score is a member missing one of the other terms; sorting them
+    # last instead of filtering in HAVING saves evaluating the probes twice.
+    return [(pk, score) for pk, score in rows if score is not None]
@@ -188,15 +188,10 @@ class MemberUpdateSerializer(serializers.ModelSerializer):
         
         request = self.context.get('request')
         is_staff = request and request.user and (request.user.is_staff or getattr(request.user, 'is_superuser', False))
-        
-        is_accountant = False
-        if request and request.user:
-            try:
-                profile = request.user.staff_profile
-                is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-            except Exception:
-                pass
-                
+
+        from .authentication import principal_for
+        is_accountant = bool(request) and principal_for(request.user).is_accountant
+
         if is_staff or is_accountant:
             # Clear pending update since staff/admin is saving
             instance.pending_update = None
@@ -305,26 +300,35 @@ class MemberListSerializer(serializers.ModelSerializer):
             'children', 'children_count', 'taxes', 'is_active', 'is_expired', 'is_family_head', 'password_reset_required'
         ]
     
+    # MemberViewSet.list annotates num_children / tax_total / tax_paid /
+    # tax_due and prefetches children and taxes; the fallbacks below only
+    # run for un-annotated instances.
+
     def get_children_count(self, obj):
+        if hasattr(obj, 'num_children'):
+            return obj.num_children or 0
         return obj.children_set.count()
 
+    def _tax_sum(self, obj, annotation, field):
+        """Sum of *field* over the member's MemberTax rows, or None if none exist."""
+        if hasattr(obj, annotation):
+            return getattr(obj, annotation)
+        taxes = list(obj.taxes.all())
+        if taxes:
+            return sum(getattr(tax, field) for tax in taxes)
+        return None
+
     def get_amount_due(self, obj):
-        taxes = getattr(obj, 'taxes', None)
-        if taxes and taxes.exists():
-            return sum(tax.amount_due for tax in taxes.all())
-        return obj.amount_due
+        total = self._tax_sum(obj, 'tax_due', 'amount_due')
+        return obj.amount_due if total is None else total
 
     def get_annual_tax(self, obj):
-        taxes = getattr(obj, 'taxes', None)
-        if taxes and taxes.exists():
-            return sum(tax.total_tax for tax in taxes.all())
-        return obj.annual_tax
+        total = self._tax_sum(obj, 'tax_total', 'total_tax')
+        return obj.annual_tax if total is None else total
 
     def get_amount_paid(self, obj):
-        taxes = getattr(obj, 'taxes', None)
-        if taxes and taxes.exists():
-            return sum(tax.amount_paid for tax in taxes.all())
-        return obj.amount_paid
+        total = self._tax_sum(obj, 'tax_paid', 'amount_paid')
+        return obj.amount_paid if total is None else total
 
     def get_payment_status(self, obj):
         due = self.get_amount_due(obj)
@@ -0,0 +1,64 @@
+"""
+Django signals for the members app.
+
+Drop cached authentication (members/authentication.py) as soon as what
+it was resolved from changes: a token is deleted (logout / revocation),
+or a user, its StaffProfile (role, deactivation) or its Member profile
+is saved or deleted.
+
+Keep a member's search tokens (members/search.py) in step with its
+searchable fields; deleting the member cascades to its tokens.  Any
+change to what the member picker shows bumps the lookup version
+(members/lookup.py) so each worker rebuilds its typeahead index.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from accounting.models import StaffProfile
+
+from .authentication import invalidate_token, invalidate_user
+from .lookup import LOOKUP_WEIGHTS, bump_version
+from .models import Member
+from .search import SEARCH_FIELDS, index_member
+
+LOOKUP_FIELDS = frozenset(LOOKUP_WEIGHTS) | {'is_active', 'is_family_head'}
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=StaffProfile)
+@receiver(post_delete, sender=StaffProfile)
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def forget_changed_profile(sender, instance, **kwargs):
+    if instance.user_id:
+        invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Member)
+def reindex_member(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not SEARCH_FIELDS & set(update_fields)):
+        return
+    index_member(instance)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def bump_lookup_version(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not LOOKUP_FIELDS & set(update_fields):
+        return
+    # After commit, so no worker rebuilds from the old rows at the new version.
+    transaction.on_commit(bump_version)
@@ -0,0 +1,72 @@
+"""
+Background job handlers for the members app (see jobs/queue.py).
+
+Queued by the ?async=true variants of generate_taxes, import-excel and
+export_excel in members/views.py.
+"""
+
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+
+from jobs.queue import JobFailed, register
+
+from .models import TaxMaster
+
+
+@register('members.generate_taxes')
+def generate_taxes_job(job, tax_id, user_id=None):
+    from .tax_engine import generate_taxes
+
+    try:
+        tax_master = TaxMaster.objects.get(id=tax_id)
+    except TaxMaster.DoesNotExist:
+        raise JobFailed('TaxMaster not found')
+    if tax_master.status == 'Generated':
+        raise JobFailed('Taxes have already been generated for this event')
+
+    job.set_progress(0, message=f'Generating taxes for {tax_master.name}')
+    try:
+        created_count = generate_taxes(tax_master, User.objects.filter(pk=user_id).first())
+    except ValidationError as exc:
+        raise JobFailed(exc.message_dict)
+    return {'message': f'Generated {created_count} new taxes for {tax_master.name}'}
+
+
+# Imports commit chunk by chunk, so a blind retry could duplicate the
+# phone-less rows of a half-finished run.
+@register('members.import_excel', max_attempts=1)
+def import_excel_job(job, path, user_id=None, dry_run=False):
+    from .utils import open_import_workbook, process_excel_workbook
+
+    try:
+        with default_storage.open(path, 'rb') as upload:
+            wb = open_import_workbook(upload)
+            try:
+                # The row count is unknown up front: the sheet's stored
+                # dimension is not trusted (see open_import_workbook).
+                job.set_progress(0, message='Validating' if dry_run else 'Importing')
+                return process_excel_workbook(
+                    wb,
+                    user=User.objects.filter(pk=user_id).first(),
+                    dry_run=dry_run,
+                    on_progress=lambda done: job.set_progress(done),
+                )
+            finally:
+                wb.close()
+    finally:
+        default_storage.delete(path)
+
+
+@register('members.export_roster')
+def export_roster_job(job, export='xlsx'):
+    from .roster_export import ROSTER_FILENAMES, write_roster
+
+    job.set_progress(0, message='Writing roster')
+    with tempfile.TemporaryFile() as out:
+        write_roster(out, export)
+        out.seek(0)
+        job.save_artifact(ROSTER_FILENAMES[export], out)
+    return {'filename': ROSTER_FILENAMES[export]}
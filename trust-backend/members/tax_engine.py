@@ -0,0 +1,184 @@
+"""
+Set-based tax generation for a TaxMaster event.
+
+Replaces the per-head loop in TaxMasterViewSet.generate_taxes (one
+update_or_create, one AccountTransaction.save(), one rollup and one
+receipt lock per family head) with a fixed number of queries:
+
+1. Tax counts for every active family head from one FamilyIndex load
+   (same rules as utils.calculate_member_tax_count).
+2. MemberTax rows created / updated with bulk_create / bulk_update.
+3. DEBIT AccountTransactions and their Receipts bulk-inserted, with the
+   receipt numbers reserved as one block.  PDFs are left PENDING for the
+   receipt render queue.
+4. Member rollups recomputed in one batch
+   (accounting.utils.recalculate_member_financials_bulk).
+
+Everything runs inside one DB transaction, as before.
+"""
+
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .family_graph import FamilyIndex
+from .models import Member, MemberTax, TaxMaster
+
+BULK_BATCH_SIZE = 500
+
+
+# ---------------------------------------------------------------------------
+# MemberTax rows
+# ---------------------------------------------------------------------------
+
+def upsert_member_taxes(tax_master, totals):
+    """
+    Bulk equivalent of MemberTax.objects.update_or_create for every
+    ``{member_id: (tax_count, total_tax)}`` in *totals*.
+
+    Returns the number of newly created rows.
+    """
+    existing = {
+        mt.member_id: mt
+        for mt in MemberTax.objects.filter(tax=tax_master, member_id__in=list(totals))
+    }
+    now = timezone.now()
+    to_create, to_update = [], []
+    for member_id, (tax_count, total_tax) in totals.items():
+        member_tax = existing.get(member_id)
+        if member_tax is None:
+            to_create.append(MemberTax(
+                member_id=member_id, tax=tax_master,
+                tax_count=tax_count, total_tax=total_tax,
+                amount_due=total_tax,
+            ))
+            continue
+        member_tax.tax_count = tax_count
+        member_tax.total_tax = total_tax
+        # Same rule as MemberTax.save()
+        member_tax.amount_due = Decimal(str(total_tax)) - Decimal(str(member_tax.amount_paid))
+        member_tax.updated_at = now
+        to_update.append(member_tax)
+
+    MemberTax.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    MemberTax.objects.bulk_update(
+        to_update, ['tax_count', 'total_tax', 'amount_due', 'updated_at'],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return len(to_create)
+
+
+# ---------------------------------------------------------------------------
+# Debit transactions + receipts
+# ---------------------------------------------------------------------------
+
+def _create_debits(tax_master, account_head, heads, totals, user, today):
+    """Bulk-insert one DEBIT (plus its Receipt) per head with tax to pay."""
+    from accounting.models import AccountTransaction, Receipt
+
+    debits = [
+        AccountTransaction(
+            account_head=account_head,
+            tax_event=tax_master,
+            transaction_type='DEBIT',
+            amount=totals[head.id][1],
+            transaction_date=today,
+            payment_mode='Credit',
+            member=head,
+            donor_name=head.name,
+            donor_contact=head.phone or '',
+            purpose=f"Tax Kodai: {tax_master.name}",
+            entered_by=user,
+        )
+        for head in heads
+        if totals[head.id][1] > 0
+    ]
+    if not debits:
+        return []
+    # AccountTransaction.clean() would reject every row for this reason.
+    if not account_head.is_active:
+        raise ValidationError({
+            'account_head': "Cannot create a transaction under a deactivated Account Head."
+        })
+
+    AccountTransaction.objects.bulk_create(debits, batch_size=BULK_BATCH_SIZE)
+    if any(tx.pk is None for tx in debits):
+        # Backend cannot return ids from a bulk INSERT; match them back.
+        ids = dict(
+            AccountTransaction.objects
+            .filter(tax_event=tax_master, transaction_type='DEBIT',
+                    member_id__in=[tx.member_id for tx in debits],
+                    receipt__isnull=True)
+            .values_list('member_id', 'id')
+        )
+        for tx in debits:
+            tx.pk = ids[tx.member_id]
+
+    numbers = Receipt.reserve_receipt_numbers(len(debits))
+    Receipt.objects.bulk_create(
+        [
+            Receipt(receipt_number=number, transaction_id=tx.pk)
+            for number, tx in zip(numbers, debits)
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return debits
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def generate_taxes(tax_master, user):
+    """
+    Generate MemberTax rows and DEBIT bills for every active family head.
+
+    Returns the number of newly created MemberTax rows.  Raises
+    ValidationError if the target account head is inactive or the event
+    has already been generated; nothing is written in that case.
+    """
+    from accounting.models import AccountHead
+    from accounting.utils import recalculate_member_financials_bulk
+
+    today = timezone.now().date()
+    with transaction.atomic():
+        # Two runs (a double submit, or a job requeued while its worker is
+        # still busy) must not both pass the status check and bill twice.
+        locked = TaxMaster.objects.select_for_update().get(pk=tax_master.pk)
+        if locked.status == 'Generated':
+            raise ValidationError({'status': 'Taxes have already been generated for this event.'})
+
+        # Get the AccountHead linked to the tax event or fallback to 'Tax Kodai'
+        account_head = tax_master.account_head
+        if not account_head:
+            account_head, _ = AccountHead.objects.get_or_create(
+                name='Tax Kodai',
+                defaults={
+                    'head_type': 'Event',
+                    'is_active': True,
+                    'account_type': 'Revenue',
+                    'created_by': user,
+                }
+            )
+
+        heads = list(Member.objects.filter(is_family_head=True, is_active=True))
+        counts = FamilyIndex.load().head_tax_counts([head.id for head in heads])
+        totals = {
+            head.id: (
+                counts[head.id],
+                (counts[head.id] * tax_master.base_amount).quantize(Decimal('0.00')),
+            )
+            for head in heads
+        }
+
+        created_count = upsert_member_taxes(tax_master, totals)
+        debits = _create_debits(tax_master, account_head, heads, totals, user, today)
+        recalculate_member_financials_bulk((tx.member_id, today) for tx in debits)
+
+        tax_master.status = 'Generated'
+        tax_master.generated_date = today
+        tax_master.save()
+
+    return created_count
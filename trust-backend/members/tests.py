@@ -1,7 +1,9 @@
 import datetime
+import shutil
+import tempfile
 from decimal import Decimal
 import openpyxl
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from members.models import Member
 from members.utils import process_excel_workbook
@@ -122,3 +124,645 @@ class ExcelImportEngineTestCase(TestCase):
         self.assertEqual(credit_tx_m2.amount, Decimal("2000.00"))
         self.assertEqual(credit_tx_m2.account_head.name, "Kodai Vari")
         self.assertEqual(credit_tx_m2.entered_by, self.user)
+
+
+class BulkTaxGenerationTestCase(TestCase):
+    def setUp(self):
+        from members.models import TaxMaster
+        self.admin = User.objects.create_user(username='taxadmin', password='password123', is_staff=True)
+        self.head_account = AccountHead.objects.create(
+            name="Kodai 2026", account_type="Revenue", is_active=True, created_by=self.admin
+        )
+        self.tax = TaxMaster.objects.create(
+            name="Kodai 2026", base_amount=Decimal("1000.00"), account_head=self.head_account
+        )
+
+        # Grandfather (inactive) with two sons: one promoted head, one dependent.
+        grandfather = self._member("Periyasamy", is_active=False)
+        self.head = self._member("Murugan", father=grandfather, is_family_head=True, marital_status='Married')
+        brother = self._member("Selvam", father=grandfather, marital_status='Married')
+        self._member("Selvam Jr", father=brother)                                  # +0.5
+        self._member("Karthik", father=self.head)                                  # +0.5
+        self._member("Meena", father=self.head, gender='Female')                   # +0
+        self.other_head = self._member("Raman", is_family_head=True)
+        self._member("Ravi", father=self.other_head, is_family_head=True)         # own head: +0
+
+    def _member(self, name, **kwargs):
+        kwargs.setdefault('gender', 'Male')
+        return Member.objects.create(name=name, address="Kalingar Street", **kwargs)
+
+    def test_in_memory_counts_match_recursive_calculation(self):
+        from members.family_graph import FamilyIndex
+        from members.utils import calculate_member_tax_count
+
+        heads = list(Member.objects.filter(is_family_head=True, is_active=True))
+        with self.assertNumQueries(1):
+            counts = FamilyIndex.load().head_tax_counts()
+        for head in heads:
+            self.assertEqual(counts[head.id], calculate_member_tax_count(head), head.name)
+        self.assertEqual(counts[self.head.id], Decimal("3.0"))
+
+    def test_preview_tax_counts_endpoint(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.get(f'/api/members/taxes/preview-tax-counts/?tax_id={self.tax.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        row = next(r for r in response.data['results'] if r['id'] == self.head.id)
+        self.assertEqual(row['tax_count'], Decimal("3.0"))
+        self.assertEqual(row['total_tax'], Decimal("3000.00"))
+
+    def test_succession_promotes_eldest_active_son(self):
+        younger = self._member("Arun", father=self.other_head, date_of_birth=datetime.date(2001, 1, 1))
+        elder = self._member("Bala", father=self.other_head, date_of_birth=datetime.date(1995, 1, 1))
+        self._member("Chitra", father=self.other_head, gender='Female', date_of_birth=datetime.date(1990, 1, 1))
+
+        Member.objects.filter(father=self.other_head, is_family_head=True).update(is_active=False)
+        self.other_head.is_expired = True
+        self.other_head.save()
+
+        elder.refresh_from_db()
+        younger.refresh_from_db()
+        self.assertTrue(elder.is_family_head)
+        self.assertFalse(younger.is_family_head)
+
+    def test_generate_taxes_bulk_creates_bills_receipts_and_rollups(self):
+        from rest_framework.test import APIClient
+        from members.models import MemberTax
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.post('/api/members/taxes/generate_taxes/', {'tax_id': self.tax.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Generated 3 new taxes', response.data['message'])
+
+        member_tax = MemberTax.objects.get(member=self.head, tax=self.tax)
+        self.assertEqual(member_tax.total_tax, Decimal("3000.00"))
+        self.assertEqual(member_tax.amount_due, Decimal("3000.00"))
+
+        debits = AccountTransaction.objects.filter(tax_event=self.tax, transaction_type='DEBIT')
+        self.assertEqual(debits.count(), 3)
+        numbers = sorted(tx.receipt.receipt_number for tx in debits)
+        self.assertEqual(len(set(numbers)), 3)
+        self.assertTrue(all(tx.receipt.render_status == 'PENDING' for tx in debits))
+
+        self.head.refresh_from_db()
+        self.assertEqual(self.head.annual_tax, Decimal("3000.00"))
+        self.assertEqual(self.head.amount_due, Decimal("3000.00"))
+        self.tax.refresh_from_db()
+        self.assertEqual(self.tax.status, 'Generated')
+
+        # A second run holding a stale TaxMaster (e.g. a requeued job) is refused.
+        from django.core.exceptions import ValidationError
+        from members.models import TaxMaster
+        from members.tax_engine import generate_taxes
+
+        stale = TaxMaster.objects.get(pk=self.tax.pk)
+        stale.status = 'Open'
+        with self.assertRaises(ValidationError):
+            generate_taxes(stale, self.admin)
+        self.assertEqual(debits.count(), 3)
+
+    def test_inactive_account_head_rolls_back_everything(self):
+        from rest_framework.test import APIClient
+        from members.models import MemberTax
+
+        AccountHead.objects.filter(pk=self.head_account.pk).update(is_active=False)
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.post('/api/members/taxes/generate_taxes/', {'tax_id': self.tax.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MemberTax.objects.exists())
+        self.assertFalse(AccountTransaction.objects.exists())
+
+
+class MemberListQueryTestCase(TestCase):
+    def setUp(self):
+        from members.models import MemberTax, TaxMaster
+        self.admin = User.objects.create_user(username='listadmin', password='password123', is_staff=True)
+        self.tax = TaxMaster.objects.create(name="Kodai 2026", base_amount=Decimal("1000.00"))
+        self.MemberTax = MemberTax
+
+    def _add_family(self, name):
+        head = Member.objects.create(name=name, gender='Male', address="Kalingar Street", is_family_head=True)
+        Member.objects.create(name=f"{name} Jr", gender='Male', address="Kalingar Street", father=head)
+        self.MemberTax.objects.create(
+            member=head, tax=self.tax, tax_count=Decimal("1.5"), total_tax=Decimal("1500.00"),
+            amount_paid=Decimal("500.00"), amount_due=Decimal("1000.00"),
+        )
+        return head
+
+    def _list(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        # Fresh user each time so the role lookup is counted in every run
+        client.force_authenticate(user=User.objects.get(pk=self.admin.pk))
+        # role, page COUNT, members, prefetched children, prefetched taxes
+        with self.assertNumQueries(5):
+            response = client.get('/api/members/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_query_count_does_not_grow_with_members(self):
+        head = self._add_family("Murugan")
+        results = self._list()
+        for i in range(5):
+            self._add_family(f"Family {i}")
+        self._list()
+
+        row = next(r for r in results if r['id'] == head.id)
+        self.assertEqual(row['children_count'], 1)
+        self.assertEqual(len(row['children']), 1)
+        self.assertEqual(Decimal(row['annual_tax']), Decimal("1500.00"))
+        self.assertEqual(Decimal(row['amount_due']), Decimal("1000.00"))
+        self.assertEqual(row['payment_status'], 'Partial')
+        self.assertEqual(row['taxes'][0]['tax_name'], self.tax.name)
+
+
+class RosterExportTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.admin = User.objects.create_user(username='rosteradmin', password='password123', is_staff=True)
+        self.head = Member.objects.create(name="Murugan", gender='Male', address="Kalingar Street", is_family_head=True)
+        Member.objects.create(
+            name="Karthik", gender='Male', address="Kalingar Street", father=self.head,
+            date_of_birth=datetime.date(2001, 3, 4),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = '/api/members/export_excel/'
+
+    def test_xlsx_lists_children_via_children_set(self):
+        import io
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+            body = b''.join(response.streaming_content)
+        small = len(ctx.captured_queries)
+        self.assertEqual(response.status_code, 200)
+        ws = openpyxl.load_workbook(io.BytesIO(body))['Members']
+        rows = {row[1]: row for row in ws.iter_rows(min_row=2, values_only=True)}
+        self.assertEqual(rows["Murugan"][13], "Karthik (04/03/2001, Male)")
+        self.assertEqual(rows["Karthik"][4], datetime.datetime(2001, 3, 4))
+
+        for i in range(5):
+            Member.objects.create(name=f"Member {i}", gender='Male', address="Street", father=self.head)
+        with CaptureQueriesContext(connection) as ctx:
+            b''.join(self.client.get(self.url).streaming_content)
+        self.assertEqual(len(ctx.captured_queries), small)
+
+    def test_csv_and_ndjson(self):
+        import json
+
+        response = self.client.get(self.url, {'export': 'csv'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').strip().splitlines()
+        self.assertTrue(lines[0].startswith('Member ID,Name,'))
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get(self.url, {'export': 'ndjson'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        head = next(r for r in records if r['name'] == "Murugan")
+        self.assertEqual(head['payment_status'], "Pending")
+        self.assertEqual(self.client.get(self.url, {'export': 'pdf'}).status_code, 400)
+
+
+class BatchedMemberImportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='batch_importer', password='password123', is_staff=True)
+        Member.objects.create(name="Existing", gender='Male', address="Street", phone="9000000001")
+
+    def _workbook(self, rows):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        for _ in range(6):
+            ws.append([])
+        for i, (name, phone, debit, credit) in enumerate(rows, 1):
+            ws.append([i, name, f"REF-{i}", 1.0, "மதுரை", 0, debit, credit, None, phone])
+        return wb
+
+    def test_bulk_import_matches_row_by_row_results(self):
+        from accounting.models import Receipt
+
+        wb = self._workbook([
+            ("முருகன்", "919876543210", 3000, 1000),
+            ("செல்வம்", "919000000001", 500, 0),     # phone already registered
+            ("ராமன்", "919876543210", 0, 0),         # duplicate phone in this file
+            ("கணேசன்", None, 0, 2000),
+        ])
+        results = process_excel_workbook(wb, user=self.user)
+
+        self.assertEqual(results['created'], 2)
+        self.assertEqual(results['skipped'], 2)
+        self.assertEqual(results['errors'], [
+            {'row': 8, 'name': "செல்வம்", 'reason': "Phone 9000000001 already exists, skipping 'செல்வம்'"},
+            {'row': 9, 'name': "ராமன்", 'reason': "Duplicate phone 9876543210 in this file"},
+        ])
+
+        murugan = Member.objects.get(phone="9876543210")
+        ganesan = Member.objects.get(name="கணேசன்")
+        self.assertEqual(int(ganesan.member_id.split('-')[1]), int(murugan.member_id.split('-')[1]) + 1)
+        self.assertEqual(murugan.amount_due, Decimal("2000.00"))
+        self.assertEqual(ganesan.amount_paid, Decimal("2000.00"))
+        self.assertTrue(murugan.user.check_password("9876543210"))
+        self.assertEqual(murugan.user.username, murugan.member_id)
+        self.assertTrue(ganesan.user.check_password(ganesan.member_id))
+
+        receipts = Receipt.objects.filter(transaction__member__in=[murugan, ganesan])
+        self.assertEqual(receipts.count(), 3)
+        self.assertTrue(all(r.render_status == 'PENDING' for r in receipts))
+
+    def test_member_created_mid_chunk_does_not_collide_with_the_block(self):
+        from unittest import mock
+        from members import import_engine
+
+        hash_passwords = import_engine._hash_passwords
+
+        def hash_while_someone_adds_a_member(passwords):
+            # What a concurrent Member create could do between id allocation and insert.
+            Member.objects.create(name="Walk-in", gender='Male', address="Street")
+            return hash_passwords(passwords)
+
+        with mock.patch.object(import_engine, '_hash_passwords', hash_while_someone_adds_a_member), \
+                mock.patch('members.utils.create_member_from_dict') as row_by_row:
+            results = process_excel_workbook(self._workbook([
+                ("முருகன்", "919876543210", 0, 0),
+                ("கணேசன்", None, 0, 0),
+            ]), user=self.user)
+
+        row_by_row.assert_not_called()
+        self.assertEqual(results['created'], 2)
+        self.assertEqual(
+            sorted(Member.objects.values_list('member_id', flat=True)),
+            ['KT-0001', 'KT-0002', 'KT-0003', 'KT-0004'],
+        )
+        self.assertEqual(Member.objects.get(name="Walk-in").member_id, 'KT-0004')
+
+    def test_failed_chunk_falls_back_to_per_row_errors(self):
+        from accounting.models import AccountHead
+
+        AccountHead.objects.create(
+            name='Kodai Vari', account_type='Revenue', is_active=False, created_by=self.user,
+        )
+        results = process_excel_workbook(self._workbook([
+            ("முருகன்", "919876543210", 3000, 0),
+            ("கணேசன்", None, 0, 0),
+        ]), user=self.user)
+
+        self.assertEqual(results['created'], 1)
+        self.assertEqual(len(results['errors']), 1)
+        self.assertEqual(results['errors'][0]['row'], 7)
+        self.assertIn("deactivated Account Head", results['errors'][0]['reason'])
+        self.assertTrue(Member.objects.filter(name="கணேசன்").exists())
+        self.assertFalse(Member.objects.filter(phone="9876543210").exists())
+
+
+class ExcelImportDryRunTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.admin = User.objects.create_user(username='dryrunadmin', password='password123', is_staff=True)
+        Member.objects.create(name="Existing", gender='Male', address="Street", phone="9000000001")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _upload(self, stale_dimension=False, **params):
+        import io
+        import zipfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        for _ in range(6):
+            ws.append(["header"])
+        ws.append([1, "முருகன்", "REF-1", 1.0, "மதுரை", 0, 3000, 1000, None, "919876543210"])
+        ws.append([2, "செல்வம்", "REF-2", "ஒன்று", "மதுரை", 0, 0, 0, None, "919000000001"])
+        ws.append([3, "ராமன்", "REF-3", 1.0, "மதுரை", 0, "abc", 0, None, "919876543210"])
+        ws.append([4, None, "REF-4", 1.0, "மதுரை", 0, 0, 0, None, None])
+        ws.append([5, "கணேசன்", "REF-5", 1.0, "மதுரை", 0, 0, 0, None, "12345"])
+        buf = io.BytesIO()
+        wb.save(buf)
+        content = buf.getvalue()
+        if stale_dimension:
+            # What some non-Excel writers leave behind: <dimension ref="A1"/>
+            src = zipfile.ZipFile(io.BytesIO(content))
+            out = io.BytesIO()
+            with zipfile.ZipFile(out, 'w') as dst:
+                for item in src.infolist():
+                    data = src.read(item.filename)
+                    if item.filename == 'xl/worksheets/sheet1.xml':
+                        data = data.replace(b'<dimension ref="A1:J11"', b'<dimension ref="A1"')
+                        self.assertIn(b'<dimension ref="A1"', data)
+                    dst.writestr(item, data)
+            content = out.getvalue()
+        upload = SimpleUploadedFile('register.xlsx', content)
+        return self.client.post('/api/members/import-excel/', dict(params, excel_file=upload), format='multipart')
+
+    def test_dry_run_reports_without_writing(self):
+        response = self._upload(dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertTrue(data['dry_run'])
+        self.assertEqual(data['would_create'], 2)
+        self.assertEqual([(e['row'], e['reason']) for e in data['errors']], [
+            (8, "Phone 9000000001 already exists, skipping 'செல்வம்'"),
+            (9, "Duplicate phone 9876543210 in this file"),
+        ])
+        reasons = {(w['row'], w['reason']) for w in data['warnings']}
+        self.assertIn((8, "Tax Count 'ஒன்று' is not a number"), reasons)
+        self.assertIn((9, "Debit Amount 'abc' is not a number"), reasons)
+        self.assertIn((10, "No member name; row ignored"), reasons)
+        self.assertIn((11, "Phone '12345' is not a usable 10-digit number"), reasons)
+        self.assertEqual(Member.objects.count(), 1)
+        self.assertFalse(AccountTransaction.objects.exists())
+
+    def test_upload_imports_through_read_only_workbook(self):
+        response = self._upload()
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['skipped'], 2)
+        self.assertTrue(Member.objects.filter(phone="9876543210").exists())
+
+    def test_stale_sheet_dimension_still_reads_every_row(self):
+        response = self._upload(stale_dimension=True)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['skipped'], 2)
+
+
+class CopySqliteDatabaseTestCase(TestCase):
+    def _make_source(self, path):
+        from django.core.management import call_command
+        from django.db import DEFAULT_DB_ALIAS, connections
+
+        alias = 'copy_test_source'
+        connections.settings[alias] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path},
+        })[DEFAULT_DB_ALIAS]
+        try:
+            call_command('migrate', database=alias, verbosity=0)
+            user = User.objects.db_manager(alias).create_user(username='KT-0001', password='secret123')
+            # bulk_create keeps Member.save() from provisioning on the default DB
+            head, = Member.objects.using(alias).bulk_create([Member(
+                id=41, member_id='KT-0001', name="Murugan", address="Street",
+                is_family_head=True, user=user, annual_tax=Decimal("60.00"),
+            )])
+            Member.objects.using(alias).bulk_create([Member(
+                id=42, member_id='KT-0002', name="Kumar", address="Street", father=head,
+                is_family_head=False,
+            )])
+            kodai = AccountHead.objects.using(alias).create(
+                name="Kodai Vari", account_type="Revenue", created_by=user,
+            )
+            AccountTransaction.objects.using(alias).bulk_create([AccountTransaction(
+                account_head=kodai, transaction_type='CREDIT', amount=Decimal("500.00"),
+                transaction_date=datetime.date(2026, 2, 1), payment_mode='Cash',
+                entered_by=user, member=head,
+            )])
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+    def test_copies_rows_verbatim_and_moves_sequences(self):
+        import io
+        import os
+        import tempfile
+        from django.core.management import call_command
+
+        Member.objects.create(name="Stale", address="Gone", is_family_head=False)
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        self._make_source(path)
+
+        call_command('copy_sqlite_database', path, '--noinput', '--batch-size', '1', stdout=io.StringIO())
+
+        self.assertEqual(
+            list(Member.objects.order_by('id').values_list('id', 'member_id', 'father_id')),
+            [(41, 'KT-0001', None), (42, 'KT-0002', 41)],
+        )
+        head = Member.objects.get(pk=41)
+        self.assertEqual(head.annual_tax, Decimal("60.00"))
+        self.assertTrue(head.user.check_password('secret123'))
+        txn = AccountTransaction.objects.get()
+        self.assertEqual((txn.member_id, txn.amount), (41, Decimal("500.00")))
+
+        # New rows continue after the copied ids.
+        self.assertGreater(Member.objects.create(name="New", address="Street").pk, 42)
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+        from accounting.models import StaffProfile
+
+        # Tokens are only cached in a backend shared between workers.
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+
+        cache.clear()
+        user = User.objects.create_user(username='accountant1', password='password123')
+        self.profile = StaffProfile.objects.create(
+            user=user, name="Kannan", role='ACCOUNTANT', phone='9000000099',
+        )
+        self.token = Token.objects.create(user=user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_and_role_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = '/api/accounting/account-heads/'
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        def auth_queries(ctx):
+            return [q['sql'] for q in ctx.captured_queries
+                    if 'authtoken_token' in q['sql'] or 'accounting_staffprofile' in q['sql']]
+
+        self.assertEqual(len(auth_queries(first)), 2)
+        self.assertEqual(auth_queries(second), [])
+        self.assertEqual(len(second.captured_queries), len(first.captured_queries) - 2)
+
+    def test_deactivation_and_revocation_take_effect_immediately(self):
+        url = '/api/accounting/account-heads/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.profile.is_active = False
+        self.profile.save()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.token.delete()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_process_local_cache_is_not_used(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = '/api/accounting/account-heads/'
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertTrue(any('authtoken_token' in q['sql'] for q in ctx.captured_queries))
+
+
+class MemberSearchTestCase(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.admin = User.objects.create_user(username='admin_search', password='password123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.murugan = Member.objects.create(
+            member_id='KT-0001', name='Murugan S', name_ta='முருகன்', phone='9876543210',
+            address='Main Street', address_city='Madurai',
+        )
+        self.tamil_only = Member.objects.create(
+            member_id='KT-0002', name='', name_ta='கார்த்திகேயன்', phone='9123456780',
+            address='Temple Street', father_name='Murugan',
+        )
+        Member.objects.create(
+            member_id='KT-0003', name='Selvam', phone='9000000001', address='North Street',
+        )
+
+    def search(self, q):
+        response = self.client.get('/api/members/search/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['member_id'] for row in response.data['results']]
+
+    def test_matches_across_scripts_and_ranks_name_over_father(self):
+        self.assertEqual(self.search('murug'), ['KT-0001', 'KT-0002'])
+        self.assertEqual(self.search('முருகன்'), ['KT-0001', 'KT-0002'])
+        self.assertEqual(self.search('Karthikeyan'), ['KT-0002'])
+        self.assertEqual(self.search('murugan madurai'), ['KT-0001'])
+        self.assertEqual(self.search('+91 98765 43'), ['KT-0001'])
+        self.assertEqual(self.search(''), [])
+
+    def test_tokens_follow_saves(self):
+        self.murugan.name, self.murugan.name_ta = 'Senthil', 'செந்தில்'
+        self.murugan.save()
+        self.assertEqual(self.search('murug'), ['KT-0002'])
+        self.assertEqual(self.search('sent'), ['KT-0001'])
+
+        self.tamil_only.delete()
+        self.assertEqual(self.search('karthi'), [])
+
+
+class MemberLookupTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from members.lookup import member_lookup
+
+        cache.clear()
+        member_lookup.clear()
+        self.admin = User.objects.create_user(username='admin_lookup', password='password123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.member = Member.objects.create(
+            member_id='KT-0001', name='Murugan S', name_ta='முருகன்', phone='9876543210',
+            address='Main Street', address_city='Madurai', is_family_head=True,
+        )
+        Member.objects.create(
+            member_id='KT-0002', name='Murali', phone='9000000001', address='North Street', is_family_head=True,
+        )
+        Member.objects.create(
+            member_id='KT-0003', name='Murugesan', phone='9000000002', address='South Street',
+            is_family_head=True, is_active=False,
+        )
+
+    def lookup(self, q):
+        response = self.client.get('/api/members/lookup/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['member_id'] for row in response.data]
+
+    def test_suggestions_come_from_memory(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.assertEqual(self.lookup('mur'), ['KT-0002', 'KT-0001'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.lookup('முரு'), ['KT-0001'])
+            self.assertEqual(self.lookup('98765'), ['KT-0001'])
+            self.assertEqual(self.lookup('murugan'), ['KT-0001'])
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        response = self.client.get('/api/members/lookup/', {'q': 'madurai'})
+        self.assertEqual(
+            set(response.data[0]), {'id', 'member_id', 'name', 'name_ta', 'phone', 'city'}
+        )
+        self.assertEqual(response.data[0]['city'], 'Madurai')
+
+    def test_member_changes_refresh_the_index(self):
+        self.assertEqual(self.lookup('senthil'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.name = 'Senthil'
+            self.member.save()
+        self.assertEqual(self.lookup('senthil'), ['KT-0001'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.is_active = False
+            self.member.save()
+        self.assertEqual(self.lookup('senthil'), [])
+
+
+class SeedScaleCommandTestCase(TestCase):
+    def seed(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command(
+            'seed_scale', members=150, transactions=900, years=2, seed=3,
+            until=datetime.date(2026, 7, 31), batch_size=100, stdout=StringIO(),
+        )
+
+    def fingerprint(self):
+        return (
+            list(Member.objects.order_by('member_id').values_list(
+                'member_id', 'name', 'phone', 'father__member_id', 'is_family_head',
+                'is_expired', 'tax_count', 'amount_due',
+            )),
+            list(AccountTransaction.objects.order_by('receipt__receipt_number').values_list(
+                'receipt__receipt_number', 'transaction_date', 'transaction_type', 'amount',
+                'member__member_id', 'trust_account__account_name', 'is_deleted',
+            )),
+        )
+
+    def test_seed_is_deterministic_and_consistent(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import transaction
+        from members.family_graph import FamilyIndex
+        from members.models import MemberTax
+
+        with transaction.atomic():
+            self.seed()
+            first = self.fingerprint()
+            transaction.set_rollback(True)
+        self.seed()
+        self.assertEqual(self.fingerprint(), first)
+
+        self.assertEqual(Member.objects.count(), 150)
+        self.assertEqual(AccountTransaction.objects.filter(receipt__isnull=True).count(), 0)
+        self.assertGreaterEqual(AccountTransaction.objects.count(), 900)
+        heads = list(Member.objects.filter(is_family_head=True).values_list('id', flat=True))
+        counts = FamilyIndex.load().head_tax_counts(heads)
+        for member_id, tax_count in MemberTax.objects.values_list('member_id', 'tax_count'):
+            self.assertEqual(tax_count, counts[member_id])
+        # Raises on drift between the stored balances and the transactions.
+        call_command('reconcile_member_balances', stdout=StringIO())
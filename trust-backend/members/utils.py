@@ -142,7 +142,8 @@ def create_member_from_dict(data, user=None):
         - (None, False, reason) when skipped or errored
     """
     from decimal import Decimal
-    from accounting.models import AccountHead, AccountTransaction
+    from accounting.models import AccountTransaction
+    from accounting.utils import defer_member_rollups
     from django.utils import timezone
 
     phone = data.get('phone')
@@ -153,10 +154,8 @@ def create_member_from_dict(data, user=None):
         return (None, False, f"Phone {phone} already exists, skipping '{name}'")
 
     # Resolve or create fallback user
-    if not user:
-        user = User.objects.filter(is_superuser=True).first() or User.objects.filter(is_staff=True).first() or User.objects.first()
-    if not user:
-        user, _ = User.objects.get_or_create(username='system', defaults={'is_staff': True, 'is_superuser': True})
+    from .import_engine import kodai_vari_head, resolve_import_user
+    user = resolve_import_user(user)
 
     try:
         with transaction.atomic():
@@ -186,49 +185,43 @@ def create_member_from_dict(data, user=None):
             member.save()  # triggers auto-ID (KT-XXXX) and amount_due calc
 
             # Resolve the "Kodai Vari" account head
-            account_head, _ = AccountHead.objects.get_or_create(
-                name='Kodai Vari',
-                defaults={
-                    'name_ta': 'கொடை வரி',
-                    'head_type': 'Kodai',
-                    'is_active': True,
-                    'account_type': 'Revenue',
-                }
-            )
-
-            # Add Debit transaction if amount > 0
-            debit_amt = data.get('debit_amount', Decimal('0.00'))
-            if debit_amt > 0:
-                AccountTransaction.objects.create(
-                    account_head=account_head,
-                    transaction_type='DEBIT',
-                    amount=debit_amt,
-                    transaction_date=timezone.now().date(),
-                    payment_mode='Credit',
-                    member=member,
-                    donor_name=member.name,
-                    donor_name_ta=member.name_ta,
-                    donor_contact=member.phone or '',
-                    purpose="Kodai Vari Debit (Excel Import)",
-                    entered_by=user
-                )
-
-            # Add Credit transaction if amount > 0
-            credit_amt = data.get('credit_amount', Decimal('0.00'))
-            if credit_amt > 0:
-                AccountTransaction.objects.create(
-                    account_head=account_head,
-                    transaction_type='CREDIT',
-                    amount=credit_amt,
-                    transaction_date=timezone.now().date(),
-                    payment_mode='Cash',
-                    member=member,
-                    donor_name=member.name,
-                    donor_name_ta=member.name_ta,
-                    donor_contact=member.phone or '',
-                    purpose="Kodai Vari Credit (Excel Import)",
-                    entered_by=user
-                )
+            account_head = kodai_vari_head()
+
+            # One rollup for both entries instead of one per transaction
+            with defer_member_rollups():
+                # Add Debit transaction if amount > 0
+                debit_amt = data.get('debit_amount', Decimal('0.00'))
+                if debit_amt > 0:
+                    AccountTransaction.objects.create(
+                        account_head=account_head,
+                        transaction_type='DEBIT',
+                        amount=debit_amt,
+                        transaction_date=timezone.now().date(),
+                        payment_mode='Credit',
+                        member=member,
+                        donor_name=member.name,
+                        donor_name_ta=member.name_ta,
+                        donor_contact=member.phone or '',
+                        purpose="Kodai Vari Debit (Excel Import)",
+                        entered_by=user
+                    )
+
+                # Add Credit transaction if amount > 0
+                credit_amt = data.get('credit_amount', Decimal('0.00'))
+                if credit_amt > 0:
+                    AccountTransaction.objects.create(
+                        account_head=account_head,
+                        transaction_type='CREDIT',
+                        amount=credit_amt,
+                        transaction_date=timezone.now().date(),
+                        payment_mode='Cash',
+                        member=member,
+                        donor_name=member.name,
+                        donor_name_ta=member.name_ta,
+                        donor_contact=member.phone or '',
+                        purpose="Kodai Vari Credit (Excel Import)",
+                        entered_by=user
+                    )
 
             # Refresh and resave to run final rollups & ensure amount_due is perfectly computed
             member.refresh_from_db()
@@ -239,62 +232,129 @@ def create_member_from_dict(data, user=None):
         return (None, False, str(exc))
 
 
-def process_excel_workbook(wb, user=None):
+# Data starts at Excel row 7; rows 1-6 are the register's title block.
+DATA_START_ROW = 7
+
+_NUMERIC_COLUMNS = (
+    (3, 'Tax Count'), (5, 'Old Balance'), (6, 'Debit Amount'), (7, 'Credit Amount'),
+)
+
+
+def open_import_workbook(source):
     """
-    Process an openpyxl Workbook and return import results.
+    Open an uploaded register for import in openpyxl's read-only mode:
+    rows are streamed from the sheet XML instead of every cell being
+    loaded up front, and other sheets are never read.  Close it when done.
 
-    Returns a dict:
-        {
-            "created": int,
-            "skipped": int,
-            "errors": [{"row": int, "name": str, "reason": str}, ...]
-        }
+    Read-only sheets stop at the stored <dimension> header, which many
+    non-Excel writers leave stale, so the active sheet's dimensions are
+    reset: every row is read, and ``max_row`` is None until then.
     """
-    ws = wb.active
-    created = 0
-    skipped = 0
-    errors = []
-    seen_phones = set()
+    import openpyxl
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    wb.active.reset_dimensions()
+    return wb
 
-    for idx, row in enumerate(ws.iter_rows(values_only=True)):
-        # Data starts at Excel row 7 → 0-based index 6
-        if idx < 6:
-            continue
 
+def check_member_row(row):
+    """
+    Problems parse_member_row() would paper over: text in a numeric
+    column (read as the default) and a phone cell that is not a usable
+    10-digit number (imported as no phone).  Returns a list of messages.
+    """
+    row = list(row) + [None] * (10 - len(row))
+    problems = []
+    for col, label in _NUMERIC_COLUMNS:
+        value = row[col]
+        if isinstance(value, str) and value.strip() and not value.strip().startswith('='):
+            try:
+                float(value)
+            except ValueError:
+                problems.append(f"{label} '{value}' is not a number")
+    if row[9] not in (None, '') and normalize_phone(row[9]) is None:
+        problems.append(f"Phone '{row[9]}' is not a usable 10-digit number")
+    return problems
+
+
+def _iter_import_rows(ws, errors, warnings=None):
+    """
+    Yield (row_number, parsed) for every importable row of *ws*, appending
+    in-file duplicate phones to *errors*.  With *warnings*, also collect
+    check_member_row() problems and rows ignored for having no name.
+    """
+    seen_phones = set()
+    for row_number, row in enumerate(ws.iter_rows(min_row=DATA_START_ROW, values_only=True), DATA_START_ROW):
         parsed = parse_member_row(row)
         if parsed is None:
             # Blank or header row — skip silently
+            if warnings is not None and any(value not in (None, '') for value in row[2:]):
+                warnings.append({'row': row_number, 'name': '', 'reason': 'No member name; row ignored'})
             continue
 
         name = parsed.get('name', '')
         phone = parsed.get('phone')
+        if warnings is not None:
+            warnings.extend(
+                {'row': row_number, 'name': name, 'reason': problem}
+                for problem in check_member_row(row)
+            )
 
         if phone:
             # Deduplicate phone within the same file
             if phone in seen_phones:
                 errors.append({
-                    'row': idx + 1,
+                    'row': row_number,
                     'name': name,
                     'reason': f'Duplicate phone {phone} in this file',
                 })
-                skipped += 1
                 continue
             seen_phones.add(phone)
 
-        member, was_created, reason = create_member_from_dict(parsed, user=user)
-        if was_created:
-            created += 1
-        else:
-            skipped += 1
-            errors.append({
-                'row': idx + 1,
-                'name': name,
-                'reason': reason or 'Unknown',
-            })
+        yield row_number, parsed
 
+
+def process_excel_workbook(wb, user=None, dry_run=False, on_progress=None):
+    """
+    Process an openpyxl Workbook and return import results.
+
+    Rows are streamed from the active sheet, deduplicated, and handed to
+    members.import_engine in chunks.  With dry_run=True nothing is
+    written; the sheet is validated in one pass instead.
+
+    Returns a dict:
+        {
+            "created": int,
+            "skipped": int,
+            "errors": [{"row": int, "name": str, "reason": str}, ...]
+        }
+    Dry runs return "would_create" instead of "created", plus
+    "dry_run": True and a "warnings" list in the same format.
+    on_progress(rows_done) is called as each chunk is imported.
+    """
+    from .import_engine import import_member_rows, validate_member_rows
+
+    ws = wb.active
+    errors = []
+    warnings = [] if dry_run else None
+    rows = _iter_import_rows(ws, errors, warnings)
+
+    if dry_run:
+        count, import_errors = validate_member_rows(rows)
+    else:
+        count, import_errors = import_member_rows(rows, user=user, on_progress=on_progress)
+    errors = sorted(errors + import_errors, key=lambda error: error['row'])
+
+    if dry_run:
+        return {
+            'dry_run': True,
+            'would_create': count,
+            'skipped': len(errors),
+            'errors': errors,
+            'warnings': warnings,
+        }
     return {
-        'created': created,
-        'skipped': skipped,
+        'created': count,
+        'skipped': len(errors),
         'errors': errors,
     }
 
@@ -391,20 +451,23 @@ def revoke_credentials(member):
         user.delete()
 
 
-def trigger_succession(expired_member):
+def trigger_succession(expired_member, index=None):
     """
     Automated succession workflow on expiration of a family head.
     Locates active children, sorts chronologically (seniority), and promotes
     the elder son (or oldest active child if no male child is found).
+
+    Pass a prebuilt FamilyIndex when processing many expiries at once;
+    otherwise only the expired member's children are loaded.
     """
-    children = Member.objects.filter(father=expired_member, is_active=True).order_by('date_of_birth')
-    
-    # Seniority: Elder Son (Male)
-    elder_son = children.filter(gender='Male').first()
-    if not elder_son:
-        elder_son = children.first()
-        
-    if elder_son:
+    from .family_graph import FamilyIndex
+
+    if index is None:
+        index = FamilyIndex.load(Member.objects.filter(father=expired_member))
+    successor_id = index.successor_of(expired_member.pk)
+
+    if successor_id:
+        elder_son = Member.objects.get(pk=successor_id)
         elder_son.is_family_head = True
         elder_son.save()
 
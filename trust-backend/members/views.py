@@ -10,6 +10,8 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 
 from .models import Member, Announcement, Event, Meeting, TaxMaster, MemberTax, Transaction
 from accounting.models import StaffProfile
+from jobs.views import async_requested, enqueue_response
+from .authentication import principal_for
 from .serializers import (
     MemberSerializer, MemberCreateSerializer, MemberUpdateSerializer,
     MemberListSerializer, UserLoginSerializer,
@@ -28,27 +30,20 @@ class IsAdminOrOwner(permissions.BasePermission):
         return request.user and request.user.is_authenticated
     
     def has_object_permission(self, request, view, obj):
+        principal = principal_for(request.user)
         # Admin can access everything
-        if request.user.is_staff:  # type: ignore[union-attr]
+        if principal.is_admin:
             return True
-            
-        # Check if user has an active StaffProfile with role=ACCOUNTANT
-        is_accountant = False
-        try:
-            profile = request.user.staff_profile
-            is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            pass
-            
+
         # Accountants can read member and related information
-        if is_accountant and request.method in permissions.SAFE_METHODS:
+        if principal.is_accountant and request.method in permissions.SAFE_METHODS:
             return True
-            
+
         # Members can only access their own profile / data
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        if hasattr(obj, 'member') and hasattr(obj.member, 'user'):
-            return obj.member.user == request.user
+        if hasattr(obj, 'user_id'):
+            return obj.user_id == request.user.pk
+        if hasattr(obj, 'member_id'):
+            return principal.member_id is not None and obj.member_id == principal.member_id
         return False
 
 
@@ -79,21 +74,46 @@ class MemberViewSet(viewsets.ModelViewSet):
         user = self.request.user
         # IsAdminOrOwner ensures only authenticated Users reach here
         assert isinstance(user, User)
-        
-        # Check if user is an active accountant
-        is_accountant = False
-        try:
-            profile = user.staff_profile
-            is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            pass
 
-        if user.is_staff or is_accountant:
+        if principal_for(user).sees_all:
             # Admin and Accountant see all members
-            return Member.objects.all()
+            qs = Member.objects.all()
         else:
             # Members see only their own profile
-            return Member.objects.filter(user=user)
+            qs = Member.objects.filter(user=user)
+
+        if self.action == 'list':
+            qs = self._with_list_annotations(qs)
+        return qs
+
+    @staticmethod
+    def _with_list_annotations(qs):
+        """
+        Everything MemberListSerializer reads, fetched up front: children
+        count and MemberTax sums as correlated subqueries (no GROUP BY fan-out
+        between the two relations), children and taxes prefetched.
+        """
+        from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Sum
+
+        def tax_sum(field):
+            return Subquery(
+                MemberTax.objects.filter(member=OuterRef('pk')).order_by()
+                .values('member').annotate(total=Sum(field)).values('total')
+            )
+
+        return qs.annotate(
+            num_children=Subquery(
+                Member.objects.filter(father=OuterRef('pk')).order_by()
+                .values('father').annotate(n=Count('pk')).values('n'),
+                output_field=IntegerField(),
+            ),
+            tax_total=tax_sum('total_tax'),
+            tax_paid=tax_sum('amount_paid'),
+            tax_due=tax_sum('amount_due'),
+        ).prefetch_related(
+            'children_set',
+            Prefetch('taxes', queryset=MemberTax.objects.select_related('tax')),
+        )
     
     @action(detail=False, methods=['get'])
     def me(self, request):
@@ -126,18 +146,67 @@ class MemberViewSet(viewsets.ModelViewSet):
             'members_paid': total_paid,
             'members_pending': total_pending,
         })
-    
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked name / phone / city search over the bilingual token index:
+        ?q=murugan matches "முருகன்" and vice versa, ?q=98765 phone prefixes.
+        """
+        from .search import search_member_ids
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        principal = principal_for(request.user)
+        if not principal.sees_all and principal.member_id is None:
+            return Response({'count': 0, 'results': []})
+        hits = search_member_ids(
+            request.query_params.get('q', ''), limit=limit,
+            member_id=None if principal.sees_all else principal.member_id,
+        )
+        scores = dict(hits)
+        rows = {
+            row['id']: row for row in Member.objects.filter(pk__in=scores).values(
+                'id', 'member_id', 'name', 'name_ta', 'phone', 'father_name', 'father_name_ta',
+                'address_city', 'address_city_ta', 'is_active',
+            )
+        }
+        results = [dict(rows[pk], score=score) for pk, score in hits if pk in rows]
+        return Response({'count': len(results), 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """
+        Typeahead for the donor picker (Accountant / Admin): active family
+        heads matching ?q=, served from the in-process index.
+        """
+        from .lookup import member_lookup
+
+        if not principal_for(request.user).sees_all:
+            return Response(
+                {'error': 'Accountant or admin access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = member_lookup.lookup(request.query_params.get('q', ''), limit)
+        return Response([row._asdict() for row in rows])
+
     @action(detail=True, methods=['post'], url_path='approve-profile-update')
     def approve_profile_update(self, request, pk=None):
         """Approve a member's pending profile update"""
-        is_accountant = False
-        try:
-            profile = request.user.staff_profile
-            is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            pass
-            
-        if not (request.user.is_staff or is_accountant):
+        if not principal_for(request.user).sees_all:
             return Response({'error': 'Unauthorized access'}, status=status.HTTP_403_FORBIDDEN)
             
         member = self.get_object()
@@ -211,14 +280,7 @@ class MemberViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='reject-profile-update')
     def reject_profile_update(self, request, pk=None):
         """Reject a member's pending profile update"""
-        is_accountant = False
-        try:
-            profile = request.user.staff_profile
-            is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            pass
-            
-        if not (request.user.is_staff or is_accountant):
+        if not principal_for(request.user).sees_all:
             return Response({'error': 'Unauthorized access'}, status=status.HTTP_403_FORBIDDEN)
             
         member = self.get_object()
@@ -241,98 +303,35 @@ class MemberViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def export_excel(self, request):
-        """Export members to Excel (Admin only)"""
+        """
+        Export members (Admin only). Streams .xlsx by default;
+        ?export=csv or ?export=ndjson for downstream tools.
+        """
         if not request.user.is_staff:
             return Response(
                 {'error': 'Admin access required'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        
-        from django.http import HttpResponse
-        import openpyxl
-        from openpyxl.styles import Font
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        if ws is None:
-            ws = wb.create_sheet()
-        ws.title = "Members"
-
-        headers = [
-            'Member ID', 'Name', 'Name (Tamil)',
-            'Phone', 'DOB',
-            'Address', 'Address (Tamil)',
-            'Father Name', 'Father Name (Tamil)',
-            'Mother Name', 'Mother Name (Tamil)',
-            'Spouse Name', 'Spouse Name (Tamil)',
-            'Children',
-            'Annual Tax', 'Amount Paid', 'Amount Due', 'Status'
-        ]
-
-        ws.append(headers)
-
-        # Format header row: bold and freeze pane
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-        ws.freeze_panes = 'A2'
-
-        members = Member.objects.prefetch_related('children').all()
-        for member in members:
-            children_list = '; '.join([
-                f"{c.name} ({c.date_of_birth.strftime('%d/%m/%Y') if c.date_of_birth else ''}, {c.gender})"
-                for c in member.children.all()
-            ])
-            row = [
-                member.member_id,
-                member.name, member.name_ta,
-                member.phone,
-                member.date_of_birth,
-                member.address, member.address_ta,
-                member.father_name, member.father_name_ta,
-                member.mother_name, member.mother_name_ta,
-                member.spouse_name, member.spouse_name_ta,
-                children_list,
-                member.annual_tax, member.amount_paid, member.amount_due,
-                member.payment_status
-            ]
-            ws.append(row)
-
-            # Format DOB cell (column 5) as Excel date
-            dob_cell = ws.cell(row=ws.max_row, column=5)
-            if dob_cell.value:
-                dob_cell.number_format = 'DD/MM/YYYY'
-
-        # Auto-size columns based on content length
-        from openpyxl.utils import get_column_letter
-        for col_idx, col in enumerate(ws.columns, start=1):
-            max_length = 0
-            column_letter = get_column_letter(col_idx)
-            for cell in col:
-                try:
-                    if cell.value:
-                        cell_len = len(str(cell.value))
-                        if cell_len > max_length:
-                            max_length = cell_len
-                except Exception:
-                    pass
-            
-            adjusted_width = max_length + 2
-            # Set reasonable min and max bounds for column width
-            adjusted_width = max(10, min(adjusted_width, 50))
-            ws.column_dimensions[column_letter].width = adjusted_width
 
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="members.xlsx"'
-        wb.save(response)
+        from .roster_export import roster_response
 
-        return response
+        export = request.query_params.get('export', 'xlsx')
+        if export not in ('xlsx', 'csv', 'ndjson'):
+            return Response(
+                {'error': 'export must be one of xlsx, csv, ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if async_requested(request):
+            return enqueue_response(request, 'members.export_roster', {'export': export})
+        return roster_response(export)
 
     @action(detail=False, methods=['post'], url_path='import-excel',
             permission_classes=[permissions.IsAdminUser])
     def import_excel(self, request):
-        """Bulk import members from a Tamil Excel file (Admin only)"""
+        """
+        Bulk import members from a Tamil Excel file (Admin only).
+        Send dry_run=true to validate the sheet without writing anything.
+        """
         excel_file = request.FILES.get('excel_file')
         if not excel_file:
             return Response(
@@ -346,18 +345,33 @@ class MemberViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        import openpyxl
-        from .utils import process_excel_workbook
+        from .utils import open_import_workbook, process_excel_workbook
+
+        dry_run = str(
+            request.data.get('dry_run') or request.query_params.get('dry_run', '')
+        ).lower() in ('1', 'true', 'yes')
+
+        if async_requested(request):
+            import uuid
+            from django.core.files.storage import default_storage
+
+            path = default_storage.save(f'jobs/uploads/{uuid.uuid4().hex}.xlsx', excel_file)
+            return enqueue_response(request, 'members.import_excel', {
+                'path': path, 'user_id': request.user.id, 'dry_run': dry_run,
+            })
 
         try:
-            wb = openpyxl.load_workbook(excel_file, data_only=True)
+            wb = open_import_workbook(excel_file)
         except Exception as exc:
             return Response(
                 {'error': f'Failed to read Excel file: {exc}'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        results = process_excel_workbook(wb, user=request.user)
+        try:
+            results = process_excel_workbook(wb, user=request.user, dry_run=dry_run)
+        finally:
+            wb.close()
         return Response(results, status=status.HTTP_200_OK)
 
 class AuthViewSet(viewsets.ViewSet):
@@ -605,68 +619,57 @@ class TaxMasterViewSet(viewsets.ModelViewSet):
             
         if tax_master.status == 'Generated':
             return Response({'error': 'Taxes have already been generated for this event'}, status=status.HTTP_400_BAD_REQUEST)
-            
-        from decimal import Decimal
-        from django.db import transaction
-        from django.utils import timezone
-        from accounting.models import AccountHead, AccountTransaction
-        
-        with transaction.atomic():
-            # Get the AccountHead linked to the tax event or fallback to 'Tax Kodai'
-            account_head = tax_master.account_head
-            if not account_head:
-                account_head, _ = AccountHead.objects.get_or_create(
-                    name='Tax Kodai',
-                    defaults={
-                        'head_type': 'Event',
-                        'is_active': True,
-                        'account_type': 'Revenue',
-                        'created_by': request.user if request.user.is_authenticated else None
-                    }
-                )
-            
-            members = Member.objects.filter(is_family_head=True, is_active=True)
-            created_count = 0
-            for member in members:
-                from .utils import calculate_member_tax_count
-                tax_count = calculate_member_tax_count(member)
-                
-                total_tax = (tax_count * tax_master.base_amount).quantize(Decimal('0.00'))
-                
-                obj, created = MemberTax.objects.update_or_create(
-                    member=member,
-                    tax=tax_master,
-                    defaults={
-                        'tax_count': tax_count,
-                        'total_tax': total_tax,
-                    }
-                )
-                if created:
-                    created_count += 1
-                    
-                # Create account debit/bill entry (DEBIT type transaction) for the member
-                if total_tax > 0:
-                    AccountTransaction.objects.create(
-                        account_head=account_head,
-                        tax_event=tax_master,
-                        transaction_type='DEBIT',
-                        amount=total_tax,
-                        transaction_date=timezone.now().date(),
-                        payment_mode='Credit',
-                        member=member,
-                        donor_name=member.name,
-                        donor_contact=member.phone or '',
-                        purpose=f"Tax Kodai: {tax_master.name}",
-                        entered_by=request.user
-                    )
-                    
-            # Update tax event status and generated date
-            tax_master.status = 'Generated'
-            tax_master.generated_date = timezone.now().date()
-            tax_master.save()
+
+        if async_requested(request):
+            return enqueue_response(request, 'members.generate_taxes', {
+                'tax_id': tax_master.id, 'user_id': request.user.id,
+            })
+
+        from django.core.exceptions import ValidationError
+        from .tax_engine import generate_taxes
+
+        try:
+            created_count = generate_taxes(tax_master, request.user)
+        except ValidationError as exc:
+            return Response({'error': exc.message_dict}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'message': f'Generated {created_count} new taxes for {tax_master.name}'})
 
+    @action(detail=False, methods=['get'], url_path='preview-tax-counts', permission_classes=[permissions.IsAdminUser])
+    def preview_tax_counts(self, request):
+        """
+        Tax count of every active family head, as generate_taxes would
+        compute it, without writing anything.  ?tax_id=<id> adds total_tax.
+        """
+        from decimal import Decimal
+        from .family_graph import FamilyIndex
+
+        base_amount = None
+        tax_id = request.query_params.get('tax_id')
+        if tax_id:
+            try:
+                base_amount = TaxMaster.objects.get(id=tax_id).base_amount
+            except (TaxMaster.DoesNotExist, ValueError):
+                return Response({'error': 'TaxMaster not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        counts = FamilyIndex.load().head_tax_counts()
+        heads = (
+            Member.objects.filter(id__in=list(counts))
+            .order_by('name')
+            .values('id', 'member_id', 'name', 'name_ta')
+        )
+        results = []
+        for head in heads:
+            row = dict(head, tax_count=counts[head['id']])
+            if base_amount is not None:
+                row['total_tax'] = (row['tax_count'] * base_amount).quantize(Decimal('0.00'))
+            results.append(row)
+        return Response({
+            'count': len(results),
+            'total_tax_count': sum((r['tax_count'] for r in results), Decimal('0.0')),
+            'results': results,
+        })
+
 class MemberTaxViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = MemberTaxSerializer
     permission_classes = [IsAdminOrOwner]
@@ -674,22 +677,13 @@ class MemberTaxViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         user = self.request.user
         assert isinstance(user, User)
-        
-        # Check if user is an active accountant
-        is_accountant = False
-        try:
-            profile = user.staff_profile
-            is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            pass
 
-        if user.is_staff or is_accountant:
+        principal = principal_for(user)
+        if principal.sees_all:
             return MemberTax.objects.all()
-        try:
-            member = Member.objects.get(user=user)
-            return MemberTax.objects.filter(member=member)
-        except Member.DoesNotExist:
+        if principal.member_id is None:
             return MemberTax.objects.none()
+        return MemberTax.objects.filter(member_id=principal.member_id)
 
 class TransactionViewSet(viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
@@ -698,22 +692,13 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         assert isinstance(user, User)
-        
-        # Check if user is an active accountant
-        is_accountant = False
-        try:
-            profile = user.staff_profile
-            is_accountant = profile.role == 'ACCOUNTANT' and profile.is_active
-        except Exception:
-            pass
 
-        if user.is_staff or is_accountant:
+        principal = principal_for(user)
+        if principal.sees_all:
             return Transaction.objects.all()
-        try:
-            member = Member.objects.get(user=user)
-            return Transaction.objects.filter(member=member)
-        except Member.DoesNotExist:
+        if principal.member_id is None:
             return Transaction.objects.none()
+        return Transaction.objects.filter(member_id=principal.member_id)
             
     def perform_create(self, serializer):
         from django.db import transaction as db_transaction
@@ -10,6 +10,7 @@ import string
 
 from .models import Payment
 from members.models import Member
+from members.authentication import principal_for
 from .serializers import (
     PaymentSerializer, PaymentCreateSerializer, PaymentListSerializer,
     PaymentStatisticsSerializer
@@ -43,11 +44,10 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return Payment.objects.all()
         else:
             # Members see only their own payments
-            try:
-                member = Member.objects.get(user=user)
-                return Payment.objects.filter(member=member)
-            except Member.DoesNotExist:
+            member_id = principal_for(user).member_id
+            if member_id is None:
                 return Payment.objects.none()
+            return Payment.objects.filter(member_id=member_id)
     
     def create(self, request, *args, **kwargs):
         """Create a new payment with auto-generated reference number"""
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'members',
     'payments',
     'accounting',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -75,24 +76,51 @@ TEMPLATES = [
 WSGI_APPLICATION = 'trust_portal.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# DB_ENGINE=sqlite (default, single machine) or postgresql (production).
+# SQLite has no row locks (select_for_update is a no-op) and allows one
+# writer at a time; use PostgreSQL wherever several users post at once.
+# Move existing data over with `python manage.py copy_sqlite_database`.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
 
-# For PostgreSQL (recommended for production):
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': config('DB_NAME', default='trust_portal_db'),
-#         'USER': config('DB_USER', default='postgres'),
-#         'PASSWORD': config('DB_PASSWORD', default=''),
-#         'HOST': config('DB_HOST', default='localhost'),
-#         'PORT': config('DB_PORT', default='5432'),
-#     }
-# }
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='trust_portal_db'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Persistent connections: reused across requests for up to
+            # CONN_MAX_AGE seconds and checked before reuse, so a connection
+            # dropped by the server or a pooler is replaced transparently.
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            # Required behind PgBouncer in transaction pooling mode.
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=10, cast=int),
+            },
+            'TEST': {
+                'NAME': config('DB_TEST_NAME', default='test_trust_portal_db'),
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # Wait for a competing writer instead of failing at once
+                # with "database is locked".
+                'timeout': config('DB_SQLITE_TIMEOUT', default=20, cast=int),
+            },
+        }
+    }
+else:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}")
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -136,7 +164,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication plus a short-lived cache of the token's user
+        # and role; see members/authentication.py.
+        'members.authentication.CachedTokenAuthentication',
         # SessionAuthentication is intentionally excluded: it enforces an
         # internal CSRF check on every POST (independent of Django's CSRF
         # middleware), which causes 403 on login/logout for Token-auth clients.
@@ -154,6 +184,17 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 50,
 }
 
+# Seconds a token's user and role stay cached (members/authentication.py).
+# Only applies when CACHES points the default cache at a shared backend
+# (Redis, Memcached, database, file); with the process-local default every
+# request looks the token up, so revocation reaches all workers at once.
+AUTH_CACHE_TTL = config('AUTH_CACHE_TTL', default=60, cast=int)
+
+# Seconds before a worker rebuilds its member typeahead index even without
+# a version bump (members/lookup.py); bumps only reach other workers
+# through a shared CACHES backend.
+MEMBER_LOOKUP_MAX_AGE = config('MEMBER_LOOKUP_MAX_AGE', default=300, cast=int)
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -203,3 +244,25 @@ TRUST_CONFIG = {
 # Receipt HTML template configuration
 ACTIVE_RECEIPT_TEMPLATE = None
 CUSTODIAN_SIGNATURE_PATH = None
+
+# Receipt PDF render queue — when True, transaction saves only insert the
+# Receipt row and `python manage.py process_receipt_queue` renders the PDF.
+RECEIPT_PDF_ASYNC = config('RECEIPT_PDF_ASYNC', default=True, cast=bool)
+RECEIPT_RENDER_MAX_ATTEMPTS = config('RECEIPT_RENDER_MAX_ATTEMPTS', default=3, cast=int)
+RECEIPT_RENDER_STALE_SECONDS = config('RECEIPT_RENDER_STALE_SECONDS', default=300, cast=int)
+# Seconds a download waits for a receipt a worker is rendering before a 503.
+RECEIPT_RENDER_WAIT_SECONDS = config('RECEIPT_RENDER_WAIT_SECONDS', default=15, cast=int)
+
+# Member rollups (accounting/ledger.py): "incremental" applies per-transaction
+# deltas to MemberLedgerBalance rows; "recompute" re-sums the tax year.
+MEMBER_ROLLUP_MODE = config('MEMBER_ROLLUP_MODE', default='incremental')
+
+# Background jobs (jobs/queue.py), run by `python manage.py run_jobs`
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=3, cast=int)
+JOB_RETRY_BACKOFF_SECONDS = config('JOB_RETRY_BACKOFF_SECONDS', default=30, cast=int)
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=900, cast=int)
+
+# Persistent headless-browser pool (accounting/browser_pool.py)
+RECEIPT_BROWSER_POOL_SIZE = config('RECEIPT_BROWSER_POOL_SIZE', default=2, cast=int)
+RECEIPT_BROWSER_MAX_RENDERS = config('RECEIPT_BROWSER_MAX_RENDERS', default=100, cast=int)
+RECEIPT_BROWSER_TIMEOUT = config('RECEIPT_BROWSER_TIMEOUT', default=15, cast=int)
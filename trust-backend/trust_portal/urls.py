@@ -26,6 +26,7 @@ urlpatterns = [
     path('api/members/', include('members.urls')),
     path('api/payments/', include('payments.urls')),
     path('api/accounting/', include('accounting.urls')),
+    path('api/jobs/', include('jobs.urls')),
 ]
 
 # Serve media files in development
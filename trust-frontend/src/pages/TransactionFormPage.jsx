@@ -17,7 +17,8 @@ import api from '../services/api';
 
 export default function TransactionFormPage({ t, onSuccess, onCancel }) {
   const [heads, setHeads] = useState([]);
-  const [members, setMembers] = useState([]);
+  const [memberQuery, setMemberQuery] = useState('');
+  const [memberOptions, setMemberOptions] = useState([]);
   const [trustAccounts, setTrustAccounts] = useState([]);
   const [measurementUnit, setMeasurementUnit] = useState('Grams');
   const [form, setForm] = useState({
@@ -71,13 +72,6 @@ export default function TransactionFormPage({ t, onSuccess, onCancel }) {
       })
       .catch(console.error);
 
-    memberAPI.getAll({ page_size: 1000 })
-      .then((res) => {
-        const data = Array.isArray(res.data) ? res.data : res.data?.results || [];
-        setMembers(data);
-      })
-      .catch(console.error);
-
     api.get('/accounting/trust-accounts/?status=Active&page_size=1000')
       .then((res) => {
         const data = Array.isArray(res.data) ? res.data : res.data?.results || [];
@@ -86,6 +80,32 @@ export default function TransactionFormPage({ t, onSuccess, onCancel }) {
       .catch(console.error);
   }, []);
 
+  // Member typeahead: served from the backend's in-memory index, so a
+  // request per keystroke is cheap. Responses for older input are dropped.
+  useEffect(() => {
+    const q = memberQuery.trim();
+    if (!q || form.member) {
+      setMemberOptions([]);
+      return undefined;
+    }
+    let stale = false;
+    memberAPI.lookup(q)
+      .then((res) => { if (!stale) setMemberOptions(res.data); })
+      .catch(console.error);
+    return () => { stale = true; };
+  }, [memberQuery, form.member]);
+
+  const selectMember = (m) => {
+    setMemberQuery(m ? `${m.name}${m.name_ta ? ` / ${m.name_ta}` : ''}` : '');
+    setForm(prev => ({
+      ...prev,
+      member: m ? String(m.id) : '',
+      donor_name: '',
+      donor_name_ta: '',
+      donor_contact: '',
+    }));
+  };
+
   useEffect(() => {
     if (form.member && form.payment_mode !== 'Credit') {
       let targetType = '';
@@ -228,6 +248,7 @@ export default function TransactionFormPage({ t, onSuccess, onCancel }) {
         purpose_description_ta: '',
         bill_reference: '',
       });
+      setMemberQuery('');
       setProofFile(null);
       if (onSuccess) onSuccess();
     } catch (err) {
@@ -303,28 +324,39 @@ export default function TransactionFormPage({ t, onSuccess, onCancel }) {
         <div style={{ ...styles.formGrid, marginBottom: '24px' }}>
           <div style={styles.formGroup}>
             <label style={styles.formLabel}>{t.memberSelection || 'Select Member'} (Optional)</label>
-            <select
-              value={form.member}
-              onChange={(e) => {
-                const memberId = e.target.value;
-                setForm(prev => ({
-                  ...prev,
-                  member: memberId,
-                  donor_name: '',
-                  donor_name_ta: '',
-                  donor_contact: '',
-                }));
-              }}
-              style={styles.formInput}
-            >
-              <option value="">{t.selectMember || 'Select Member (None)'}</option>
-              {members
-                .filter(m => m.is_active && m.is_family_head)
-                .map((m) => (
-                  <option key={m.id} value={m.id}>{m.name}{m.name_ta ? ` / ${m.name_ta}` : ''}</option>
-                ))
-              }
-            </select>
+            <div style={{ position: 'relative' }}>
+              <input
+                type="text"
+                value={memberQuery}
+                onChange={(e) => {
+                  if (form.member) selectMember(null);
+                  setMemberQuery(e.target.value);
+                }}
+                placeholder={t.selectMember || 'Select Member (None)'}
+                style={styles.formInput}
+                autoComplete="off"
+              />
+              {memberOptions.length > 0 && (
+                <div style={{
+                  position: 'absolute', top: '100%', left: 0, right: 0, zIndex: 10,
+                  background: '#fff', border: '1px solid #e5e7eb', borderRadius: '6px',
+                  boxShadow: '0 4px 12px rgba(0,0,0,0.1)', maxHeight: '260px', overflowY: 'auto',
+                }}>
+                  {memberOptions.map((m) => (
+                    <div
+                      key={m.id}
+                      onMouseDown={(e) => { e.preventDefault(); selectMember(m); }}
+                      style={{ padding: '8px 12px', cursor: 'pointer', borderBottom: '1px solid #f3f4f6' }}
+                    >
+                      <div>{m.name}{m.name_ta ? ` / ${m.name_ta}` : ''}</div>
+                      <div style={{ fontSize: '12px', color: '#6b7280' }}>
+                        {m.member_id}{m.phone ? ` · ${m.phone}` : ''}{m.city ? ` · ${m.city}` : ''}
+                      </div>
+                    </div>
+                  ))}
+                </div>
+              )}
+            </div>
           </div>
         </div>
 
@@ -65,6 +65,9 @@ export const memberAPI = {
   getStatistics: () =>
     api.get('/members/statistics/'),
 
+  lookup: (q, params) =>
+    api.get('/members/lookup/', { params: { q, ...params } }),
+
   exportExcel: () =>
     api.get('/members/export_excel/', { responseType: 'blob' }),
 